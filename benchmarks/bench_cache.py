@@ -0,0 +1,60 @@
+"""
+Cold-run vs warm-run benchmark for the binary columnar csv cache.
+
+Run from the repository root:
+    python -m benchmarks.bench_cache --rows 5000000
+"""
+
+import argparse
+from pathlib import Path
+import shutil
+import tempfile
+import time
+
+from benchmarks.synthetic import write_sales_csv
+from src.cache import cache_dir_for, load_sales_csv_cached
+from src.columnar import growth_records
+
+
+def main():
+    """
+    Time a cold run, which parses and writes the cache, against warm runs
+    that memory-map it. Growth computation is timed separately.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--warm-runs', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_filename = (Path(temp_dir) / Path('sales_product.csv')).as_posix()
+        rows = write_sales_csv(csv_filename, args.rows)
+        shutil.rmtree(cache_dir_for(csv_filename), ignore_errors=True)
+
+        start = time.perf_counter()
+        columns = load_sales_csv_cached(csv_filename, 'barcode_no', 'product_name')
+        cold_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        growth_records(columns, 'barcode_no', 'product_name')
+        growth_seconds = time.perf_counter() - start
+
+        warm_seconds = []
+        for _ in range(args.warm_runs):
+            start = time.perf_counter()
+            load_sales_csv_cached(csv_filename, 'barcode_no', 'product_name')
+            warm_seconds.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        load_sales_csv_cached(csv_filename, 'barcode_no', 'product_name', verify=True)
+        verified_seconds = time.perf_counter() - start
+
+    print(f"rows: {rows:,}")
+    print(f"cold load (parse + write cache): {cold_seconds:.2f}s")
+    print(f"warm load (mmap):                {min(warm_seconds):.4f}s")
+    print(f"warm load (mmap + hash check):   {verified_seconds:.4f}s")
+    print(f"growth computation:              {growth_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
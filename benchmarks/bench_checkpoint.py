@@ -0,0 +1,89 @@
+"""
+Benchmark for the overhead of checkpointed report runs.
+
+Run from the repository root:
+    python -m benchmarks.bench_checkpoint --rows 1000000 --intervals 60 1 0
+"""
+
+import argparse
+import filecmp
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks.synthetic import write_sales_csv
+from src import checkpoint
+from src.checkpoint import run_checkpointed
+from src.main import run
+
+
+def main_benchmark():
+    """
+    Time run() against the checkpointed run at each checkpoint interval.
+    An interval of 0 checkpoints as often as the MAX_OVERHEAD bound allows.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--intervals', type=float, nargs='+', default=[60.0, 1.0, 0.0],
+                        help="seconds between checkpoints")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--background', choices=('auto', 'on', 'off'), default='auto',
+                        help="save the parse state from a forked process "
+                             "(auto: when there is a core to spare)")
+    args = parser.parse_args()
+
+    saves = []
+    saved = checkpoint.Checkpointer._saved  # pylint: disable=protected-access
+
+    def counting_saved(self, started):
+        saved(self, started)
+        saves.append(time.perf_counter() - started)
+
+    checkpoint.Checkpointer._saved = counting_saved  # pylint: disable=protected-access
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        brand_csv = (Path(temp_dir) / Path('sales_brand.csv')).as_posix()
+        product_csv = (Path(temp_dir) / Path('sales_product.csv')).as_posix()
+        write_sales_csv(brand_csv, rows=args.rows // 10, kind='brand')
+        write_sales_csv(product_csv, rows=args.rows)
+        expected = (Path(temp_dir) / Path('results.json')).as_posix()
+        actual = (Path(temp_dir) / Path('results_checkpointed.json')).as_posix()
+
+        background = {'auto': None, 'on': True, 'off': False}[args.background]
+        if background is None:
+            background = checkpoint.Checkpointer(Path(temp_dir)).background
+        print(f"rows: {args.rows:,} product + {args.rows // 10:,} brand, "
+              f"best of {args.repeat}, {'background' if background else 'foreground'} saves")
+
+        # interleaved, so drift in machine speed affects every variant alike
+        best = {}
+        identical = True
+        for _ in range(args.repeat):
+            for interval in [None, *args.intervals]:
+                saves.clear()
+                start = time.perf_counter()
+                if interval is None:
+                    run(brand_csv_filename=brand_csv, product_csv_filename=product_csv,
+                        output_filename=expected)
+                else:
+                    run_checkpointed(brand_csv, product_csv, actual, interval=interval,
+                                     background=background)
+                seconds = time.perf_counter() - start
+                if interval is not None:
+                    identical = identical and filecmp.cmp(actual, expected, shallow=False)
+                if interval not in best or seconds < best[interval][0]:
+                    best[interval] = (seconds, len(saves), sum(saves))
+
+        baseline = best[None][0]
+        print(f"run():                      {baseline:.2f}s")
+
+        for interval in args.intervals:
+            seconds, checkpoints, saving = best[interval]
+            print(f"checkpoint every {interval:>4g}s:    {seconds:.2f}s "
+                  f"({(seconds / baseline - 1) * 100:+.1f}%), {checkpoints} checkpoints "
+                  f"taking {saving:.2f}s to save ({saving / seconds * 100:.1f}% of the run)")
+
+        print(f"identical: {identical}")
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,80 @@
+"""
+Benchmark for per-job overhead of the command line.
+
+Run from the repository root:
+    python -m benchmarks.bench_cli --jobs 50 --rows 500
+"""
+
+import argparse
+import json
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_sales_csv
+from src.main import run
+
+
+def _seconds(command: list) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, check=True)
+    return time.perf_counter() - start
+
+
+def main_benchmark():
+    """
+    Time many small reports run as one process per job, as the scheduler
+    launches them, and as a single batch process. Overhead is the time per
+    job beyond the report itself, as measured by in-process run() calls.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--jobs', type=int, default=50)
+    parser.add_argument('--rows', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manifest = []
+        for index in range(args.jobs):
+            brand_csv = (Path(temp_dir) / Path(f'sales_brand_{index}.csv')).as_posix()
+            product_csv = (Path(temp_dir) / Path(f'sales_product_{index}.csv')).as_posix()
+            write_sales_csv(brand_csv, rows=max(args.rows // 10, 1), kind='brand', seed=index)
+            write_sales_csv(product_csv, rows=args.rows, seed=index)
+            manifest.append({"brand_csv": brand_csv, "product_csv": product_csv,
+                             "output": f"results_{index}.json"})
+
+        manifest_path = Path(temp_dir) / Path('manifest.json')
+        manifest_path.write_text(json.dumps(manifest), encoding='utf-8')
+
+        # the report work alone, in an already warm process
+        start = time.perf_counter()
+        for job in manifest:
+            run(brand_csv_filename=job["brand_csv"], product_csv_filename=job["product_csv"],
+                output_filename=(Path(temp_dir) / Path(job["output"])).as_posix())
+        work_seconds = (time.perf_counter() - start) / args.jobs
+
+        startup_seconds = _seconds([sys.executable, '-c', 'pass'])
+        import_seconds = _seconds([sys.executable, '-c', 'import src.main']) - startup_seconds
+
+        per_process_seconds = sum(
+            _seconds([sys.executable, '-m', 'src.main', '--brand-csv', job["brand_csv"],
+                      '--product-csv', job["product_csv"],
+                      '--output', (Path(temp_dir) / Path(job["output"])).as_posix()])
+            for job in manifest) / args.jobs
+
+        batch_seconds = _seconds(
+            [sys.executable, '-m', 'src.main', '--batch', manifest_path.as_posix()]) / args.jobs
+
+    print(f"jobs: {args.jobs}, rows per product file: {args.rows:,}")
+    print(f"interpreter startup:  {startup_seconds * 1000:.1f}ms, "
+          f"import src.main: {import_seconds * 1000:.1f}ms")
+    print(f"report work per job:  {work_seconds * 1000:.1f}ms")
+    print(f"process per job:      {per_process_seconds * 1000:.1f}ms per job, "
+          f"{(per_process_seconds - work_seconds) * 1000:.1f}ms overhead")
+    print(f"batch manifest:       {batch_seconds * 1000:.1f}ms per job, "
+          f"{(batch_seconds - work_seconds) * 1000:.1f}ms overhead")
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,63 @@
+"""
+Benchmark for the cached week date decoding used by the csv parsers.
+
+Run from the repository root:
+    python -m benchmarks.bench_dates --rows 10000000
+"""
+
+import argparse
+import csv
+from datetime import datetime
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks.synthetic import write_sales_csv
+from src.dates import decode_week_date
+
+
+def _uncached(raw_date: str) -> tuple:
+    # the per-row decoding the parsers did before src.dates existed
+    week_commencing_date = datetime.strptime(raw_date, "%d/%m/%Y").date()
+    return week_commencing_date, week_commencing_date.strftime("%d/%m")
+
+
+def _time_decoder(decoder, raw_dates: list) -> float:
+    start = time.perf_counter()
+    for raw_date in raw_dates:
+        decoder(raw_date)
+    return time.perf_counter() - start
+
+
+def main():
+    """
+    Generate a synthetic sales_product csv and time date decoding per row,
+    with and without the cache.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_filename = Path(temp_dir) / Path('sales_product.csv')
+        rows = write_sales_csv(csv_filename.as_posix(), args.rows)
+
+        with open(csv_filename, mode='r', encoding='utf-8') as file:
+            csv_file = csv.reader(file)
+            date_index = next(csv_file).index('week_commencing_date')
+            raw_dates = [line[date_index] for line in csv_file]
+
+    decode_week_date.cache_clear()
+    uncached_seconds = _time_decoder(_uncached, raw_dates)
+    cached_seconds = _time_decoder(decode_week_date, raw_dates)
+
+    print(f"rows: {rows:,} ({decode_week_date.cache_info().currsize} distinct dates)")
+    print(f"strptime + strftime: {uncached_seconds:.2f}s, "
+          f"{uncached_seconds / rows * 1e9:.0f} ns/row")
+    print(f"decode_week_date:    {cached_seconds:.2f}s, "
+          f"{cached_seconds / rows * 1e9:.0f} ns/row")
+    print(f"speedup: {uncached_seconds / cached_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark for streaming unsorted input through the external merge sort.
+
+Run from the repository root:
+    python -m benchmarks.bench_extsort --rows 1000000 --budgets 8 64
+"""
+
+import argparse
+import filecmp
+import multiprocessing
+from pathlib import Path
+import random
+import tempfile
+import time
+
+from benchmarks.run_benchmarks import peak_rss_bytes, wait_for_result
+from benchmarks.synthetic import write_sales_csv
+
+
+def _shuffle_csv(csv_filename: str, seed: int = 0):
+    with open(csv_filename, encoding='utf-8', newline='') as file:
+        header, *lines = file.readlines()
+    random.Random(seed).shuffle(lines)
+    with open(csv_filename, 'w', encoding='utf-8', newline='') as file:
+        file.write(header)
+        file.writelines(lines)
+
+
+def _write_inputs(brand_csv: str, product_csv: str, rows: int):
+    write_sales_csv(brand_csv, rows=rows // 10, kind='brand')
+    write_sales_csv(product_csv, rows=rows)
+    _shuffle_csv(brand_csv)
+    _shuffle_csv(product_csv)
+
+
+def _run(engine: str, brand_csv: str, product_csv: str, output: str, memory_budget, results):
+    """
+    Time one report and put (seconds, peak_rss_bytes) on the results queue.
+    Runs in a spawned child process.
+    """
+    from src import main
+
+    start = time.perf_counter()
+    main.run(engine, brand_csv_filename=brand_csv, product_csv_filename=product_csv,
+             output_filename=output, memory_budget=memory_budget)
+    results.put((time.perf_counter() - start, peak_rss_bytes()))
+
+
+def time_run(engine: str, brand_csv: str, product_csv: str, output: str,
+             memory_budget: int = None) -> tuple:
+    """
+    Run a report in a fresh process, returning (seconds, peak_rss_bytes).
+    """
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(
+        target=_run, args=(engine, brand_csv, product_csv, output, memory_budget, results))
+    process.start()
+    result = wait_for_result(process, results, f"{engine} engine")
+    process.join()
+    return result
+
+
+def main_benchmark():
+    """
+    Time the default engine, which holds every entity in memory, against the
+    external engine at each memory budget on the same shuffled input.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--budgets', type=int, nargs='+', default=[8, 64],
+                        help="memory budgets in megabytes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        brand_csv = (Path(temp_dir) / Path('sales_brand.csv')).as_posix()
+        product_csv = (Path(temp_dir) / Path('sales_product.csv')).as_posix()
+        # shuffled in a child so the parent's peak RSS, which the report
+        # processes start from, stays small
+        process = multiprocessing.get_context('spawn').Process(
+            target=_write_inputs, args=(brand_csv, product_csv, args.rows))
+        process.start()
+        process.join()
+
+        expected = Path(temp_dir) / Path('results_default.json')
+        seconds, peak_rss = time_run('default', brand_csv, product_csv, expected.as_posix())
+        print(f"rows: {args.rows:,} product + {args.rows // 10:,} brand, shuffled")
+        print(f"default:              {seconds:.2f}s, peak RSS {peak_rss / 2**20:.0f} MiB")
+
+        for budget in args.budgets:
+            actual = Path(temp_dir) / Path(f'results_{budget}.json')
+            seconds, peak_rss = time_run('external', brand_csv, product_csv,
+                                         actual.as_posix(), budget * 1024 * 1024)
+            identical = filecmp.cmp(actual, expected, shallow=False)
+            print(f"external {budget:>4} MiB:    {seconds:.2f}s, "
+                  f"peak RSS {peak_rss / 2**20:.0f} MiB (identical: {identical})")
+
+
+if __name__ == "__main__":
+    main_benchmark()
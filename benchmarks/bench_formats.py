@@ -0,0 +1,77 @@
+"""
+Benchmark for the output formats and compression options.
+
+Run from the repository root:
+    python -m benchmarks.bench_formats --rows 2000000
+"""
+
+import argparse
+import json
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks.synthetic import write_sales_csv
+from src import main
+from src.serialize import zstandard
+
+
+def main_benchmark():
+    """
+    Time and size json.dump of the built document against write_json in each
+    format and compression, for the same parsed data.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--gzip-level', type=int, default=6)
+    parser.add_argument('--zstd-level', type=int, default=3)
+    args = parser.parse_args()
+
+    variants = [
+        ("json", "results.json", {}),
+        ("ndjson", "results.ndjson", {"ndjson": True}),
+        (f"json gzip-{args.gzip_level}", "results.json.gz",
+         {"compression": "gzip", "compression_level": args.gzip_level}),
+        (f"ndjson gzip-{args.gzip_level}", "results.ndjson.gz",
+         {"ndjson": True, "compression": "gzip", "compression_level": args.gzip_level}),
+    ]
+    if zstandard is not None:
+        variants.append((f"ndjson zstd-{args.zstd_level}", "results.ndjson.zst",
+                         {"ndjson": True, "compression": "zstd",
+                          "compression_level": args.zstd_level}))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        main.OUTPUT_FOLDER_PATH = Path(temp_dir)
+        brand_csv = (Path(temp_dir) / Path('sales_brand.csv')).as_posix()
+        product_csv = (Path(temp_dir) / Path('sales_product.csv')).as_posix()
+        write_sales_csv(brand_csv, rows=args.rows // 10, kind='brand', missing_current=0.05)
+        write_sales_csv(product_csv, rows=args.rows, missing_current=0.05)
+
+        brand_data = main.parse_sales_brand_csv(brand_csv)
+        product_data = main.parse_sales_product_csv(product_csv)
+
+        # the original path: build every record, then json.dump the document
+        start = time.perf_counter()
+        output = {
+            "PRODUCT": main.section_records(main.PRODUCT, product_data),
+            "BRAND": main.section_records(main.BRAND, brand_data)
+        }
+        json_dump_path = Path(temp_dir) / Path('json_dump.json')
+        with open(json_dump_path, "w", encoding='utf-8') as outfile:
+            json.dump(output, outfile)
+        results = [("json.dump", time.perf_counter() - start, json_dump_path.stat().st_size)]
+
+        for label, filename, options in variants:
+            start = time.perf_counter()
+            main.write_json(brand_data, product_data, filename, **options)
+            results.append((label, time.perf_counter() - start,
+                            (Path(temp_dir) / Path(filename)).stat().st_size))
+
+    if zstandard is None:
+        print("zstandard is not installed; skipping zstd")
+    for label, seconds, size in results:
+        print(f"{label:<18} {seconds:6.2f}s  {size / 1024 / 1024:9.1f} MiB")
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,66 @@
+"""
+Benchmark for running many report jobs concurrently in one process.
+
+Run from the repository root:
+    python -m benchmarks.bench_jobs --jobs 8 --rows 200000 --concurrency 4
+"""
+
+import argparse
+import os
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks.synthetic import write_sales_csv
+from src import main
+from src.jobs import ReportJob, run_jobs
+
+
+def _run_serially(job: ReportJob) -> float:
+    start = time.perf_counter()
+    main.write_json(
+        brand_data=main.parse_sales_brand_csv(job.brand_csv_filename),
+        product_data=main.parse_sales_product_csv(job.product_csv_filename),
+        output_filename=job.output_filename)
+    return time.perf_counter() - start
+
+
+def main_benchmark():
+    """
+    Time the jobs one after another, as separate run() calls would, against
+    run_jobs, and compare with the slowest single job.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--jobs', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        main.OUTPUT_FOLDER_PATH = Path(temp_dir)
+        jobs = []
+
+        for index in range(args.jobs):
+            brand_csv = (Path(temp_dir) / Path(f'sales_brand_{index}.csv')).as_posix()
+            product_csv = (Path(temp_dir) / Path(f'sales_product_{index}.csv')).as_posix()
+            # brand files are a tenth of the size, as in production
+            write_sales_csv(brand_csv, rows=args.rows // 10, kind='brand', seed=index)
+            write_sales_csv(product_csv, rows=args.rows, seed=index)
+            jobs.append(ReportJob(brand_csv, product_csv, f'results_{index}.json'))
+
+        job_seconds = [_run_serially(job) for job in jobs]
+
+        start = time.perf_counter()
+        run_jobs(jobs, concurrency=args.concurrency, workers=args.workers)
+        concurrent_seconds = time.perf_counter() - start
+
+    print(f"jobs: {args.jobs}, rows per product file: {args.rows:,}, "
+          f"concurrency: {args.concurrency}, workers: {args.workers}")
+    print(f"serial total:       {sum(job_seconds):.2f}s")
+    print(f"slowest single job: {max(job_seconds):.2f}s")
+    print(f"run_jobs:           {concurrent_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main_benchmark()
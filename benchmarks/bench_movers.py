@@ -0,0 +1,52 @@
+"""
+Benchmark for top-K movers selection.
+
+Run from the repository root:
+    python -m benchmarks.bench_movers --rows 1000000
+"""
+
+import argparse
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks.synthetic import write_sales_csv
+from src.entities import PRODUCT, aggregate_sales_csv
+from src.main import section_records
+from src.movers import top_movers
+
+
+def main_benchmark():
+    """
+    Time selecting the top risers and fallers with bounded heaps against
+    building every record and sorting them, as the dashboard did.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('-k', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        product_csv = (Path(temp_dir) / Path('sales_product.csv')).as_posix()
+        write_sales_csv(product_csv, rows=args.rows)
+        entities = aggregate_sales_csv(product_csv, PRODUCT)[PRODUCT.section]
+
+    start = time.perf_counter()
+    records = [record for record in section_records(PRODUCT, entities)
+               if record["perc_gross_sales_growth"] is not None]
+    risers = sorted(records, key=lambda record: -record["perc_gross_sales_growth"])[:args.k]
+    fallers = sorted(records, key=lambda record: record["perc_gross_sales_growth"])[:args.k]
+    sort_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    identical = top_movers(PRODUCT, entities, args.k) == risers and \
+        top_movers(PRODUCT, entities, args.k, fallers=True) == fallers
+    heap_seconds = time.perf_counter() - start
+
+    print(f"entity-weeks: {len(records):,}, k: {args.k}")
+    print(f"full records + sort:  {sort_seconds:.2f}s")
+    print(f"top_movers (heaps):   {heap_seconds:.2f}s (identical: {identical})")
+
+
+if __name__ == "__main__":
+    main_benchmark()
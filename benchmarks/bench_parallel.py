@@ -0,0 +1,66 @@
+"""
+Benchmark for how the parallel csv parser scales with worker processes.
+
+Run from the repository root:
+    python -m benchmarks.bench_parallel --rows 2000000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks.synthetic import write_sales_csv
+from src.entities import PRODUCT, aggregate_sales_csv, pack_entities
+from src.parallel import parse_csv_parallel
+
+
+def main_benchmark():
+    """
+    Time the serial parse against the parallel parse with each number of
+    workers, reporting wall time and the speedup over the serial parse.
+    """
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, cores}),
+                        help="worker counts to time (default: 1, 2 and the number of cores)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        product_csv = (Path(temp_dir) / Path('sales_product.csv')).as_posix()
+        rows = write_sales_csv(product_csv, rows=args.rows)
+        print(f"rows: {rows:,}, cores: {cores}, best of {args.repeat}")
+
+        # interleaved, so drift in machine speed affects every variant alike
+        best = {}
+        identical = True
+        for _ in range(args.repeat):
+            for workers in [None, *args.workers]:
+                start = time.perf_counter()
+                if workers is None:
+                    parsed = aggregate_sales_csv(product_csv, PRODUCT)[PRODUCT.section]
+                else:
+                    parsed = parse_csv_parallel(product_csv, PRODUCT, workers=workers)
+                best[workers] = min(best.get(workers, float('inf')),
+                                    time.perf_counter() - start)
+
+                if workers is None:
+                    expected = pack_entities(parsed)
+                else:
+                    identical = identical and pack_entities(parsed) == expected
+                del parsed
+
+    serial = best[None]
+    print(f"serial:            {serial:6.2f}s  {rows / serial:>12,.0f} rows/s")
+    for workers in args.workers:
+        seconds = best[workers]
+        print(f"{workers:>3} worker{'s' if workers > 1 else ' '}:       {seconds:6.2f}s  "
+              f"{rows / seconds:>12,.0f} rows/s  ({serial / seconds:.2f}x)")
+    print(f"identical: {identical}")
+
+
+if __name__ == "__main__":
+    main_benchmark()
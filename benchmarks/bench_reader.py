@@ -0,0 +1,97 @@
+"""
+Benchmark for the typed csv reader against csv.DictReader.
+
+Run from the repository root:
+    python -m benchmarks.bench_reader --rows 2000000
+
+Measured on 1M rows, best of 5, the row loop reaches 2.2x DictReader's rows/s
+with gross sales read by float(), and 1.8x now they are parsed to integer
+pence; a full parse into WeeklyData 2.0x and 1.6x (1.8x and 1.8x on 300k
+rows). The 2x target is unmet: exact pence cost about 0.3us a row more than
+float(), and converting whole blocks column by column, or building a list of
+rows per block, measured slower than the row loop.
+"""
+
+import argparse
+import csv
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks.synthetic import write_sales_csv
+from src.entities import PRODUCT, add_rows, aggregate_sales_csv
+from src.reader import read_sales_csv
+
+
+def dict_reader_rows(csv_filename: str):
+    """
+    The row loop the parsers used: a dict per row, then every field converted.
+    """
+    with open(csv_filename, mode='r', encoding='utf-8') as file:
+        for line in csv.DictReader(file):
+            yield (int(line['barcode_no']), str(line['product_name']), int(line['period_id']),
+                   line['period_name'], line['week_commencing_date'],
+                   float(line['gross_sales']), int(line['units_sold']))
+
+
+def _rows_per_second(rows, seconds: float) -> str:
+    return f"{seconds:6.2f}s  {rows / seconds:>12,.0f} rows/s"
+
+
+def _dict_reader_loop(csv_filename: str):
+    for _ in dict_reader_rows(csv_filename):
+        pass
+
+
+def _typed_reader_loop(csv_filename: str):
+    for _ in read_sales_csv(csv_filename, 'barcode_no', 'product_name'):
+        pass
+
+
+def _dict_reader_parse(csv_filename: str):
+    with open(csv_filename, mode='r', encoding='utf-8') as file:
+        add_rows({}, PRODUCT, csv.DictReader(file))
+
+
+def _typed_reader_parse(csv_filename: str):
+    aggregate_sales_csv(csv_filename, PRODUCT)
+
+
+def main_benchmark():
+    """
+    Time reading typed rows, then full parses into WeeklyData, both ways.
+    Each is the best of --repeat runs, interleaved so that drift in machine
+    speed affects both ways alike.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    loops = (_dict_reader_loop, _typed_reader_loop, _dict_reader_parse, _typed_reader_parse)
+    best = dict.fromkeys(loops, float('inf'))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        product_csv = (Path(temp_dir) / Path('sales_product.csv')).as_posix()
+        rows = write_sales_csv(product_csv, rows=args.rows)
+
+        for _ in range(args.repeat):
+            for loop in loops:
+                start = time.perf_counter()
+                loop(product_csv)
+                best[loop] = min(best[loop], time.perf_counter() - start)
+
+    (dict_reader_seconds, typed_reader_seconds,
+     dict_parse_seconds, typed_parse_seconds) = (best[loop] for loop in loops)
+
+    print(f"rows: {rows:,}, best of {args.repeat}")
+    print(f"DictReader row loop:          {_rows_per_second(rows, dict_reader_seconds)}")
+    print(f"read_sales_csv row loop:      {_rows_per_second(rows, typed_reader_seconds)}"
+          f"  ({dict_reader_seconds / typed_reader_seconds:.1f}x)")
+    print(f"parse via DictReader:         {_rows_per_second(rows, dict_parse_seconds)}")
+    print(f"parse via read_sales_csv:     {_rows_per_second(rows, typed_parse_seconds)}"
+          f"  ({dict_parse_seconds / typed_parse_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main_benchmark()
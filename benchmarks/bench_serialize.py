@@ -0,0 +1,68 @@
+"""
+Benchmark for the json serialisation of growth records.
+
+Run from the repository root:
+    python -m benchmarks.bench_serialize --rows 2000000
+"""
+
+import argparse
+import json
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks.synthetic import write_sales_csv
+from src import main
+from src.serialize import orjson
+
+
+def main_benchmark():
+    """
+    Time a single json.dump of the whole document, as output_json used to
+    write it, against write_json in its default and compact encodings.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        main.OUTPUT_FOLDER_PATH = Path(temp_dir)
+        brand_csv = (Path(temp_dir) / Path('sales_brand.csv')).as_posix()
+        product_csv = (Path(temp_dir) / Path('sales_product.csv')).as_posix()
+        write_sales_csv(brand_csv, rows=args.rows // 10, kind='brand', missing_current=0.05)
+        write_sales_csv(product_csv, rows=args.rows, missing_current=0.05)
+
+        brand_data = main.parse_sales_brand_csv(brand_csv)
+        product_data = main.parse_sales_product_csv(product_csv)
+
+        start = time.perf_counter()
+        output = main.output_json(brand_data, product_data, 'built.json')
+        build_and_write_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(Path(temp_dir) / Path('json_dump.json'), "w", encoding='utf-8') as outfile:
+            json.dump(output, outfile)
+        json_dump_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        records = main.write_json(brand_data, product_data, 'default.json')
+        default_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        main.write_json(brand_data, product_data, 'compact.json', compact=True)
+        compact_seconds = time.perf_counter() - start
+
+        identical = (Path(temp_dir) / Path('json_dump.json')).read_bytes() == \
+            (Path(temp_dir) / Path('default.json')).read_bytes()
+
+    print(f"records: {records:,}")
+    print(f"output_json (build records + write):  {build_and_write_seconds:.2f}s")
+    print(f"json.dump of built document only:     {json_dump_seconds:.2f}s")
+    print(f"write_json:                           {default_seconds:.2f}s "
+          f"(identical to json.dump: {identical})")
+    print(f"write_json compact ({'orjson' if orjson else 'stdlib'}):"
+          f"            {compact_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,104 @@
+"""
+Load test for the HTTP report service.
+
+Run from the repository root:
+    python -m benchmarks.bench_service --rows 200000 --requests 2000 --clients 8
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import random
+import statistics
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+from urllib.request import urlopen
+
+from benchmarks.synthetic import write_sales_csv
+from src.service import LRUCache, ReportData, ReportService, make_server
+
+
+def percentile(latencies: list, fraction: float) -> float:
+    """
+    Returns the nearest-rank percentile of a list of latencies.
+    """
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _timed_get(url: str) -> float:
+    start = time.perf_counter()
+    with urlopen(url) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def run_load(base_url: str, queries: list, requests: int, clients: int, seed: int) -> list:
+    """
+    Issue `requests` GETs drawn at random from `queries` from `clients`
+    concurrent threads. Returns the latency of each request in seconds.
+    """
+    generator = random.Random(seed)
+    urls = [f"{base_url}/report?{generator.choice(queries)}" for _ in range(requests)]
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        return list(executor.map(_timed_get, urls))
+
+
+def main_benchmark():
+    """
+    Serve a synthetic data set and report p50/p99 latency for a cold pass,
+    where every query is computed, and a warm pass served from the cache.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--cache-bytes', type=int, default=64 * 1024 * 1024)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        brand_csv = (Path(temp_dir) / Path('sales_brand.csv')).as_posix()
+        product_csv = (Path(temp_dir) / Path('sales_product.csv')).as_posix()
+        write_sales_csv(brand_csv, rows=args.rows // 10, kind='brand', missing_current=0.05)
+        write_sales_csv(product_csv, rows=args.rows, missing_current=0.05)
+
+        start = time.perf_counter()
+        data = ReportData(brand_csv, product_csv)
+        load_seconds = time.perf_counter() - start
+
+    service = ReportService(data, LRUCache(args.cache_bytes))
+
+    # single-entity queries with and without a date range
+    queries = []
+    for section, index in data.indexes.items():
+        for name in index.names[:200]:
+            queries.append(f"section={section}&name={quote(name)}")
+            queries.append(f"section={section}&name={quote(name)}&start=2022-01-01&end=2022-06-30")
+
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        cold = run_load(base_url, queries, len(queries), args.clients, seed=0)
+        warm = run_load(base_url, queries, args.requests, args.clients, seed=1)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"data load: {load_seconds:.2f}s, distinct queries: {len(queries):,}")
+    for label, latencies in (("cold", cold), ("warm", warm)):
+        print(f"{label}: {len(latencies):,} requests, "
+              f"p50 {percentile(latencies, 0.5) * 1000:.2f}ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.2f}ms, "
+              f"mean {statistics.mean(latencies) * 1000:.2f}ms")
+    print(f"cache: {service.cache.hits:,} hits, {service.cache.misses:,} misses, "
+          f"{service.cache.current_bytes:,} bytes in {len(service.cache):,} entries")
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,63 @@
+"""
+Benchmark for the SQL source against the csv round trip.
+
+Run from the repository root:
+    python -m benchmarks.bench_sql --rows 1000000
+"""
+
+import argparse
+from pathlib import Path
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.synthetic import write_sales_csv
+from src import main, sql
+from src.entities import BRAND, PRODUCT
+from src.sql import FETCH_BATCH_ROWS, ConnectionPool, load_sales_csv_into_sqlite, write_json_from_sql
+
+
+def main_benchmark():
+    """
+    Time parsing the csv files and writing results.json against writing it
+    straight from SQLite tables holding the same rows.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--batch-rows', type=int, default=FETCH_BATCH_ROWS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        main.OUTPUT_FOLDER_PATH = sql.OUTPUT_FOLDER_PATH = Path(temp_dir)
+        brand_csv = (Path(temp_dir) / Path('sales_brand.csv')).as_posix()
+        product_csv = (Path(temp_dir) / Path('sales_product.csv')).as_posix()
+        write_sales_csv(brand_csv, rows=args.rows // 10, kind='brand', missing_current=0.05)
+        write_sales_csv(product_csv, rows=args.rows, missing_current=0.05)
+
+        database = Path(temp_dir) / Path('sales.db')
+        with sqlite3.connect(database) as connection:
+            load_sales_csv_into_sqlite(brand_csv, connection, BRAND, 'sales_brand')
+            load_sales_csv_into_sqlite(product_csv, connection, PRODUCT, 'sales_product')
+        connection.close()
+
+        start = time.perf_counter()
+        main.write_json(main.parse_sales_brand_csv(brand_csv),
+                        main.parse_sales_product_csv(product_csv), 'csv.json')
+        csv_seconds = time.perf_counter() - start
+
+        pool = ConnectionPool.for_sqlite(database)
+        start = time.perf_counter()
+        records = write_json_from_sql(pool, 'sql.json', batch_rows=args.batch_rows)
+        sql_seconds = time.perf_counter() - start
+        pool.close()
+
+        identical = (Path(temp_dir) / Path('csv.json')).read_bytes() == \
+            (Path(temp_dir) / Path('sql.json')).read_bytes()
+
+    print(f"records: {records:,}")
+    print(f"csv parse + write_json:   {csv_seconds:.2f}s")
+    print(f"write_json_from_sql:      {sql_seconds:.2f}s (identical: {identical})")
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,46 @@
+"""
+Benchmark for the time-series growth engine.
+
+Run from the repository root:
+    python -m benchmarks.bench_timeseries --rows 2000000
+"""
+
+import argparse
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks.synthetic import write_sales_csv
+from src.entities import PRODUCT
+from src.timeseries import DEFAULT_MEASURES, growth, load_sales_series
+
+
+def main_benchmark():
+    """
+    Time loading a product file into a SalesSeries and computing each default
+    measure for both growth fields over every entity-week.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        product_csv = (Path(temp_dir) / Path('sales_product.csv')).as_posix()
+        write_sales_csv(product_csv, rows=args.rows)
+
+        start = time.perf_counter()
+        series = load_sales_series(product_csv, PRODUCT)
+        load_seconds = time.perf_counter() - start
+
+    print(f"entity-weeks: {len(series):,}, entities: {len(series.names):,}")
+    print(f"load_sales_series: {load_seconds:.2f}s")
+
+    for measure, (window, lag) in DEFAULT_MEASURES.items():
+        start = time.perf_counter()
+        for field in ('gross_sales', 'units_sold'):
+            growth(series, field, window, lag)
+        print(f"{measure + ':':<17}  {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,101 @@
+"""
+Memory benchmark for the WeeklyData representation.
+
+Run from the repository root:
+    python -m benchmarks.bench_weekly_data_memory --products 5000000
+"""
+
+import argparse
+from datetime import date, timedelta
+import random
+import tracemalloc
+
+from src.classes import WeeklyData
+
+
+class DictWeeklyData:
+    """
+    The original dict-per-period WeeklyData storage, kept for comparison.
+    """
+
+    def __init__(self):
+        self.current: dict = None
+        self.previous: dict = None
+
+    def add_data(self, period_id, period_name, week_commencement_date, gross_sales, units_sold):
+        """
+        Add current or previous data for the week.
+        """
+        period_dict = {
+            'period_id': period_id,
+            'week_commencement_date': week_commencement_date,
+            'gross_sales': gross_sales,
+            'units_sold': units_sold
+        }
+
+        if period_name == 'current':
+            self.current = period_dict
+        else:
+            self.previous = period_dict
+
+
+def bytes_per_entity_week(weekly_data_class, sample: int) -> float:
+    """
+    Measure the bytes allocated per entity-week holding a current and previous
+    period, with date objects shared between rows as the parsers share them.
+    """
+    generator = random.Random(0)
+    current_dates = [date(2022, 7, 4) + timedelta(weeks=week) for week in range(52)]
+    previous_dates = [date(2021, 7, 4) + timedelta(weeks=week) for week in range(52)]
+
+    # the raw strings are generated before measuring, as the csv reader owns them
+    values = [
+        (str(round(generator.uniform(1, 500), 2)), str(generator.randint(1, 400)),
+         str(round(generator.uniform(1, 500), 2)), str(generator.randint(1, 400)))
+        for _ in range(sample)
+    ]
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+
+    weeks = []
+    for index, (current_sales, current_units, previous_sales, previous_units) in \
+            enumerate(values):
+        weekly_data = weekly_data_class()
+        weekly_data.add_data(2, 'current', current_dates[index % 52],
+                             float(current_sales), int(current_units))
+        weekly_data.add_data(1, 'previous', previous_dates[index % 52],
+                             float(previous_sales), int(previous_units))
+        weeks.append(weekly_data)
+
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # discount the list holding the objects
+    return (after - before) / sample - 8
+
+
+def main():
+    """
+    Report bytes per entity-week before and after, projected to a catalogue.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--products', type=int, default=5_000_000)
+    parser.add_argument('--weeks', type=int, default=1,
+                        help="entity-weeks per product in the projection")
+    parser.add_argument('--sample', type=int, default=200_000,
+                        help="entity-weeks actually allocated to measure")
+    args = parser.parse_args()
+
+    entity_weeks = args.products * args.weeks
+
+    for label, weekly_data_class in (("dict periods (before)", DictWeeklyData),
+                                     ("__slots__ (after)", WeeklyData)):
+        per_week = bytes_per_entity_week(weekly_data_class, args.sample)
+        print(f"{label:22} {per_week:7.1f} bytes/entity-week, "
+              f"{per_week * entity_weeks / 1024 ** 3:6.2f} GiB for "
+              f"{args.products:,} products x {args.weeks} week(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Benchmark suite for the report pipeline.
+
+Generates deterministic synthetic sales_brand and sales_product csv files and
+times parse_sales_brand_csv, parse_sales_product_csv, output_json and run()
+separately. Each stage runs in a fresh process so its peak RSS is its own.
+output_json is given both csv files already parsed, as a pickle written by
+another process, so its peak covers the parsed data and the write but not the
+parse.
+Results are saved as JSON for comparison across commits.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks --rows 1000000 --weeks 52
+"""
+
+import argparse
+from datetime import datetime, timezone
+import json
+import multiprocessing
+from pathlib import Path
+import pickle
+import platform
+import queue
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_sales_csv
+
+
+RESULTS_FOLDER_PATH = Path(__file__).parent / Path("results")
+STAGES = ('parse_sales_brand_csv', 'parse_sales_product_csv', 'output_json', 'run')
+RESULT_POLL_SECONDS = 1
+
+
+def peak_rss_bytes() -> int:
+    """
+    Returns the peak resident set size of the current process in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _pickle_parsed(brand_csv: str, product_csv: str, parsed_path: str):
+    """
+    Parse both csv files and pickle them to parsed_path for the output_json stage.
+    Runs in a spawned child process.
+    """
+    from src import main
+
+    parsed = (main.parse_sales_brand_csv(brand_csv), main.parse_sales_product_csv(product_csv))
+    with open(parsed_path, 'wb') as parsed_file:
+        pickle.dump(parsed, parsed_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _run_stage(stage: str, brand_csv: str, product_csv: str, output_dir: str, results):
+    """
+    Time one stage and put (seconds, peak_rss_bytes) on the results queue.
+    Runs in a spawned child process.
+    """
+    # imported in the child so the parent's imports don't count towards its RSS
+    from src import main
+
+    main.OUTPUT_FOLDER_PATH = Path(output_dir)
+
+    if stage == 'parse_sales_brand_csv':
+        start = time.perf_counter()
+        main.parse_sales_brand_csv(brand_csv)
+
+    elif stage == 'parse_sales_product_csv':
+        start = time.perf_counter()
+        main.parse_sales_product_csv(product_csv)
+
+    elif stage == 'output_json':
+        with open(_parsed_path(output_dir), 'rb') as parsed_file:
+            brand_data, product_data = pickle.load(parsed_file)
+        start = time.perf_counter()
+        main.output_json(brand_data=brand_data, product_data=product_data)
+
+    elif stage == 'run':
+        main.DATA_FOLDER_PATH = Path(brand_csv).parent
+        start = time.perf_counter()
+        main.run()
+
+    else:
+        raise ValueError(f"stage not recognised: {stage}")
+
+    results.put((time.perf_counter() - start, peak_rss_bytes()))
+
+
+def wait_for_result(process, results, name: str):
+    """
+    Returns what a child process puts on the results queue. Raises
+    RuntimeError if it exits without doing so, e.g. on an error or when killed
+    for running out of memory, rather than waiting for ever.
+    """
+    while True:
+        try:
+            return results.get(timeout=RESULT_POLL_SECONDS)
+        except queue.Empty:
+            if not process.is_alive():
+                break
+
+    # a result put just before exiting may still be on its way
+    try:
+        return results.get(timeout=RESULT_POLL_SECONDS)
+    except queue.Empty:
+        process.join()
+        raise RuntimeError(f"{name} failed with exit code {process.exitcode}") from None
+
+
+def _parsed_path(output_dir: str) -> str:
+    return (Path(output_dir).parent / Path('parsed.pickle')).as_posix()
+
+
+def time_stage(stage: str, brand_csv: str, product_csv: str, output_dir: str) -> tuple:
+    """
+    Run a stage in a fresh process, returning (seconds, peak_rss_bytes).
+    """
+    context = multiprocessing.get_context('spawn')
+
+    if stage == 'output_json' and not Path(_parsed_path(output_dir)).exists():
+        process = context.Process(
+            target=_pickle_parsed, args=(brand_csv, product_csv, _parsed_path(output_dir)))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"parsing for {stage} failed with exit code {process.exitcode}")
+
+    results = context.Queue()
+    process = context.Process(
+        target=_run_stage, args=(stage, brand_csv, product_csv, output_dir, results))
+    process.start()
+    result = wait_for_result(process, results, f"stage {stage}")
+    process.join()
+
+    if process.exitcode != 0:
+        raise RuntimeError(f"stage {stage} failed with exit code {process.exitcode}")
+
+    return result
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """
+    Generate the synthetic inputs, time every stage and save the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000,
+                        help="maximum rows per file (up to 100M)")
+    parser.add_argument('--entities', type=int, default=None,
+                        help="entities per file, by default as many as --rows allows")
+    parser.add_argument('--weeks', type=int, default=52, help="weeks per period")
+    parser.add_argument('--missing-current', type=float, default=0.05)
+    parser.add_argument('--missing-previous', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--output', type=Path, default=None,
+                        help="results file, by default benchmarks/results/<time>-<commit>.json")
+    args = parser.parse_args()
+
+    params = {
+        'rows': args.rows,
+        'entities': args.entities,
+        'weeks': args.weeks,
+        'missing_current': args.missing_current,
+        'missing_previous': args.missing_previous,
+        'seed': args.seed
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        brand_csv = (Path(temp_dir) / Path('sales_brand.csv')).as_posix()
+        product_csv = (Path(temp_dir) / Path('sales_product.csv')).as_posix()
+        output_dir = (Path(temp_dir) / Path('output')).as_posix()
+        Path(output_dir).mkdir()
+
+        row_counts = {
+            'brand': write_sales_csv(brand_csv, kind='brand', **params),
+            'product': write_sales_csv(product_csv, kind='product', **params)
+        }
+        stage_rows = {
+            'parse_sales_brand_csv': row_counts['brand'],
+            'parse_sales_product_csv': row_counts['product'],
+            'output_json': row_counts['brand'] + row_counts['product'],
+            'run': row_counts['brand'] + row_counts['product']
+        }
+
+        stages = {}
+        for stage in args.stages:
+            seconds, peak_rss = time_stage(stage, brand_csv, product_csv, output_dir)
+            stages[stage] = {
+                'seconds': seconds,
+                'rows': stage_rows[stage],
+                'rows_per_second': stage_rows[stage] / seconds if seconds else None,
+                'peak_rss_bytes': peak_rss
+            }
+            print(f"{stage:24} {seconds:8.2f}s {stages[stage]['rows_per_second']:12,.0f} rows/s "
+                  f"{peak_rss / 1024 ** 2:8.1f} MiB peak RSS")
+
+    commit = _git_commit()
+    timestamp = datetime.now(timezone.utc)
+    results = {
+        'commit': commit,
+        'timestamp': timestamp.isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': params,
+        'row_counts': row_counts,
+        'stages': stages
+    }
+
+    output_path = args.output or RESULTS_FOLDER_PATH / Path(
+        f"{timestamp.strftime('%Y%m%dT%H%M%SZ')}-{commit or 'unknown'}.json")
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(output_path, "w", encoding='utf-8') as outfile:
+        json.dump(results, outfile, indent=2)
+
+    print(f"results saved to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
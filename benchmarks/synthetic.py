@@ -0,0 +1,86 @@
+"""
+Deterministic generator for synthetic sales_brand/sales_product csv files
+in the same schema as the files in data/.
+"""
+
+import csv
+from datetime import date, timedelta
+import random
+
+
+HEADERS = {
+    'product': ['period_id', 'period_name', 'week_commencing_date',
+                'barcode_no', 'product_name', 'gross_sales', 'units_sold'],
+    'brand': ['period_id', 'period_name', 'week_commencing_date',
+              'brand_id', 'brand', 'gross_sales', 'units_sold']
+}
+
+
+def write_sales_csv(
+    csv_filename: str,
+    rows: int = None,
+    kind: str = 'product',
+    weeks: int = 52,
+    seed: int = 0,
+    entities: int = None,
+    missing_current: float = 0.0,
+    missing_previous: float = 0.0
+    ) -> int:
+    """
+    Write synthetic sales data and return the number of rows written.
+
+    Each entity gets `weeks` weeks in both the current and previous period,
+    and each entity-week independently drops its current row with probability
+    `missing_current` and its previous row with probability `missing_previous`.
+    Generation stops after `entities` entities or `rows` rows, whichever comes
+    first; at least one of the two must be given. The same arguments always
+    produce the same file.
+    """
+    if kind not in HEADERS:
+        raise ValueError("kind not recognised. Expected 'brand' or 'product'.")
+    if rows is None and entities is None:
+        raise ValueError("at least one of rows or entities is required.")
+
+    generator = random.Random(seed)
+    previous_start = date(2021, 7, 4)
+    current_start = date(2022, 7, 4)
+
+    # the dates are shared by every entity so format them once
+    week_dates = [
+        ((previous_start + timedelta(weeks=week)).strftime("%d/%m/%Y"),
+         (current_start + timedelta(weeks=week)).strftime("%d/%m/%Y"))
+        for week in range(weeks)
+    ]
+
+    written = 0
+
+    with open(csv_filename, mode='w', encoding='utf-8', newline='') as file:
+        csv_file = csv.writer(file)
+        csv_file.writerow(HEADERS[kind])
+
+        entity = 0
+        while (rows is None or written < rows) and (entities is None or entity < entities):
+            entity_id = 10000000 + entity
+            entity_name = f"{kind.title()} {entity:08d}"
+
+            for previous_date, current_date in week_dates:
+                for period_id, period_name, week_date, missing in (
+                        (1, 'previous', previous_date, missing_previous),
+                        (2, 'current', current_date, missing_current)):
+
+                    gross_sales = round(generator.uniform(1, 500), 2)
+                    units_sold = generator.randint(1, 80)
+                    if missing and generator.random() < missing:
+                        continue
+                    if rows is not None and written >= rows:
+                        break
+
+                    csv_file.writerow([
+                        period_id, period_name, week_date, entity_id, entity_name,
+                        gross_sales, units_sold
+                    ])
+                    written += 1
+
+            entity += 1
+
+    return written
@@ -0,0 +1,166 @@
+"""
+Binary columnar cache of parsed sales csv files.
+The typed columns from src.columnar are saved as .npy files in a directory next
+to the csv, and later runs memory-map them instead of re-parsing the text.
+The cache is keyed by the csv's size, mtime and content hash.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import tempfile
+
+import numpy as np
+
+from src.columnar import SalesColumns, load_sales_csv
+
+
+# 2: gross_sales stored as int64 pence
+CACHE_VERSION = 2
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# SalesColumns attributes saved as one .npy file each
+COLUMN_NAMES = (
+    'ids', 'names', 'name_codes', 'periods', 'week_dates', 'gross_sales', 'units_sold'
+)
+
+
+def cache_dir_for(csv_filename: str) -> Path:
+    """
+    Returns the cache directory used for a csv file, e.g. data/sales_brand.csv.cache
+    """
+    csv_path = Path(csv_filename)
+    return csv_path.with_name(csv_path.name + '.cache')
+
+
+def content_hash(csv_filename: str) -> str:
+    """
+    Returns the blake2b hex digest of a file's contents.
+    """
+    digest = hashlib.blake2b()
+
+    with open(csv_filename, mode='rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def _identity(stat: os.stat_result) -> tuple:
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _read_meta(cache_dir: Path) -> dict:
+    try:
+        with open(cache_dir / Path('meta.json'), mode='r', encoding='utf-8') as meta_file:
+            return json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_valid(meta: dict, csv_filename: str, id_column: str, name_column: str,
+              verify: bool) -> bool:
+    """
+    Check a cache's metadata against the csv file. A size or mtime change is
+    confirmed with the content hash, so touching a file doesn't force a re-parse.
+    """
+    if meta is None or meta.get('version') != CACHE_VERSION:
+        return False
+    if meta['id_column'] != id_column or meta['name_column'] != name_column:
+        return False
+
+    stat = os.stat(csv_filename)
+    if not verify and meta['size'] == stat.st_size and meta['mtime_ns'] == stat.st_mtime_ns:
+        return True
+    if meta['size'] != stat.st_size:
+        return False
+
+    return meta['hash'] == content_hash(csv_filename)
+
+
+def write_cache(csv_filename: str, columns: SalesColumns, id_column: str,
+                name_column: str, stat: os.stat_result = None, digest: str = None) -> Path:
+    """
+    Save the typed columns for a csv file into its cache directory.
+    `stat` and `digest` key the cache and should be taken before the csv was
+    parsed, so a file replaced during the parse never validates the columns
+    read from it; by default they are taken now.
+    The directory is built alongside and swapped in, so readers never see
+    a partially written cache.
+    """
+    cache_dir = cache_dir_for(csv_filename)
+    if stat is None:
+        stat = os.stat(csv_filename)
+    if digest is None:
+        digest = content_hash(csv_filename)
+
+    temp_dir = Path(tempfile.mkdtemp(prefix=cache_dir.name + '.', dir=cache_dir.parent))
+
+    for column_name in COLUMN_NAMES:
+        np.save(temp_dir / Path(column_name + '.npy'), getattr(columns, column_name))
+
+    with open(temp_dir / Path('meta.json'), mode='w', encoding='utf-8') as meta_file:
+        json.dump({
+            'version': CACHE_VERSION,
+            'id_column': id_column,
+            'name_column': name_column,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': digest,
+            'rows': len(columns)
+        }, meta_file)
+
+    if cache_dir.exists():
+        shutil.rmtree(cache_dir)
+    os.replace(temp_dir, cache_dir)
+
+    return cache_dir
+
+
+def read_cache(cache_dir: Path) -> SalesColumns:
+    """
+    Memory-map the typed columns saved in a cache directory.
+    """
+    return SalesColumns(**{
+        column_name: np.load(cache_dir / Path(column_name + '.npy'), mmap_mode='r')
+        for column_name in COLUMN_NAMES
+    })
+
+
+def load_sales_csv_cached(
+    csv_filename: str,
+    id_column: str,
+    name_column: str,
+    verify: bool = False
+    ) -> SalesColumns:
+    """
+    Cached equivalent of src.columnar.load_sales_csv. Parses the csv and writes
+    the cache when it is missing or stale, otherwise memory-maps the cache.
+    verify=True checks the content hash even when size and mtime match.
+    """
+    cache_dir = cache_dir_for(csv_filename)
+    meta = _read_meta(cache_dir)
+
+    if _is_valid(meta, csv_filename, id_column, name_column, verify):
+        stat = os.stat(csv_filename)
+
+        # the content matched after a touch, so record the new mtime
+        if meta['mtime_ns'] != stat.st_mtime_ns:
+            meta['mtime_ns'] = stat.st_mtime_ns
+            with open(cache_dir / Path('meta.json'), mode='w', encoding='utf-8') as meta_file:
+                json.dump(meta, meta_file)
+
+        return read_cache(cache_dir)
+
+    # the cache key is taken before parsing, and the cache only written if the
+    # file is unchanged afterwards, so it never pairs columns with another file's key
+    stat = os.stat(csv_filename)
+    digest = content_hash(csv_filename)
+    columns = load_sales_csv(csv_filename, id_column, name_column)
+
+    if _identity(os.stat(csv_filename)) == _identity(stat):
+        write_cache(csv_filename, columns, id_column, name_column, stat, digest)
+
+    return columns
@@ -0,0 +1,515 @@
+"""
+Checkpointed, resumable report runs for the default engine.
+While the csv files are parsed, the byte offset reached and the entities
+accumulated so far are saved to a checkpoint directory; while results.json is
+written, the number of entities and bytes written are. A run that fails or is
+killed part-way resumes from its last checkpoint and writes the same
+results.json as an uninterrupted run.
+
+The output is written to a partial file in the checkpoint directory and moved
+into place when complete, so a finished results.json is never half written.
+Checkpoints are only taken at block or entity boundaries, and are spaced so
+that saving them costs at most MAX_OVERHEAD of the run time. Saving the
+parse state costs a good fraction of the time taken to parse it, so on a
+machine with a core to spare it is saved by a forked child process instead,
+from a copy-on-write snapshot of the parent's memory.
+
+A checkpoint records a hash of every input byte it has read, so it is only
+resumed from if those bytes are unchanged, e.g. after fixing a malformed row
+past that point. Otherwise the run starts again from the beginning.
+"""
+
+import csv
+import gc
+import hashlib
+import json
+import os
+from pathlib import Path
+import pickle
+import shutil
+import signal
+import time
+from typing import Iterator
+
+from src.entities import (
+    BRAND, OUTPUT_SECTIONS, PRODUCT, EntityDescriptor, add_sales_rows, pack_entities,
+    unpack_entities)
+from src.index import SalesIndex
+from src.main import OUTPUT_FOLDER_PATH
+from src.reader import READ_BUFFER_SIZE, iter_sales_rows, split_lines
+from src.serialize import WRITE_BUFFER_SIZE, RecordEncoder
+
+
+CHECKPOINT_VERSION = 1
+
+# seconds between checkpoints, at the least
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+
+# most of the run time spent saving checkpoints
+MAX_OVERHEAD = 0.03
+
+# background snapshots give way to the report on a busy machine
+CHECKPOINT_NICENESS = 10
+
+STATE_FILENAME = 'state.pickle'
+PROGRESS_FILENAME = 'progress.json'
+PARTIAL_FILENAME = 'output.partial'
+
+
+def checkpoint_dir_for(output_path: Path) -> Path:
+    """
+    Returns the checkpoint directory used for an output file, e.g. output/results.json.checkpoint
+    """
+    return output_path.with_name(output_path.name + '.checkpoint')
+
+
+def prefix_hash(csv_filename: str, size: int):
+    """
+    Returns a sha1 hash object over the first `size` bytes of a file.
+    sha1 rather than the cache's blake2b, as every byte a run reads goes
+    through it and it is the cheaper of the two.
+    """
+    digest = hashlib.sha1(usedforsecurity=False)
+
+    with open(csv_filename, mode='rb') as file:
+        while size > 0:
+            block = file.read(min(READ_BUFFER_SIZE, size))
+            if not block:
+                break
+            digest.update(block)
+            size -= len(block)
+
+    return digest
+
+
+def _write_atomic(path: Path, write):
+    """
+    Write a file through `write(file)` and swap it in, so a crash leaves
+    either the old file or the new one.
+    """
+    # named for the process, as an earlier run's snapshot may still be writing
+    temp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(temp_path, mode='wb') as file:
+        write(file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def _spare_core() -> bool:
+    """
+    Returns whether this process can run on more than one core, so a
+    background snapshot needn't take CPU time from the report.
+    """
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    return cores > 1
+
+
+class Checkpointer:
+    """
+    Saves and loads the checkpoints of one run, and decides when the next
+    one is due: no sooner than `interval` seconds after the last, and late
+    enough that the time the run spends saving stays under MAX_OVERHEAD.
+    Each checkpoint is paid for by the run time after it, so a run that ends
+    soon after one can go over by up to that checkpoint's cost.
+
+    With background=True the parse state is saved by a forked child process,
+    which gets a copy-on-write snapshot of it for free, so the run only
+    waits for the fork, at the cost of up to twice the memory while the
+    child runs. One snapshot is in flight at a time, and the time until it
+    is collected counts against MAX_OVERHEAD, as the child's CPU time and
+    page copies still slow the run. background defaults to whether the
+    platform can fork and there is a core to spare.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+        background: bool = None
+        ):
+        self.directory = directory
+        self.interval = interval
+        self.background = hasattr(os, 'fork') and _spare_core() if background is None \
+            else background
+        self.saves = 0
+        self._child = None
+        self._child_started = None
+        self._next_due = time.perf_counter() + interval
+
+    def due(self) -> bool:
+        """
+        Returns whether a checkpoint should be taken now.
+        """
+        if self._child is not None and not self._reap(block=False):
+            return False
+        return time.perf_counter() >= self._next_due
+
+    def _saved(self, started: float):
+        finished = time.perf_counter()
+        self.saves += 1
+        self._next_due = finished + max(self.interval, (finished - started) / MAX_OVERHEAD)
+
+    def _reap(self, block: bool) -> bool:
+        """
+        Collect the background snapshot if it has finished. Returns whether it has.
+        """
+        pid, _ = os.waitpid(self._child, 0 if block else os.WNOHANG)
+        if not pid:
+            return False
+
+        self._child = None
+        gc.unfreeze()
+        self._saved(self._child_started)
+        return True
+
+    def load_state(self) -> dict:
+        """
+        Returns the saved parse state, or None if there isn't a usable one.
+        """
+        try:
+            with open(self.directory / Path(STATE_FILENAME), mode='rb') as file:
+                state = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+        if state.get('version') != CHECKPOINT_VERSION:
+            return None
+
+        descriptors = {descriptor.section: descriptor for descriptor in OUTPUT_SECTIONS}
+        state['sections'] = {section: unpack_entities(packed, descriptors[section])
+                             for section, packed in state['sections'].items()}
+        if state.get('entities') is not None:
+            state['entities'] = unpack_entities(state['entities'], descriptors[state['section']])
+
+        return state
+
+    def _write_state(self, state: dict):
+        packed = dict(
+            state, version=CHECKPOINT_VERSION,
+            sections={section: pack_entities(entities)
+                      for section, entities in state['sections'].items()},
+            entities=pack_entities(state['entities']) if state.get('entities') is not None
+            else None)
+        _write_atomic(self.directory / Path(STATE_FILENAME), lambda file: pickle.dump(
+            packed, file, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def save_state(self, state: dict):
+        """
+        Save the parse state, in a background process if enabled.
+        """
+        started = time.perf_counter()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        if not self.background:
+            self._write_state(state)
+            self._saved(started)
+            return
+
+        # the parent's garbage collector would otherwise touch, and so copy,
+        # every page the child shares with it
+        gc.freeze()
+        try:
+            pid = os.fork()
+        except OSError:
+            gc.unfreeze()
+            raise
+        if pid == 0:
+            exit_code = 1
+            try:
+                signal.signal(signal.SIGINT, signal.SIG_IGN)
+                os.nice(CHECKPOINT_NICENESS)
+                self._write_state(state)
+                exit_code = 0
+            finally:
+                # skip the parent's exit handlers and buffered output
+                os._exit(exit_code)  # pylint: disable=protected-access
+
+        self._child = pid
+        self._child_started = started
+
+    def load_progress(self) -> dict:
+        """
+        Returns the saved output progress, or None if output hasn't started.
+        """
+        try:
+            with open(self.directory / Path(PROGRESS_FILENAME), mode='r',
+                      encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def save_progress(self, outfile, progress: dict):
+        """
+        Make the output written so far durable, then save how far it got.
+        """
+        started = time.perf_counter()
+        outfile.flush()
+        os.fsync(outfile.fileno())
+        progress = dict(progress, offset=os.fstat(outfile.fileno()).st_size)
+        _write_atomic(self.directory / Path(PROGRESS_FILENAME),
+                      lambda file: file.write(json.dumps(progress).encode('utf-8')))
+        self._saved(started)
+
+    def close(self, wait: bool = True):
+        """
+        Wait for any snapshot in flight to be saved, or stop it if wait=False.
+        """
+        if self._child is None:
+            return
+
+        if wait:
+            self._reap(block=True)
+        else:
+            os.kill(self._child, signal.SIGKILL)
+            os.waitpid(self._child, 0)
+            self._child = None
+            gc.unfreeze()
+
+    def remove(self):
+        """
+        Stop any snapshot in flight and delete the checkpoint directory once
+        the run is complete.
+        """
+        self.close(wait=False)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _byte_blocks(file, offset: int) -> Iterator[bytes]:
+    """
+    Read a binary file from `offset` in large blocks of complete lines.
+    """
+    file.seek(offset)
+    rest = b''
+
+    while True:
+        block = file.read(READ_BUFFER_SIZE)
+        if not block:
+            if rest:
+                yield rest
+            return
+
+        block = rest + block
+        end = block.rfind(b'\n') + 1
+        if not end:
+            rest = block
+            continue
+
+        rest = block[end:]
+        yield block[:end]
+
+
+def _parse(
+    csv_filename: str,
+    descriptor: EntityDescriptor,
+    state: dict,
+    checkpointer: Checkpointer
+    ) -> dict:
+    """
+    Parse a sales csv file into a parsed csv dict, carrying on from the
+    offset in `state` if it has one, and checkpointing between blocks.
+    Leaves the hash of the bytes read in state['digest'].
+    """
+    with open(csv_filename, mode='rb') as file:
+        if state['offset'] is None:
+            header_line = file.readline()
+            digest = hashlib.sha1(header_line, usedforsecurity=False)
+            state.update(
+                header=next(csv.reader([header_line.decode('utf-8')]), []),
+                entities={}, offset=len(header_line), line=2)
+        else:
+            digest = prefix_hash(csv_filename, state['offset'])
+
+        entities = state['entities']
+
+        for block in _byte_blocks(file, state['offset']):
+            text = block.decode('utf-8')
+            lines = split_lines(text if text.endswith('\n') else text + '\n')
+            add_sales_rows(entities, descriptor, iter_sales_rows(
+                [lines], state['header'], descriptor.id_column, descriptor.name_column,
+                csv_filename, first_line=state['line']))
+
+            digest.update(block)
+            state['offset'] += len(block)
+            state['line'] += len(lines)
+
+            if checkpointer.due():
+                state['digest'] = digest.hexdigest()
+                checkpointer.save_state(state)
+
+    state['digest'] = digest.hexdigest()
+
+    return entities
+
+
+def _unchanged(csv_filename: str, size: int, digest: str, whole: bool) -> bool:
+    """
+    Check the first `size` bytes of a file still have the given hash, and
+    with whole=True that the file has no more bytes than that.
+    """
+    try:
+        file_size = os.path.getsize(csv_filename)
+    except OSError:
+        return False
+
+    if file_size < size or (whole and file_size != size):
+        return False
+
+    return prefix_hash(csv_filename, size).hexdigest() == digest
+
+
+def _resumable(state: dict, inputs: dict) -> bool:
+    """
+    Check a saved state was made from the same input files, as far as it read them.
+    """
+    if state is None or state['inputs'] != inputs:
+        return False
+
+    for section, (size, digest) in state['parsed'].items():
+        if not _unchanged(inputs[section], size, digest, whole=True):
+            return False
+
+    if state['offset'] is not None:
+        return _unchanged(inputs[state['section']], state['offset'], state['digest'], whole=False)
+
+    return True
+
+
+def _write_output(output_path: Path, state: dict, checkpointer: Checkpointer) -> int:
+    """
+    Write results.json from the parsed csv dicts in a complete state, carrying
+    on from the saved output progress if there is any. The file is identical
+    to write_json's. Returns the number of records.
+
+    The complete state is never saved, as it would cost far more than the
+    output progress: a run resumed while writing parses again from its last
+    parse checkpoint, and only carries on writing if it parsed the same bytes.
+    """
+    partial_path = checkpointer.directory / Path(PARTIAL_FILENAME)
+    parsed = {section: list(parsed) for section, parsed in state['parsed'].items()}
+    progress = checkpointer.load_progress()
+
+    if progress is not None and (
+            progress.get('parsed') != parsed or not partial_path.exists() or
+            partial_path.stat().st_size < progress['offset']):
+        progress = None
+
+    sections = [(descriptor, state['sections'][descriptor.section])
+                for descriptor in OUTPUT_SECTIONS]
+
+    if progress is None:
+        progress = {'parsed': parsed, 'section': 0, 'entity': 0, 'section_records': 0,
+                    'records': 0}
+        mode = "w"
+        checkpointer.directory.mkdir(parents=True, exist_ok=True)
+    else:
+        # drop anything written after the last checkpoint
+        os.truncate(partial_path, progress['offset'])
+        mode = "a"
+
+    with open(partial_path.as_posix(), mode, encoding='utf-8',
+              buffering=WRITE_BUFFER_SIZE) as outfile:
+        if mode == "w":
+            outfile.write('{')
+
+        for position, (descriptor, entities) in enumerate(sections):
+            if position < progress['section']:
+                continue
+
+            if position > progress['section'] or progress['entity'] == 0:
+                if position:
+                    outfile.write(', ')
+                outfile.write(f'{json.dumps(descriptor.section)}: [')
+                progress.update(section=position, entity=0, section_records=0)
+
+            index = SalesIndex(descriptor, entities)
+            names = index.names
+
+            for entity_position in range(progress['entity'], len(names)):
+                entity = entities[names[entity_position]]
+                weekly_data = entity["weekly_data"]
+                encoder = RecordEncoder(
+                    descriptor.id_key, entity[descriptor.id_key],
+                    descriptor.name_key, entity[descriptor.name_key])
+
+                for week_key in index.week_keys(names[entity_position]):
+                    if progress['section_records']:
+                        outfile.write(', ')
+                    outfile.write(encoder.encode(weekly_data[week_key]))
+                    progress['section_records'] += 1
+                    progress['records'] += 1
+
+                if checkpointer.due():
+                    progress['entity'] = entity_position + 1
+                    checkpointer.save_progress(outfile, progress)
+
+            outfile.write(']')
+            progress['entity'] = len(names)
+
+        outfile.write('}')
+
+    os.replace(partial_path, output_path)
+
+    return progress['records']
+
+
+def run_checkpointed(
+    brand_csv_filename: str,
+    product_csv_filename: str,
+    output_filename: str = 'results.json',
+    interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+    checkpoint_dir: str = None,
+    background: bool = None
+    ) -> int:
+    """
+    Parse sales_brand and sales_product csv files and write results.json as
+    write_json does, checkpointing every `interval` seconds or more and
+    resuming from the last checkpoint if an earlier run didn't finish.
+    The checkpoint directory defaults to the output path plus '.checkpoint'
+    and is removed when the run completes. The parse state is saved in a
+    background process if background=True, which is the default when the
+    platform can fork and there is a core to spare. Returns the number of
+    records.
+    """
+    output_path = OUTPUT_FOLDER_PATH / Path(output_filename)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    checkpointer = Checkpointer(
+        Path(checkpoint_dir) if checkpoint_dir else checkpoint_dir_for(output_path),
+        interval, background)
+
+    # parsed in the same order as run()
+    descriptors = (BRAND, PRODUCT)
+    inputs = {BRAND.section: str(brand_csv_filename),
+              PRODUCT.section: str(product_csv_filename)}
+
+    state = checkpointer.load_state()
+    if not _resumable(state, inputs):
+        checkpointer.remove()
+        state = {'inputs': inputs, 'parsed': {}, 'sections': {}, 'section': None, 'offset': None}
+
+    try:
+        for descriptor in descriptors:
+            if descriptor.section in state['sections']:
+                continue
+
+            if state['section'] != descriptor.section:
+                state.update(section=descriptor.section, offset=None)
+
+            entities = _parse(inputs[descriptor.section], descriptor, state, checkpointer)
+
+            state['sections'][descriptor.section] = entities
+            state['parsed'][descriptor.section] = (state['offset'], state['digest'])
+            state.update(section=None, offset=None, entities=None)
+
+        count = _write_output(output_path, state, checkpointer)
+    except BaseException:
+        # let the last snapshot finish, so the next run resumes from it
+        checkpointer.close()
+        raise
+
+    checkpointer.remove()
+
+    return count
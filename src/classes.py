@@ -4,17 +4,44 @@ Contains the classes/data-structures used to ingest csv data.
 
 
 from datetime import date
+from operator import attrgetter
+
+from src.money import pence_to_pounds, percentage_growth, pounds_to_pence
 
 
 class WeeklyData:
     """
     Contains weekly sales information stored by period
     and methods to produce percentage changes across periods.
+
+    Each period is held in fixed slots rather than a dict to keep the
+    per entity-week footprint small. A period is present when its
+    week_commencement_date is set. Gross sales are stored as integer pence;
+    the current/previous dict views give them in pounds. A pence value is a
+    boxed int, 28 bytes against a float's 24; the int64 columns of the
+    columnar and time-series engines hold it in 8.
     """
 
+    __slots__ = (
+        '_current_period_id',
+        '_current_week_commencement_date',
+        '_current_gross_sales_pence',
+        '_current_units_sold',
+        '_previous_period_id',
+        '_previous_week_commencement_date',
+        '_previous_gross_sales_pence',
+        '_previous_units_sold'
+    )
+
     def __init__(self):
-        self.current: dict = None
-        self.previous: dict = None
+        self._current_period_id = None
+        self._current_week_commencement_date = None
+        self._current_gross_sales_pence = None
+        self._current_units_sold = None
+        self._previous_period_id = None
+        self._previous_week_commencement_date = None
+        self._previous_gross_sales_pence = None
+        self._previous_units_sold = None
 
     def add_data(
         self,
@@ -25,74 +52,180 @@ class WeeklyData:
         units_sold: int
     ):
         """
-        Add current or previous data for the week.
+        Add current or previous data for the week, with gross sales in pounds.
         """
-        period_dict = {
-            'period_id': period_id,
-            'week_commencement_date': week_commencement_date,
-            'gross_sales': gross_sales,
-            'units_sold': units_sold
-        }
+        self.add_period(period_id, period_name, week_commencement_date,
+                        pounds_to_pence(gross_sales), units_sold)
 
+    def add_period(
+        self,
+        period_id: int,
+        period_name: str,
+        week_commencement_date: date,
+        gross_sales_pence: int,
+        units_sold: int
+    ):
+        """
+        Add current or previous data for the week, with gross sales in pence.
+        """
         if period_name == 'current':
-            self.current = period_dict
+            self._current_period_id = period_id
+            self._current_week_commencement_date = week_commencement_date
+            self._current_gross_sales_pence = gross_sales_pence
+            self._current_units_sold = units_sold
 
         elif period_name == 'previous':
-            self.previous = period_dict
+            self._previous_period_id = period_id
+            self._previous_week_commencement_date = week_commencement_date
+            self._previous_gross_sales_pence = gross_sales_pence
+            self._previous_units_sold = units_sold
 
         else:
             raise ValueError(
                 "period_name not recognised. Expected 'current' or 'previous'.")
 
-    def __percentage_change(self, target: str):
+    def add_totals(self, other: 'WeeklyData'):
+        """
+        Add another week's gross sales and units sold into this one, period by
+        period. A period this week doesn't have is copied from the other.
+        """
+        # pylint: disable=protected-access
+        if other._current_week_commencement_date is not None:
+            if self._current_week_commencement_date is None:
+                self.add_period(other._current_period_id, 'current',
+                                other._current_week_commencement_date,
+                                other._current_gross_sales_pence, other._current_units_sold)
+            else:
+                self._current_gross_sales_pence += other._current_gross_sales_pence
+                self._current_units_sold += other._current_units_sold
+
+        if other._previous_week_commencement_date is not None:
+            if self._previous_week_commencement_date is None:
+                self.add_period(other._previous_period_id, 'previous',
+                                other._previous_week_commencement_date,
+                                other._previous_gross_sales_pence, other._previous_units_sold)
+            else:
+                self._previous_gross_sales_pence += other._previous_gross_sales_pence
+                self._previous_units_sold += other._previous_units_sold
+
+    def to_tuple(self) -> tuple:
+        """
+        Returns the week's slot values as a flat tuple, in __slots__ order, a
+        compact form for saving many weeks at once. from_tuple reverses it.
+        """
+        return _slot_values(self)
+
+    @classmethod
+    def from_tuple(cls, values: tuple) -> 'WeeklyData':
+        """
+        Returns a WeeklyData with the slot values given by to_tuple.
+        """
+        week = cls.__new__(cls)
+        (week._current_period_id, week._current_week_commencement_date,
+         week._current_gross_sales_pence, week._current_units_sold,
+         week._previous_period_id, week._previous_week_commencement_date,
+         week._previous_gross_sales_pence, week._previous_units_sold) = values
+        return week
+
+    @property
+    def current(self) -> dict:
+        """
+        Returns a copy of the current period's data as a dict, or None.
+        """
+        if self._current_week_commencement_date is None:
+            return None
+
+        return {
+            'period_id': self._current_period_id,
+            'week_commencement_date': self._current_week_commencement_date,
+            'gross_sales': pence_to_pounds(self._current_gross_sales_pence),
+            'units_sold': self._current_units_sold
+        }
+
+    @current.setter
+    def current(self, period_dict: dict):
+        if period_dict is None:
+            self._current_week_commencement_date = None
+            return
+
+        self.add_data(period_dict['period_id'], 'current', period_dict['week_commencement_date'],
+                      period_dict['gross_sales'], period_dict['units_sold'])
+
+    @property
+    def previous(self) -> dict:
+        """
+        Returns a copy of the previous period's data as a dict, or None.
+        """
+        if self._previous_week_commencement_date is None:
+            return None
+
+        return {
+            'period_id': self._previous_period_id,
+            'week_commencement_date': self._previous_week_commencement_date,
+            'gross_sales': pence_to_pounds(self._previous_gross_sales_pence),
+            'units_sold': self._previous_units_sold
+        }
+
+    @previous.setter
+    def previous(self, period_dict: dict):
+        if period_dict is None:
+            self._previous_week_commencement_date = None
+            return
+
+        self.add_data(period_dict['period_id'], 'previous', period_dict['week_commencement_date'],
+                      period_dict['gross_sales'], period_dict['units_sold'])
+
+    def __percentage_change(self, curr, prev):
         # functionally an if-elif-else stack but no need for elifs because it returns
-        if self.current is None and self.previous is not None:
+        if self._current_week_commencement_date is None and \
+                self._previous_week_commencement_date is not None:
             return -100.0
-        if self.current is not None and self.previous is None:
+        if self._current_week_commencement_date is not None and \
+                self._previous_week_commencement_date is None:
             return None
 
-        curr = self.current[target]
-        prev = self.previous[target]
-        perc = (curr - prev) / prev * 100
-
-        return round(perc, 2)
+        return percentage_growth(curr, prev)
 
     @property
     def gross_sales_percentage_growth(self) -> float:
         """
-        Returns the percentage growth for gross_sales to 2 d.p.
+        Returns the percentage growth for gross_sales, rounded half up to 2 d.p.
         """
-        return self.__percentage_change('gross_sales')
+        return self.__percentage_change(
+            self._current_gross_sales_pence, self._previous_gross_sales_pence)
 
     @property
     def units_sold_percentage_growth(self) -> float:
         """
-        Returns the percentage growth for units_sold to 2 d.p.
+        Returns the percentage growth for units_sold, rounded half up to 2 d.p.
         """
-        return self.__percentage_change('units_sold')
+        return self.__percentage_change(self._current_units_sold, self._previous_units_sold)
 
     def current_week_commencement_date(self, iso=False):
         """
         Returns the week_commencement_date for the current period.
         Can be a date object or iso format (str).
         """
-        if self.current is None:
+        if self._current_week_commencement_date is None:
             return None
 
         if iso:
-            return self.current["week_commencement_date"].isoformat()
+            return self._current_week_commencement_date.isoformat()
 
-        return self.current["week_commencement_date"]
+        return self._current_week_commencement_date
 
     def previous_week_commencement_date(self, iso=False):
         """
         Returns the week_commencement_date for the previous period.
         Can be a date object or iso format (str).
         """
-        if self.previous is None:
+        if self._previous_week_commencement_date is None:
             return None
 
         if iso:
-            return self.previous["week_commencement_date"].isoformat()
+            return self._previous_week_commencement_date.isoformat()
+
+        return self._previous_week_commencement_date
+
 
-        return self.previous["week_commencement_date"]
+_slot_values = attrgetter(*WeeklyData.__slots__)
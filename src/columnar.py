@@ -0,0 +1,294 @@
+"""
+A columnar, NumPy-backed alternative to the dict-of-WeeklyData ingest path.
+Each csv file is loaded into typed column arrays and the percentage growth
+for every entity-week is computed in one vectorised pass.
+"""
+
+import csv
+from datetime import datetime
+import json
+from pathlib import Path
+from typing import OrderedDict
+
+import numpy as np
+
+from src.main import OUTPUT_FOLDER_PATH
+from src.money import GROWTH_SCALE, PENCE_PER_POUND, parse_pence
+
+
+PERIOD_PREVIOUS = 0
+PERIOD_CURRENT = 1
+
+
+class SalesColumns:
+    """
+    Typed column arrays for a single sales csv file.
+    Entity names are stored categorically: `names` holds the sorted unique
+    names and `name_codes` indexes into it for every row. Gross sales are
+    int64 pence.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        names: np.ndarray,
+        name_codes: np.ndarray,
+        periods: np.ndarray,
+        week_dates: np.ndarray,
+        gross_sales: np.ndarray,
+        units_sold: np.ndarray
+    ):
+        self.ids = ids
+        self.names = names
+        self.name_codes = name_codes
+        self.periods = periods
+        self.week_dates = week_dates
+        self.gross_sales = gross_sales
+        self.units_sold = units_sold
+
+    def __len__(self):
+        return len(self.name_codes)
+
+
+def load_sales_csv(
+    csv_filename: str,
+    id_column: str,
+    name_column: str,
+    check_periods: bool = True
+    ) -> SalesColumns:
+    """
+    Load a sales_brand or sales_product csv file into typed column arrays.
+    With check_periods=False, period names other than 'current' and
+    'previous' are allowed and coded as -1, for callers that order rows by
+    date rather than by period.
+    """
+
+    ids = []
+    names = []
+    period_names = []
+    raw_dates = []
+    gross_sales = []
+    units_sold = []
+
+    with open(csv_filename, mode='r', encoding='utf-8') as file:
+
+        csv_file = csv.reader(file)
+        header = next(csv_file)
+
+        # resolve the column positions once rather than per row
+        id_index = header.index(id_column)
+        name_index = header.index(name_column)
+        period_name_index = header.index('period_name')
+        date_index = header.index('week_commencing_date')
+        gross_sales_index = header.index('gross_sales')
+        units_sold_index = header.index('units_sold')
+
+        for line in csv_file:
+            ids.append(line[id_index])
+            names.append(line[name_index])
+            period_names.append(line[period_name_index])
+            raw_dates.append(line[date_index])
+            gross_sales.append(line[gross_sales_index])
+            units_sold.append(line[units_sold_index])
+
+    # categorical names: np.unique sorts, matching sorted() on str keys
+    unique_names, name_codes = np.unique(
+        np.array(names, dtype=str), return_inverse=True)
+
+    # only the distinct date strings need to go through strptime
+    unique_raw_dates, date_codes = np.unique(
+        np.array(raw_dates, dtype=str), return_inverse=True)
+    unique_dates = np.array(
+        [datetime.strptime(raw_date, "%d/%m/%Y").date() for raw_date in unique_raw_dates],
+        dtype='datetime64[D]')
+
+    unique_period_names, period_codes = np.unique(
+        np.array(period_names, dtype=str), return_inverse=True)
+    period_lookup = []
+    for period_name in unique_period_names:
+        if period_name == 'current':
+            period_lookup.append(PERIOD_CURRENT)
+        elif period_name == 'previous':
+            period_lookup.append(PERIOD_PREVIOUS)
+        elif not check_periods:
+            period_lookup.append(-1)
+        else:
+            raise ValueError(
+                "period_name not recognised. Expected 'current' or 'previous'.")
+
+    return SalesColumns(
+        ids=np.array(ids, dtype=np.int64),
+        names=unique_names,
+        name_codes=name_codes.astype(np.int64),
+        periods=np.array(period_lookup, dtype=np.int8)[period_codes],
+        week_dates=unique_dates[date_codes],
+        gross_sales=_parse_pence_column(gross_sales),
+        units_sold=np.array(units_sold, dtype=np.int64)
+    )
+
+
+def _parse_pence_column(amounts: list) -> np.ndarray:
+    """
+    Vectorised money.parse_pence. Amounts are parsed as floats, which is exact
+    to the penny for whole pence; the rare rows that are not within a hair of
+    a whole penny (sub-penny amounts, nan) go through parse_pence instead.
+    """
+    pounds = np.array(amounts, dtype=np.float64)
+    pence = np.rint(pounds * PENCE_PER_POUND)
+    inexact = np.flatnonzero(~(np.abs(pounds * PENCE_PER_POUND - pence) <= 1e-6))
+
+    pence = np.nan_to_num(pence).astype(np.int64)
+    for row in inexact.tolist():
+        pence[row] = parse_pence(amounts[row])
+
+    return pence
+
+
+def _week_day_month(week_dates: np.ndarray) -> np.ndarray:
+    """
+    Vectorised equivalent of strftime("%d/%m") as a sortable integer.
+    day * 100 + month orders exactly like the zero padded "%d/%m" string.
+    """
+    months = week_dates.astype('datetime64[M]')
+    days = (week_dates - months).astype(np.int64) + 1
+    month_numbers = months.astype(np.int64) % 12 + 1
+    return days * 100 + month_numbers
+
+
+def _last_occurrence(groups: np.ndarray, size: int) -> np.ndarray:
+    """
+    Returns, for each of `size` groups, the index of the last row in that group
+    or -1 where the group has no rows. Mirrors add_data overwriting a period.
+    """
+    positions = np.full(size, -1, dtype=np.int64)
+    if len(groups) == 0:
+        return positions
+    reversed_groups = groups[::-1]
+    unique_groups, first_in_reversed = np.unique(reversed_groups, return_index=True)
+    positions[unique_groups] = len(groups) - 1 - first_in_reversed
+    return positions
+
+
+def _percentage_change(current: np.ndarray, previous: np.ndarray,
+                       has_current: np.ndarray, has_previous: np.ndarray) -> list:
+    """
+    Vectorised WeeklyData.__percentage_change, returned as a list of python
+    floats/None. Growth is money.percentage_growth in int64 arithmetic, so
+    results are identical to the object path.
+    """
+    both = has_current & has_previous
+
+    if np.any(previous[both] == 0):
+        raise ZeroDivisionError("division by zero")
+
+    change = (current[both] - previous[both]) * GROWTH_SCALE
+    previous_both = np.abs(previous[both])
+    hundredths = (2 * np.abs(change) + previous_both) // (2 * previous_both)
+    hundredths[(change < 0) != (previous[both] < 0)] *= -1
+
+    perc = np.zeros(len(current), dtype=np.float64)
+    perc[both] = hundredths / 100
+
+    results = []
+    for value, is_both, is_current in zip(perc.tolist(), both.tolist(), has_current.tolist()):
+        if is_both:
+            results.append(value)
+        elif is_current:
+            results.append(None)
+        else:
+            results.append(-100.0)
+
+    return results
+
+
+def growth_records(columns: SalesColumns, id_key: str, name_key: str) -> list:
+    """
+    Compute the ordered growth records for every entity-week in `columns`,
+    in the same shape and order as output_json.
+    """
+    if len(columns) == 0:
+        return []
+
+    # group rows by (entity, week key); np.unique orders groups by name then week
+    week_keys = _week_day_month(columns.week_dates)
+    combined_keys = columns.name_codes * 10000 + week_keys
+    group_keys, groups = np.unique(combined_keys, return_inverse=True)
+    group_codes = group_keys // 10000
+    group_count = len(group_keys)
+
+    current_rows = np.flatnonzero(columns.periods == PERIOD_CURRENT)
+    previous_rows = np.flatnonzero(columns.periods == PERIOD_PREVIOUS)
+
+    current_last = _last_occurrence(groups[current_rows], group_count)
+    previous_last = _last_occurrence(groups[previous_rows], group_count)
+    has_current = current_last >= 0
+    has_previous = previous_last >= 0
+
+    # groups missing a period point at row 0; those values are masked out below
+    current_positions = np.where(has_current, current_rows[np.maximum(current_last, 0)], 0) \
+        if len(current_rows) else np.zeros(group_count, dtype=np.int64)
+    previous_positions = np.where(has_previous, previous_rows[np.maximum(previous_last, 0)], 0) \
+        if len(previous_rows) else np.zeros(group_count, dtype=np.int64)
+
+    gross_sales_growth = _percentage_change(
+        columns.gross_sales[current_positions], columns.gross_sales[previous_positions],
+        has_current, has_previous)
+    units_sold_growth = _percentage_change(
+        columns.units_sold[current_positions], columns.units_sold[previous_positions],
+        has_current, has_previous)
+
+    # the id recorded for an entity is taken from its first row
+    _, first_rows = np.unique(columns.name_codes, return_index=True)
+    entity_ids = columns.ids[first_rows].tolist()
+    entity_names = columns.names.tolist()
+
+    current_dates = np.datetime_as_string(columns.week_dates[current_positions]).tolist()
+    previous_dates = np.datetime_as_string(columns.week_dates[previous_positions]).tolist()
+
+    # per entity, weeks with current data by current date, then weeks without
+    # by previous date
+    order_dates = np.where(has_current, columns.week_dates[current_positions],
+                           columns.week_dates[previous_positions])
+    order = np.lexsort((order_dates, ~has_current, group_codes))
+
+    has_current_list = has_current.tolist()
+    has_previous_list = has_previous.tolist()
+    group_codes_list = group_codes.tolist()
+
+    records = []
+    for group in order.tolist():
+        code = group_codes_list[group]
+        records.append({
+            id_key: entity_ids[code],
+            name_key: entity_names[code],
+            "current_week_commencing_date":
+            current_dates[group] if has_current_list[group] else None,
+            "previous_week_commencing_date":
+            previous_dates[group] if has_previous_list[group] else None,
+            "perc_gross_sales_growth": gross_sales_growth[group],
+            "perc_unit_sales_growth": units_sold_growth[group]
+        })
+
+    return records
+
+
+def output_json_columnar(
+    brand_columns: SalesColumns,
+    product_columns: SalesColumns,
+    output_filename: str = 'results.json'
+    ) -> dict:
+    """
+    Columnar equivalent of output_json. Writes an identical json file.
+    """
+    output = OrderedDict({
+        "PRODUCT": growth_records(product_columns, "barcode_no", "product_name"),
+        "BRAND": growth_records(brand_columns, "brand_id", "brand_name")
+    })
+
+    json_file_path = OUTPUT_FOLDER_PATH / Path(output_filename)
+    json_file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(json_file_path.as_posix(), "w", encoding='utf-8') as outfile:
+        json.dump(output, outfile)
+
+    return output
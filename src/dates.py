@@ -0,0 +1,23 @@
+"""
+Shared decoding of week_commencing_date values.
+A sales file only holds a few dozen distinct week dates, so each raw string is
+parsed once and the result is served from a bounded cache for every other row.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+
+
+# comfortably more distinct weeks than a report ever spans
+DATE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def decode_week_date(raw_date: str) -> tuple:
+    """
+    Decode a "%d/%m/%Y" string into (date, week key), where the week key is
+    the "%d/%m" string used to pair current and previous weeks.
+    """
+    week_commencing_date = datetime.strptime(raw_date, "%d/%m/%Y").date()
+
+    return week_commencing_date, week_commencing_date.strftime("%d/%m")
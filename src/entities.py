@@ -0,0 +1,303 @@
+"""
+Schema-driven aggregation of sales csv rows into per-entity weekly data.
+An EntityDescriptor says which csv columns identify an entity and how it
+appears in the output, so brands, products and any other level share one
+ingest path. Rollups total one level's rows into a parent level, e.g.
+products into brands or categories, from a single read of the file.
+"""
+
+from contextlib import contextmanager
+import gc
+from typing import Iterable, Iterator
+
+from src.classes import WeeklyData
+from src.dates import decode_week_date
+from src.money import parse_pence
+from src.reader import read_header, read_sales_csv
+
+
+class EntityDescriptor:
+    """
+    Describes one kind of entity: the csv columns holding its id and name,
+    the keys those take in output records and the output section it belongs to.
+    """
+
+    def __init__(
+        self,
+        section: str,
+        id_column: str,
+        name_column: str,
+        id_key: str = None,
+        name_key: str = None
+    ):
+        self.section = section
+        self.id_column = id_column
+        self.name_column = name_column
+        self.id_key = id_key or id_column
+        self.name_key = name_key or name_column
+
+    def __repr__(self):
+        return f"EntityDescriptor({self.section!r}, {self.id_column!r}, {self.name_column!r})"
+
+    def new_entity(self, entity_id: int, entity_name: str) -> dict:
+        """
+        Returns an empty entity entry, as stored in parsed csv dicts.
+        """
+        return {
+            self.id_key: entity_id,
+            self.name_key: entity_name,
+            "weekly_data": {}
+        }
+
+
+PRODUCT = EntityDescriptor("PRODUCT", "barcode_no", "product_name")
+BRAND = EntityDescriptor("BRAND", "brand_id", "brand", name_key="brand_name")
+
+# the sections of results.json, in output order
+OUTPUT_SECTIONS = (PRODUCT, BRAND)
+
+
+class Rollup:
+    """
+    Totals the rows of one entity level into a parent level.
+
+    Each child is mapped to its parent either by the parent descriptor's
+    columns on the child's own rows, or by `parents`, a dict from child id
+    to (parent id, parent name) for files that don't carry those columns.
+    """
+
+    def __init__(self, descriptor: EntityDescriptor, parents: dict = None):
+        self.descriptor = descriptor
+        self.parents = parents
+
+
+def add_sales_rows(entities: dict, descriptor: EntityDescriptor, rows: Iterable[tuple]) -> dict:
+    """
+    Add typed row tuples, as yielded by src.reader, to a parsed csv dict.
+    Gross sales in the rows are integer pence.
+    The first row of an entity supplies its id, and a later row for the same
+    entity-week period overwrites the earlier one.
+    """
+    for (entity_id, entity_name, period_id, period_name, raw_date,
+         gross_sales, units_sold) in rows:
+
+        week_commencing_date, formatted_week_day_month = decode_week_date(raw_date)
+
+        # if the entity is new, add it to the entities dict
+        entity = entities.get(entity_name)
+        if entity is None:
+            entity = entities[entity_name] = descriptor.new_entity(entity_id, entity_name)
+
+        weekly_data = entity['weekly_data']
+
+        # if the week has no data, create a new class instance and add it to the dict
+        week = weekly_data.get(formatted_week_day_month)
+        if week is None:
+            week = weekly_data[formatted_week_day_month] = WeeklyData()
+
+        week.add_period(period_id, period_name, week_commencing_date, gross_sales, units_sold)
+
+    return entities
+
+
+def add_row(entities: dict, descriptor: EntityDescriptor, line: dict) -> str:
+    """
+    Add one csv row (as read by csv.DictReader) to a parsed csv dict and
+    return the entity name.
+    """
+    entity_name = line[descriptor.name_column]
+
+    add_sales_rows(entities, descriptor, ((
+        int(line[descriptor.id_column]),
+        entity_name,
+        int(line['period_id']),
+        line['period_name'],
+        line['week_commencing_date'],
+        parse_pence(line['gross_sales']),
+        int(line['units_sold'])
+    ),))
+
+    return entity_name
+
+
+def add_rows(entities: dict, descriptor: EntityDescriptor, lines: Iterable[dict]) -> dict:
+    """
+    Add every row from an iterable of csv rows to a parsed csv dict.
+    """
+    for line in lines:
+        add_row(entities, descriptor, line)
+
+    return entities
+
+
+def merge_weekly_data(target: dict, source: dict):
+    """
+    Merge one entity's weekly data into another's, in place. Periods present
+    in `source` overwrite those in `target`, as if its rows came later.
+    """
+    for week_key, weekly_data in source.items():
+        target_week = target.get(week_key)
+
+        if target_week is None:
+            target[week_key] = weekly_data
+            continue
+
+        if weekly_data.current is not None:
+            target_week.current = weekly_data.current
+        if weekly_data.previous is not None:
+            target_week.previous = weekly_data.previous
+
+
+def pack_entities(entities: dict) -> list:
+    """
+    Returns a parsed csv dict as lists and tuples, which pickle several times
+    faster than the WeeklyData objects themselves, for sending to another
+    process or saving. unpack_entities reverses it.
+    """
+    return [
+        ({key: value for key, value in entity.items() if key != 'weekly_data'},
+         tuple(entity['weekly_data']),
+         list(map(WeeklyData.to_tuple, entity['weekly_data'].values())))
+        for entity in entities.values()
+    ]
+
+
+def unpack_entities(packed: list, descriptor: EntityDescriptor) -> dict:
+    """
+    Rebuild a parsed csv dict packed by pack_entities.
+    """
+    return {
+        fields[descriptor.name_key]: {
+            **fields, 'weekly_data': dict(zip(week_keys, map(WeeklyData.from_tuple, weeks)))}
+        for fields, week_keys, weeks in packed
+    }
+
+
+@contextmanager
+def paused_gc() -> Iterator[None]:
+    """
+    Pause the cyclic garbage collector while unpacking parsed csv dicts. They
+    hold no reference cycles, but the many objects they are made of would
+    otherwise set off repeated collections of everything still alive, which
+    takes as long again as building them.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def roll_up(
+    entities: dict,
+    descriptor: EntityDescriptor,
+    rollup: Rollup,
+    parent_of: dict = None
+    ) -> dict:
+    """
+    Total a parsed csv dict into the rollup's parent level.
+    `parent_of` maps child names to (parent id, parent name) as read from the
+    child rows; children missing from it are looked up in rollup.parents.
+    """
+    parent_of = parent_of or {}
+    parents = {}
+
+    for child_name, child in entities.items():
+        parent = parent_of.get(child_name)
+        if parent is None and rollup.parents is not None:
+            parent = rollup.parents.get(child[descriptor.id_key])
+        if parent is None:
+            raise ValueError(
+                f"no {rollup.descriptor.section} found for {descriptor.section} '{child_name}'.")
+
+        parent_id, parent_name = parent
+        if parent_name not in parents:
+            parents[parent_name] = rollup.descriptor.new_entity(parent_id, parent_name)
+
+        parent_weekly_data = parents[parent_name]['weekly_data']
+
+        for week_key, child_week in child['weekly_data'].items():
+            if week_key not in parent_weekly_data:
+                parent_weekly_data[week_key] = WeeklyData()
+            parent_weekly_data[week_key].add_totals(child_week)
+
+    return parents
+
+
+def _recording_parents(rows: Iterable[tuple], column_rollups: list) -> Iterable[tuple]:
+    """
+    Pass typed rows through, noting each entity's parent for every column
+    rollup from the extra columns that follow the schema columns.
+    """
+    for row in rows:
+        entity_name = row[1]
+        for position, (_, parent_of) in enumerate(column_rollups):
+            # as with ids, an entity's first row decides its parent
+            if entity_name not in parent_of:
+                parent_of[entity_name] = (int(row[7 + 2 * position]), row[8 + 2 * position])
+        yield row[:7]
+
+
+def read_parents(
+    csv_filename: str,
+    descriptor: EntityDescriptor,
+    parent: EntityDescriptor
+    ) -> dict:
+    """
+    Returns a dict from entity id to (parent id, parent name), read from the
+    parent's columns on the rows of a sales csv file, in the form of
+    Rollup.parents. An entity's first row decides its parent.
+    """
+    parents = {}
+
+    for row in read_sales_csv(csv_filename, descriptor.id_column, descriptor.name_column,
+                              (parent.id_column, parent.name_column)):
+        if row[0] not in parents:
+            parents[row[0]] = (int(row[7]), row[8])
+
+    return parents
+
+
+def aggregate_sales_csv(
+    csv_filename: str,
+    descriptor: EntityDescriptor,
+    rollups: Iterable[Rollup] = ()
+    ) -> dict:
+    """
+    Parse a sales csv file for `descriptor` and any rollups in one pass.
+    Returns a dict of section name to parsed csv dict.
+    """
+    rollups = list(rollups)
+    column_rollups = []
+
+    if rollups:
+        header = read_header(csv_filename)
+
+        # rollups whose parent columns are on every row
+        column_rollups = [
+            (rollup, {}) for rollup in rollups
+            if rollup.descriptor.id_column in header
+            and rollup.descriptor.name_column in header
+        ]
+
+    extra_columns = [
+        column for rollup, _ in column_rollups
+        for column in (rollup.descriptor.id_column, rollup.descriptor.name_column)
+    ]
+    rows = read_sales_csv(
+        csv_filename, descriptor.id_column, descriptor.name_column, extra_columns)
+    if column_rollups:
+        rows = _recording_parents(rows, column_rollups)
+
+    entities = add_sales_rows({}, descriptor, rows)
+
+    parents_of = {id(rollup): parent_of for rollup, parent_of in column_rollups}
+
+    sections = {descriptor.section: entities}
+    for rollup in rollups:
+        sections[rollup.descriptor.section] = roll_up(
+            entities, descriptor, rollup, parents_of.get(id(rollup)))
+
+    return sections
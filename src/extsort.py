@@ -0,0 +1,223 @@
+"""
+External merge sort of sales csv rows by entity name, for files too large to
+parse and order in memory. Lines are read up to a memory budget at a time,
+each chunk is sorted and spilled to a temporary run file, and the runs are
+k-way merged with heapq.merge, in several passes if there are more runs than
+can be open at once.
+
+The sort is stable, so an entity's rows keep their file order: its id still
+comes from its first row and later rows still overwrite earlier ones. The
+merged rows feed the streaming engine, which orders each entity's weeks as
+output_json does, so results.json comes out in the same order.
+"""
+
+from contextlib import ExitStack
+import csv
+import heapq
+import os
+from pathlib import Path
+import tempfile
+from typing import Iterable, Iterator
+
+from src.reader import column_indices, iter_sales_rows, line_blocks, read_header
+
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# most run files merged at once
+MERGE_FAN_IN = 64
+
+# rough bytes held per buffered line beyond its text: the line and name str
+# headers, the (name, line) tuple and its list slot
+LINE_OVERHEAD_BYTES = 160
+
+RUN_BUFFER_SIZE = 1024 * 1024
+
+# every run is open at once while merging, so each gets a smaller read buffer
+MERGE_BUFFER_SIZE = 64 * 1024
+
+
+def _name_key(name_index: int):
+    """
+    Returns a function giving the entity name of a csv line.
+    """
+    def name_of(line: str) -> str:
+        if '"' in line:
+            return next(csv.reader([line]))[name_index]
+        return line.split(',', name_index + 1)[name_index]
+
+    return name_of
+
+
+def _write_run(lines: Iterable[str], temp_dir: str) -> str:
+    """
+    Write lines to a new run file, one per line. Returns its path.
+    """
+    descriptor, run_path = tempfile.mkstemp(suffix='.run', dir=temp_dir)
+    with open(descriptor, "w", encoding='utf-8', newline='',
+              buffering=RUN_BUFFER_SIZE) as run_file:
+        for line in lines:
+            run_file.write(line)
+            run_file.write('\n')
+    return run_path
+
+
+def _merge_files(run_paths: list, name_of) -> Iterator[str]:
+    """
+    Yield the lines of sorted run files in merged order, without line endings.
+    Ties keep the order of run_paths, so the merge is stable.
+    """
+    with ExitStack() as stack:
+        runs = [
+            (line[:-1] for line in stack.enter_context(
+                open(run_path, encoding='utf-8', newline='', buffering=MERGE_BUFFER_SIZE)))
+            for run_path in run_paths
+        ]
+        yield from heapq.merge(*runs, key=name_of)
+
+
+def spill_sorted_runs(
+    blocks: Iterable[list],
+    name_of,
+    temp_dir: str,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET
+    ) -> list:
+    """
+    Sort blocks of csv lines by entity name in chunks of about memory_budget
+    bytes, writing each sorted chunk to a run file. Returns the run paths in
+    file order.
+    """
+    run_paths = []
+    chunk = []
+    chunk_bytes = 0
+
+    for lines in blocks:
+        for line in lines:
+            if not line:
+                continue
+            name = name_of(line)
+            chunk.append((name, line))
+            chunk_bytes += len(line) + len(name) + LINE_OVERHEAD_BYTES
+
+            if chunk_bytes >= memory_budget:
+                # sort is stable, so equal names keep their file order
+                chunk.sort(key=lambda pair: pair[0])
+                run_paths.append(_write_run((text for _, text in chunk), temp_dir))
+                chunk = []
+                chunk_bytes = 0
+
+    if chunk:
+        chunk.sort(key=lambda pair: pair[0])
+        run_paths.append(_write_run((text for _, text in chunk), temp_dir))
+
+    return run_paths
+
+
+def merge_runs(run_paths: list, name_of, temp_dir: str) -> Iterator[str]:
+    """
+    Yield the lines of sorted runs in merged order, first merging groups of
+    MERGE_FAN_IN runs into longer runs while there are too many to open at once.
+    """
+    while len(run_paths) > MERGE_FAN_IN:
+        merged_paths = []
+        for start in range(0, len(run_paths), MERGE_FAN_IN):
+            group = run_paths[start:start + MERGE_FAN_IN]
+            merged_paths.append(_write_run(_merge_files(group, name_of), temp_dir))
+            for run_path in group:
+                os.remove(run_path)
+        run_paths = merged_paths
+
+    yield from _merge_files(run_paths, name_of)
+
+
+def iter_sorted_lines(
+    csv_filename: str,
+    name_column: str,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    temp_dir: str = None
+    ) -> Iterator:
+    """
+    Yield the header of a sales csv file as a list of column names, then its
+    data lines sorted by name_column, without line endings. Run files are
+    kept in a temporary directory under temp_dir and removed when done.
+    """
+    with open(csv_filename, mode='r', encoding='utf-8', newline='') as file, \
+            tempfile.TemporaryDirectory(prefix='sort-', dir=temp_dir) as run_dir:
+        header_line = file.readline()
+        if not header_line:
+            return
+        header = next(csv.reader([header_line]), [])
+        yield header
+
+        name_of = _name_key(header.index(name_column))
+        run_paths = spill_sorted_runs(line_blocks(file), name_of, run_dir, memory_budget)
+
+        yield from merge_runs(run_paths, name_of, run_dir)
+
+
+def sort_sales_csv(
+    csv_filename: str,
+    name_column: str,
+    output_filename: str,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    temp_dir: str = None
+    ) -> int:
+    """
+    Write a copy of a sales csv file sorted by name_column, as the streaming
+    engine expects. Returns the number of data rows.
+    """
+    lines = iter_sorted_lines(csv_filename, name_column, memory_budget, temp_dir)
+    rows = 0
+
+    with open(Path(output_filename).as_posix(), "w", encoding='utf-8', newline='',
+              buffering=RUN_BUFFER_SIZE) as outfile:
+        header = next(lines, None)
+        if header is None:
+            return 0
+
+        csv.writer(outfile, lineterminator='\n').writerow(header)
+        for line in lines:
+            outfile.write(line)
+            outfile.write('\n')
+            rows += 1
+
+    return rows
+
+
+def _line_blocks(lines: Iterator[str], block_lines: int = 10000) -> Iterator[list]:
+    """
+    Group lines into lists, the block shape iter_sales_rows reads.
+    """
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) == block_lines:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def read_sorted_sales_csv(
+    csv_filename: str,
+    id_column: str,
+    name_column: str,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    temp_dir: str = None
+    ) -> Iterator[tuple]:
+    """
+    Yield typed row tuples from a sales csv file in any order, as
+    read_sales_csv does for a file sorted by name_column. Line numbers in
+    errors count from the header in sorted order.
+    """
+    # check the schema before any sorting work is done
+    column_indices(read_header(csv_filename), id_column, name_column, source=str(csv_filename))
+
+    lines = iter_sorted_lines(csv_filename, name_column, memory_budget, temp_dir)
+    header = next(lines, None)
+    if header is None:
+        return
+
+    yield from iter_sales_rows(
+        _line_blocks(lines), header, id_column, name_column,
+        f"{csv_filename} (sorted by {name_column})")
@@ -0,0 +1,121 @@
+"""
+Indexes over parsed sales data.
+A SalesIndex maps ids to entities and keeps a date-ordered WeekIndex per
+entity, so lookups by brand_id/barcode_no are O(1) and week ranges are found
+by bisection in O(log n + k) rather than by scanning and re-sorting the
+"%d/%m" keyed weekly data, whose string order is wrong across month and year
+boundaries.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from src.entities import EntityDescriptor, aggregate_sales_csv
+
+
+class WeekIndex:
+    """
+    The week keys of one brand/product in output order: weeks with current
+    data by current week commencing date, then weeks with only previous data
+    by previous week commencing date. Each week's date in that order is kept
+    alongside for range queries.
+    """
+
+    __slots__ = ('week_keys', 'dates', 'current_count')
+
+    def __init__(self, weekly_data: dict):
+        current_weeks = []
+        previous_weeks = []
+
+        for week_key, week in weekly_data.items():
+            current_date = week.current_week_commencement_date()
+            if current_date is not None:
+                current_weeks.append((current_date, week_key))
+            else:
+                previous_weeks.append((week.previous_week_commencement_date(), week_key))
+
+        current_weeks.sort()
+        previous_weeks.sort()
+
+        self.current_count = len(current_weeks)
+        self.week_keys = [week_key for _, week_key in current_weeks] + \
+            [week_key for _, week_key in previous_weeks]
+        self.dates = [week_date for week_date, _ in current_weeks] + \
+            [week_date for week_date, _ in previous_weeks]
+
+    def __len__(self):
+        return len(self.week_keys)
+
+    def __iter__(self):
+        return iter(self.week_keys)
+
+    def between(self, start: date = None, end: date = None) -> list:
+        """
+        Returns the week keys, in output order, whose current week commencing
+        date (or previous, for weeks with no current data) is within
+        [start, end]. Either bound may be None for an open range.
+        """
+        week_keys = []
+
+        # the two runs are each sorted by date, so bisect them separately
+        for low, high in ((0, self.current_count), (self.current_count, len(self.dates))):
+            first = low if start is None else bisect_left(self.dates, start, low, high)
+            last = high if end is None else bisect_right(self.dates, end, low, high)
+            week_keys.extend(self.week_keys[first:last])
+
+        return week_keys
+
+
+class SalesIndex:
+    """
+    An index over a parsed csv dict for one entity level: entity names in
+    output order, an id-to-name hash map and a WeekIndex per entity.
+    """
+
+    def __init__(self, descriptor: EntityDescriptor, entities: dict):
+        self.descriptor = descriptor
+        self.entities = entities
+        self.names = sorted(entities.keys())
+        self.weeks = {}
+        self.names_by_id = {}
+
+        for entity_name in self.names:
+            entity = entities[entity_name]
+            self.weeks[entity_name] = WeekIndex(entity["weekly_data"])
+            # as with rows, the first entity (by name) to use an id keeps it
+            self.names_by_id.setdefault(entity[descriptor.id_key], entity_name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def entity(self, entity_name: str) -> dict:
+        """
+        Returns the parsed entity with the given name, or None.
+        """
+        return self.entities.get(entity_name)
+
+    def find(self, entity_id: int) -> dict:
+        """
+        Returns the parsed entity with the given brand_id/barcode_no, or None.
+        """
+        entity_name = self.names_by_id.get(entity_id)
+        return None if entity_name is None else self.entities[entity_name]
+
+    def week_keys(self, entity_name: str) -> list:
+        """
+        Returns an entity's week keys in output order.
+        """
+        return self.weeks[entity_name].week_keys
+
+    def weeks_between(self, entity_name: str, start: date = None, end: date = None) -> list:
+        """
+        Returns an entity's week keys within a date range, in output order.
+        """
+        return self.weeks[entity_name].between(start, end)
+
+
+def index_sales_csv(csv_filename: str, descriptor: EntityDescriptor) -> SalesIndex:
+    """
+    Parse a sales csv file and index it.
+    """
+    return SalesIndex(descriptor, aggregate_sales_csv(csv_filename, descriptor)[descriptor.section])
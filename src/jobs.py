@@ -0,0 +1,129 @@
+"""
+Concurrent report jobs.
+A job is one (sales_brand csv, sales_product csv, output file) report. The
+brand and product files of a job are parsed at the same time in a worker pool,
+its output is written once both are done, and many jobs can run in one process
+with a limit on how many are in flight at once. Worker processes send parsed
+files back packed by pack_entities, since unpickling WeeklyData objects one
+by one would cost the parent most of the time the parse took.
+"""
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import os
+from typing import Iterable
+
+from src.entities import (
+    BRAND, PRODUCT, EntityDescriptor, pack_entities, paused_gc, unpack_entities)
+from src.main import parse_sales_brand_csv, parse_sales_product_csv, write_json
+
+
+class ReportJob:
+    """
+    The input files and output filename of one report.
+    """
+
+    def __init__(
+        self,
+        brand_csv_filename: str,
+        product_csv_filename: str,
+        output_filename: str = 'results.json'
+    ):
+        self.brand_csv_filename = brand_csv_filename
+        self.product_csv_filename = product_csv_filename
+        self.output_filename = output_filename
+
+    def __repr__(self):
+        return (f"ReportJob({self.brand_csv_filename!r}, {self.product_csv_filename!r}, "
+                f"{self.output_filename!r})")
+
+
+def _parse_packed(parse, csv_filename: str) -> list:
+    """
+    Parse a csv file with `parse`, packed by pack_entities. Runs inside a worker process.
+    """
+    return pack_entities(parse(csv_filename))
+
+
+async def _parse(
+    executor: Executor,
+    parse,
+    descriptor: EntityDescriptor,
+    csv_filename: str
+    ) -> dict:
+    """
+    Parse a csv file on the executor, packing it across process boundaries.
+    """
+    loop = asyncio.get_running_loop()
+
+    if not isinstance(executor, ProcessPoolExecutor):
+        return await loop.run_in_executor(executor, parse, csv_filename)
+
+    packed = await loop.run_in_executor(executor, _parse_packed, parse, csv_filename)
+    with paused_gc():
+        return unpack_entities(packed, descriptor)
+
+
+async def run_job(job: ReportJob, executor: Executor, limit: asyncio.Semaphore = None) -> int:
+    """
+    Parse a job's brand and product files concurrently on the executor, then
+    write its output. Returns the number of records written.
+    """
+    loop = asyncio.get_running_loop()
+
+    async def parse_and_write() -> int:
+        brand_data, product_data = await asyncio.gather(
+            _parse(executor, parse_sales_brand_csv, BRAND, job.brand_csv_filename),
+            _parse(executor, parse_sales_product_csv, PRODUCT, job.product_csv_filename))
+
+        # writing happens on a thread so other jobs' results keep being collected
+        return await loop.run_in_executor(None, partial(
+            write_json, brand_data=brand_data, product_data=product_data,
+            output_filename=job.output_filename))
+
+    if limit is None:
+        return await parse_and_write()
+
+    async with limit:
+        return await parse_and_write()
+
+
+async def run_jobs_async(
+    jobs: Iterable[ReportJob],
+    concurrency: int = 4,
+    workers: int = None,
+    use_processes: bool = True
+    ) -> list:
+    """
+    Run report jobs with at most `concurrency` in flight, parsing on a pool of
+    `workers` processes (or threads with use_processes=False, which only helps
+    when parsing waits on slow storage). Returns each job's record count, in
+    job order. If a job fails, its exception is raised once the rest finish.
+    """
+    jobs = list(jobs)
+    workers = workers or os.cpu_count() or 1
+    limit = asyncio.Semaphore(concurrency)
+    pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+
+    with pool(max_workers=workers) as executor:
+        results = await asyncio.gather(
+            *(run_job(job, executor, limit) for job in jobs), return_exceptions=True)
+
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+    return results
+
+
+def run_jobs(
+    jobs: Iterable[ReportJob],
+    concurrency: int = 4,
+    workers: int = None,
+    use_processes: bool = True
+    ) -> list:
+    """
+    Blocking entry point for run_jobs_async.
+    """
+    return asyncio.run(run_jobs_async(jobs, concurrency, workers, use_processes))
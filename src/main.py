@@ -1,20 +1,30 @@
 """
 A script for parsing and analysing sales_brand and sales_data csv files.
 Outputs a JSON file with weekly percentage growth information.
+
+Run `python -m src.main --help` for the command line options, including a
+batch mode that runs many reports in one process. Only what the default
+engine needs is imported at startup; the other engines are loaded on use.
 """
 
-import csv
-from datetime import datetime
+import argparse
 import json
-import os
 from pathlib import Path
 import sys
 from typing import OrderedDict
 
-sys.path.insert(0, os.path.abspath(
-    os.path.join(os.path.dirname(__file__), '..')))
+if __package__ in (None, ''):
+    # run as a script, e.g. python src/main.py, rather than with python -m
+    sys.path.insert(0, Path(__file__).resolve().parent.parent.as_posix())
 
+# pylint: disable=wrong-import-position
 from src.classes import WeeklyData
+from src.entities import BRAND, PRODUCT, EntityDescriptor, aggregate_sales_csv
+from src.index import SalesIndex, WeekIndex
+from src.metrics import NO_INSTRUMENTATION, Instrumentation
+from src.serialize import (
+    WRITE_BUFFER_SIZE, RecordEncoder, encode_records, open_output, replacing, write_document,
+    write_ndjson)
 
 
 DATA_FOLDER_PATH = Path(__file__).parent.parent / Path("data")
@@ -26,107 +36,86 @@ def parse_sales_brand_csv(csv_filename: str) -> dict:
     Parse a sales_brand csv file into a dictionary of WeeklyData objects.
     This structure allows for easy filtering by brand, then week.
     """
-
-    brands = {}
-
-    with open(csv_filename, mode='r', encoding='utf-8') as file:
-
-        csv_file = csv.DictReader(file)
-
-        for line in csv_file:
-
-            # force variable types for each line item
-            line_brand_id = int(line['brand_id'])
-            line_brand_name = str(line['brand'])
-            line_period_id = int(line['period_id'])
-            line_period_name = str(line['period_name'])
-            line_week_commencing_date = datetime.strptime(
-                line['week_commencing_date'], "%d/%m/%Y").date()
-            line_gross_sales = float(line['gross_sales'])
-            line_units_sold = int(line['units_sold'])
-
-            formatted_week_day_month = line_week_commencing_date.strftime(
-                "%d/%m"
-            )
-
-            # if the brand is new, add to the brands dict
-            if line_brand_name not in brands:
-                brands[line_brand_name] = {
-                    "brand_id": line_brand_id,
-                    "brand_name": line_brand_name,
-                    "weekly_data": {}
-                }
-
-            # if the week has no data, create a new class instance and add it to the dict
-            if formatted_week_day_month not in brands[line_brand_name]['weekly_data']:
-                brands[line_brand_name]['weekly_data'][formatted_week_day_month] = WeeklyData()
-
-            # create a WeeklyData instance for this line of data
-            brands[line_brand_name]['weekly_data'][formatted_week_day_month].add_data(
-                line_period_id,
-                line_period_name,
-                line_week_commencing_date,
-                line_gross_sales,
-                line_units_sold
-            )
-
-    return brands
-
-# parity between brand_id-barcode_no and brand-product_name means these could be combined?
-# probably harder to read
+    return aggregate_sales_csv(csv_filename, BRAND)[BRAND.section]
 
 
 def parse_sales_product_csv(csv_filename: str) -> dict:
     """
     Parse a sales_product csv file into a dictionary of WeeklyData objects.
-    This structure allows for easy filtering by brand, then week.
+    This structure allows for easy filtering by product, then week.
     """
+    return aggregate_sales_csv(csv_filename, PRODUCT)[PRODUCT.section]
 
-    products = {}
-
-    with open(csv_filename, mode='r', encoding='utf-8') as file:
-
-        csv_file = csv.DictReader(file)
 
-        for line in csv_file:
+def ordered_week_keys(weekly_data: dict) -> list:
+    """
+    Returns the week keys of a brand/product in output order.
+    Weeks are in date order, and weeks with no current data are appended last.
+    """
+    return WeekIndex(weekly_data).week_keys
 
-            # force variable types for each line item
-            line_barcode_no = int(line['barcode_no'])
-            line_product_name = str(line['product_name'])
-            line_period_id = int(line['period_id'])
-            line_period_name = str(line['period_name'])
-            line_week_commencing_date = datetime.strptime(
-                line['week_commencing_date'], "%d/%m/%Y").date()
-            line_gross_sales = float(line['gross_sales'])
-            line_units_sold = int(line['units_sold'])
 
-            formatted_week_day_month = line_week_commencing_date.strftime(
-                "%d/%m"
-            )
+def week_record(
+    id_key: str,
+    entity_id: int,
+    name_key: str,
+    entity_name: str,
+    weekly_data: WeeklyData
+    ) -> dict:
+    """
+    Returns the output record for one week of a brand/product.
+    """
+    return {
+        id_key: entity_id,
+        name_key: entity_name,
+        "current_week_commencing_date":
+        weekly_data.current_week_commencement_date(iso=True),
+        "previous_week_commencing_date":
+        weekly_data.previous_week_commencement_date(iso=True),
+        "perc_gross_sales_growth": weekly_data.gross_sales_percentage_growth,
+        "perc_unit_sales_growth": weekly_data.units_sold_percentage_growth
+    }
+
+
+def entity_records(
+    id_key: str,
+    entity_id: int,
+    name_key: str,
+    entity_name: str,
+    weekly_data: dict
+    ) -> list:
+    """
+    Returns the ordered output records for a single brand/product.
+    """
+    return [
+        week_record(id_key, entity_id, name_key, entity_name, weekly_data[week_key])
+        for week_key in ordered_week_keys(weekly_data)
+    ]
 
-            # if the brand is new, add to the brands dict
-            if line_product_name not in products:
-                products[line_product_name] = {
-                    "barcode_no": line_barcode_no,
-                    "product_name": line_product_name,
-                    "weekly_data": {}
-                }
 
-            # if the week has no data, create a new class instance and add it to the dict
-            if formatted_week_day_month not in products[line_product_name]['weekly_data']:
-                products[line_product_name]['weekly_data'][formatted_week_day_month] = WeeklyData(
-                )
+def section_records(
+    descriptor: EntityDescriptor,
+    entities: dict,
+    index: SalesIndex = None
+    ) -> list:
+    """
+    Returns the ordered output records for every entity in a parsed csv dict.
+    An existing SalesIndex over the dict can be passed to avoid rebuilding it.
+    """
+    index = index or SalesIndex(descriptor, entities)
+    records = []
 
-            # create a WeeklyData instance for this line of data
-            products[line_product_name]['weekly_data'][formatted_week_day_month].add_data(
-                line_period_id,
-                line_period_name,
-                line_week_commencing_date,
-                line_gross_sales,
-                line_units_sold
-            )
+    for entity_name in index.names:
+        entity = entities[entity_name]
+        weekly_data = entity["weekly_data"]
+        records.extend(
+            week_record(
+                descriptor.id_key, entity[descriptor.id_key],
+                descriptor.name_key, entity[descriptor.name_key],
+                weekly_data[week_key])
+            for week_key in index.week_keys(entity_name))
 
-    return products
+    return records
 
 
 def output_json(
@@ -138,121 +127,339 @@ def output_json(
     Create an json file containing ordered weekly growth data for all brands and products.
     """
     output = OrderedDict({
-        "PRODUCT": [],
-        "BRAND": []
+        PRODUCT.section: section_records(PRODUCT, product_data),
+        BRAND.section: section_records(BRAND, brand_data)
     })
 
     json_file_path = OUTPUT_FOLDER_PATH / Path(output_filename)
+    json_file_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # sort brand_data_keys before iterating and inserting into OrderedDict
-    for brand_name in sorted(brand_data.keys()):
-
-        brand_id = brand_data[brand_name]["brand_id"]
-        brand_name = brand_data[brand_name]["brand_name"]
-
-        # used to hold entries with no current weekly data
-        # so they can be appended after
-        no_current_weekly_data = []
-
-        # sort weekly_data keys before iterating and inserting
-        for week_key in sorted(
-                brand_data[brand_name]["weekly_data"].keys()):
-            weekly_data = brand_data[brand_name]["weekly_data"][week_key]
-
-            if weekly_data.current_week_commencement_date(iso=True) is not None:
-                output["BRAND"].append({
-                    "brand_id": brand_id,
-                    "brand_name": brand_name,
-                    "current_week_commencing_date":
-                    weekly_data.current_week_commencement_date(iso=True),
-                    "previous_week_commencing_date":
-                    weekly_data.previous_week_commencement_date(iso=True),
-                    "perc_gross_sales_growth": weekly_data.gross_sales_percentage_growth,
-                    "perc_unit_sales_growth": weekly_data.units_sold_percentage_growth
-                })
-            else:
-                no_current_weekly_data.append({
-                    "brand_id": brand_id,
-                    "brand_name": brand_name,
-                    "current_week_commencing_date":
-                    weekly_data.current_week_commencement_date(iso=True),
-                    "previous_week_commencing_date":
-                    weekly_data.previous_week_commencement_date(iso=True),
-                    "perc_gross_sales_growth": weekly_data.gross_sales_percentage_growth,
-                    "perc_unit_sales_growth": weekly_data.units_sold_percentage_growth
-                })
-
-        # append entries with no current weekly data
-        for item in no_current_weekly_data:
-            output["BRAND"].append(item)
-
-    for product_name in sorted(product_data.keys()):
-
-        barcode_no = product_data[product_name]["barcode_no"]
-        product_name = product_data[product_name]["product_name"]
-
-        sorted_weekly_data_keys = sorted(
-            product_data[product_name]["weekly_data"].keys())
-
-        # used to hold entries with no current weekly data
-        # so they can be appended after
-        no_current_weekly_data = []
-
-        for week_key in sorted_weekly_data_keys:
-            weekly_data = product_data[product_name]["weekly_data"][week_key]
-
-            if weekly_data.current_week_commencement_date(iso=True) is not None:
-
-                output["PRODUCT"].append({
-                    "barcode_no": barcode_no,
-                    "product_name": product_name,
-                    "current_week_commencing_date":
-                    weekly_data.current_week_commencement_date(iso=True),
-                    "previous_week_commencing_date":
-                    weekly_data.previous_week_commencement_date(iso=True),
-                    "perc_gross_sales_growth": weekly_data.gross_sales_percentage_growth,
-                    "perc_unit_sales_growth": weekly_data.units_sold_percentage_growth
-                })
-
-            else:
-
-                no_current_weekly_data.append({
-                    "barcode_no": barcode_no,
-                    "product_name": product_name,
-                    "current_week_commencing_date":
-                    weekly_data.current_week_commencement_date(iso=True),
-                    "previous_week_commencing_date":
-                    weekly_data.previous_week_commencement_date(iso=True),
-                    "perc_gross_sales_growth": weekly_data.gross_sales_percentage_growth,
-                    "perc_unit_sales_growth": weekly_data.units_sold_percentage_growth
-                })
-
-        # append entries with no current weekly data
-        for item in no_current_weekly_data:
-            output["PRODUCT"].append(item)
-
-    with open(json_file_path.as_posix(), "w", encoding='utf-8') as outfile:
-        json.dump(output, outfile)
+    with replacing(json_file_path) as temp_path, \
+            open(temp_path.as_posix(), "w", encoding='utf-8',
+                 buffering=WRITE_BUFFER_SIZE) as outfile:
+        write_document(outfile, {
+            section: encode_records(records) for section, records in output.items()
+        })
 
     return output
 
 
-def run() -> bool:
+def encode_section(
+    descriptor: EntityDescriptor,
+    entities: dict,
+    compact: bool = False,
+    index: SalesIndex = None
+    ):
+    """
+    Yield the encoded records for every entity in output order.
+    """
+    index = index or SalesIndex(descriptor, entities)
+
+    for entity_name in index.names:
+        entity = entities[entity_name]
+        weekly_data = entity["weekly_data"]
+        encoder = RecordEncoder(
+            descriptor.id_key, entity[descriptor.id_key],
+            descriptor.name_key, entity[descriptor.name_key], compact)
+
+        for week_key in index.week_keys(entity_name):
+            yield encoder.encode(weekly_data[week_key])
+
+
+def write_json_sections(
+    sections: list,
+    output_filename: str = 'results.json',
+    compact: bool = False,
+    ndjson: bool = False,
+    compression: str = None,
+    compression_level: int = None
+    ) -> int:
+    """
+    Write a json file with one section per (EntityDescriptor, parsed csv dict)
+    pair, in the order given. Returns the number of records.
+    output_filename is relative to the output folder, or an absolute path.
+    ndjson=True writes one compact record per line instead, with a "section"
+    field, and compression='gzip' or 'zstd' compresses the file as it is written.
+    The file is only replaced once every record has been written.
+    """
+    json_file_path = OUTPUT_FOLDER_PATH / Path(output_filename)
+    json_file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with replacing(json_file_path) as temp_path, \
+            open_output(temp_path.as_posix(), compression, compression_level) as outfile:
+        if ndjson:
+            return write_ndjson(outfile, {
+                descriptor.section: encode_section(descriptor, entities, compact=True)
+                for descriptor, entities in sections
+            })
+
+        return write_document(outfile, {
+            descriptor.section: encode_section(descriptor, entities, compact)
+            for descriptor, entities in sections
+        }, compact)
+
+
+def write_json(
+    brand_data: dict,
+    product_data: dict,
+    output_filename: str = 'results.json',
+    compact: bool = False,
+    ndjson: bool = False,
+    compression: str = None,
+    compression_level: int = None
+    ) -> int:
+    """
+    Write the same json file as output_json without building the records
+    in memory first. compact=True drops optional whitespace and non-ascii
+    escapes, using orjson when installed. See write_json_sections for the
+    ndjson and compression options. Returns the number of records.
+    """
+    return write_json_sections(
+        [(PRODUCT, product_data), (BRAND, brand_data)], output_filename, compact,
+        ndjson, compression, compression_level)
+
+
+ENGINES = ('default', 'columnar', 'streaming', 'external', 'parallel', 'concurrent')
+
+
+def run(
+    engine: str = 'default',
+    use_cache: bool = False,
+    instrumentation: Instrumentation = None,
+    brand_csv_filename: str = None,
+    product_csv_filename: str = None,
+    output_filename: str = 'results.json',
+    memory_budget: int = None,
+    checkpoint: bool = False
+    ) -> bool:
     """
     This is the main entry point to the program.
     The parsing and output functions are called from here.
+    The input files default to those in the data folder, and output_filename
+    is relative to the output folder, or an absolute path.
+    engine='columnar' uses the NumPy column-array ingest path instead,
+    and with use_cache=True memory-maps a binary cache of each csv file.
+    engine='streaming' writes records as it reads them, for input files
+    that are already sorted by brand/product name.
+    engine='external' streams input files in any order, sorting them first
+    with an external merge sort that holds about memory_budget bytes of rows.
+    engine='parallel' parses each csv file in a process pool.
+    engine='concurrent' parses the brand and product files at the same time.
+    checkpoint=True saves the default engine's progress as it goes, and
+    resumes from it if an earlier run with the same files didn't finish.
+    Passing an Instrumentation records per-stage metrics and emits them.
     """
+    stages = instrumentation or NO_INSTRUMENTATION
+
+    if checkpoint and engine != 'default':
+        raise ValueError("checkpointing is only supported by the default engine.")
+
+    brand_csv_filename = brand_csv_filename or DATA_FOLDER_PATH / Path("sales_brand.csv")
+    product_csv_filename = product_csv_filename or DATA_FOLDER_PATH / Path("sales_product.csv")
+
+    if engine == 'columnar':
+        # imported here so the default path doesn't require numpy
+        from src.columnar import load_sales_csv, output_json_columnar
+
+        loader = load_sales_csv
+        if use_cache:
+            from src.cache import load_sales_csv_cached
+            loader = load_sales_csv_cached
+
+        with stages.stage('load_sales_brand_csv') as stage:
+            brand_columns = loader(brand_csv_filename, 'brand_id', 'brand')
+            stage.add_columns(brand_columns)
+
+        with stages.stage('load_sales_product_csv') as stage:
+            product_columns = loader(product_csv_filename, 'barcode_no', 'product_name')
+            stage.add_columns(product_columns)
+
+        with stages.stage('output_json_columnar') as stage:
+            output = output_json_columnar(
+                brand_columns=brand_columns, product_columns=product_columns,
+                output_filename=output_filename)
+            stage.add_rows(len(output["PRODUCT"]) + len(output["BRAND"]))
+
+        stages.emit(engine=engine)
+
+        return True
+
+    if engine in ('streaming', 'external'):
+        from src.extsort import DEFAULT_MEMORY_BUDGET
+        from src.streaming import stream_output_json
+
+        with stages.stage('stream_output_json') as stage:
+            stage.add_rows(stream_output_json(
+                brand_csv_filename=brand_csv_filename,
+                product_csv_filename=product_csv_filename,
+                output_filename=output_filename,
+                presorted=engine == 'streaming',
+                memory_budget=memory_budget or DEFAULT_MEMORY_BUDGET))
+
+        stages.emit(engine=engine)
+
+        return True
+
+    if checkpoint:
+        from src.checkpoint import run_checkpointed
+
+        with stages.stage('run_checkpointed') as stage:
+            stage.add_rows(run_checkpointed(
+                brand_csv_filename=brand_csv_filename,
+                product_csv_filename=product_csv_filename,
+                output_filename=output_filename))
+
+        stages.emit(engine=engine)
+
+        return True
+
+    if engine == 'concurrent':
+        from src.jobs import ReportJob, run_jobs
+
+        with stages.stage('run_report_jobs') as stage:
+            stage.add_rows(sum(run_jobs([ReportJob(
+                brand_csv_filename=brand_csv_filename,
+                product_csv_filename=product_csv_filename,
+                output_filename=output_filename)],
+                workers=2)))
 
-    sales_brand_data = parse_sales_brand_csv(
-        DATA_FOLDER_PATH / Path("sales_brand.csv"))
+        stages.emit(engine=engine)
 
-    sales_product_data = parse_sales_product_csv(
-        DATA_FOLDER_PATH / Path("sales_product.csv"))
+        return True
 
-    output_json(brand_data=sales_brand_data, product_data=sales_product_data)
+    if engine == 'parallel':
+        from src.parallel import (
+            parse_sales_brand_csv_parallel, parse_sales_product_csv_parallel)
+
+        brand_parser = parse_sales_brand_csv_parallel
+        product_parser = parse_sales_product_csv_parallel
+
+    elif engine == 'default':
+        brand_parser = parse_sales_brand_csv
+        product_parser = parse_sales_product_csv
+
+    else:
+        raise ValueError("engine not recognised. "
+                         "Expected 'default', 'columnar', 'streaming', 'external', "
+                         "'parallel' or 'concurrent'.")
+
+    with stages.stage('parse_sales_brand_csv') as stage:
+        sales_brand_data = brand_parser(brand_csv_filename)
+        stage.add_parsed(sales_brand_data)
+
+    with stages.stage('parse_sales_product_csv') as stage:
+        sales_product_data = product_parser(product_csv_filename)
+        stage.add_parsed(sales_product_data)
+
+    with stages.stage('write_json') as stage:
+        stage.add_rows(write_json(brand_data=sales_brand_data, product_data=sales_product_data,
+                                  output_filename=output_filename))
+
+    stages.emit(engine=engine)
 
     return True
 
 
+def read_batch_manifest(manifest_filename: str) -> list:
+    """
+    Read a batch manifest: a json list of {"brand_csv", "product_csv",
+    "output"} objects, one per report. Relative paths are taken from the
+    manifest's folder. Returns (brand csv, product csv, output) path tuples.
+    """
+    manifest_path = Path(manifest_filename).resolve()
+
+    with open(manifest_path.as_posix(), encoding='utf-8') as manifest_file:
+        entries = json.load(manifest_file)
+
+    jobs = []
+    for position, entry in enumerate(entries):
+        try:
+            jobs.append(tuple(
+                (manifest_path.parent / Path(entry[key])).as_posix()
+                for key in ('brand_csv', 'product_csv', 'output')))
+        except (KeyError, TypeError) as error:
+            raise ValueError(
+                f"{manifest_filename}: job {position} needs brand_csv, product_csv "
+                f"and output paths.") from error
+
+    return jobs
+
+
+def run_batch(
+    manifest_filename: str,
+    engine: str = 'default',
+    use_cache: bool = False,
+    memory_budget: int = None,
+    checkpoint: bool = False
+    ) -> list:
+    """
+    Run every report in a batch manifest in this process, one after another,
+    so the interpreter, imports and caches are only warmed up once. A failed
+    report doesn't stop the others. Returns (output path, error or None) pairs.
+    """
+    results = []
+
+    for brand_csv_filename, product_csv_filename, output_filename in \
+            read_batch_manifest(manifest_filename):
+        try:
+            run(engine, use_cache, brand_csv_filename=brand_csv_filename,
+                product_csv_filename=product_csv_filename, output_filename=output_filename,
+                memory_budget=memory_budget, checkpoint=checkpoint)
+        except (OSError, ValueError, ZeroDivisionError) as error:
+            results.append((output_filename, error))
+        else:
+            results.append((output_filename, None))
+
+    return results
+
+
+def main(argv: list = None) -> int:
+    """
+    Command line entry point. Returns the exit status.
+    """
+    parser = argparse.ArgumentParser(
+        description="Write weekly sales growth for brands and products as json.")
+    parser.add_argument('--brand-csv', help="default: data/sales_brand.csv")
+    parser.add_argument('--product-csv', help="default: data/sales_product.csv")
+    parser.add_argument('-o', '--output', help="default: output/results.json")
+    parser.add_argument('--engine', choices=ENGINES, default='default')
+    parser.add_argument('--use-cache', action='store_true',
+                        help="memory-map a binary cache of each csv file (columnar engine)")
+    parser.add_argument('--memory-budget', type=int, metavar='MB',
+                        help="megabytes of rows to sort in memory at once (external engine)")
+    parser.add_argument('--checkpoint', action='store_true',
+                        help="save progress as the report runs, and resume an unfinished "
+                             "run of the same files (default engine)")
+    parser.add_argument('--batch', metavar='MANIFEST',
+                        help="run every report in a json manifest of "
+                             "{brand_csv, product_csv, output} objects")
+    args = parser.parse_args(argv)
+    memory_budget = args.memory_budget * 1024 * 1024 if args.memory_budget else None
+
+    if args.batch:
+        if args.brand_csv or args.product_csv or args.output:
+            parser.error("--batch takes its paths from the manifest.")
+
+        failed = 0
+        for output_filename, error in run_batch(
+                args.batch, args.engine, args.use_cache, memory_budget, args.checkpoint):
+            if error is not None:
+                failed += 1
+                print(f"{output_filename}: {error}", file=sys.stderr)
+
+        return 1 if failed else 0
+
+    # paths given on the command line are relative to the working directory
+    run(args.engine, args.use_cache,
+        brand_csv_filename=args.brand_csv,
+        product_csv_filename=args.product_csv,
+        output_filename=Path(args.output).resolve().as_posix() if args.output
+        else 'results.json',
+        memory_budget=memory_budget,
+        checkpoint=args.checkpoint)
+
+    return 0
+
+
 if __name__ == "__main__":
-    run()
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""
+Opt-in stage-level instrumentation for run().
+Each stage records wall time, CPU time, rows processed, entities and weeks
+created and the process's peak memory so far, and can optionally be wrapped
+in cProfile or tracemalloc. When instrumentation is off, run() uses NO_INSTRUMENTATION,
+whose stages do nothing.
+"""
+
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import resource
+import sys
+import time
+
+
+def process_peak_rss_bytes() -> int:
+    """
+    Returns the peak resident set size of this process so far, in bytes.
+    This is a lifetime high-water mark: it never falls, so a stage reports the
+    largest of its own peak and every earlier stage's. Use the tracemalloc
+    peak, which is reset per stage, for a stage's own allocations.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Stage:
+    """
+    Metrics for one stage of a run, collected as a context manager.
+    """
+
+    def __init__(self, name: str, profile_dir: Path = None, trace_memory: bool = False):
+        self.name = name
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.rows = 0
+        self.entities = 0
+        self.weeks = 0
+        self.process_peak_rss_bytes = None
+        self.peak_traced_bytes = None
+        self.profile_path = None
+
+        self._profiler = None
+        self._started_tracing = False
+        self._wall_start = None
+        self._cpu_start = None
+
+    def __enter__(self):
+        # the profilers are imported only when used, to keep startup fast
+        if self.trace_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+
+        if self.profile_dir is not None:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.cpu_seconds = time.process_time() - self._cpu_start
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            self.profile_path = self.profile_dir / Path(f"{self.name}.prof")
+            self._profiler.dump_stats(self.profile_path.as_posix())
+
+        if self.trace_memory:
+            import tracemalloc
+            _, self.peak_traced_bytes = tracemalloc.get_traced_memory()
+            if self._started_tracing:
+                tracemalloc.stop()
+
+        self.process_peak_rss_bytes = process_peak_rss_bytes()
+
+        return False
+
+    def add_rows(self, rows: int):
+        """
+        Count rows processed by this stage, e.g. records written.
+        """
+        self.rows += rows
+
+    def add_columns(self, columns):
+        """
+        Count the rows and entities in a src.columnar.SalesColumns.
+        """
+        self.rows += len(columns)
+        self.entities += len(columns.names)
+
+    def add_parsed(self, parsed_csv: dict):
+        """
+        Count the entities, weeks and rows in a parsed csv dict. A repeated row
+        for the same entity-week period overwrites the first, so counts once.
+        """
+        self.entities += len(parsed_csv)
+
+        for entity in parsed_csv.values():
+            self.weeks += len(entity['weekly_data'])
+            for weekly_data in entity['weekly_data'].values():
+                self.rows += (weekly_data.current_week_commencement_date() is not None) + \
+                    (weekly_data.previous_week_commencement_date() is not None)
+
+    def as_dict(self) -> dict:
+        """
+        Returns the stage's metrics as a json-serialisable dict.
+        """
+        return {
+            "stage": self.name,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "rows": self.rows,
+            "entities": self.entities,
+            "weeks": self.weeks,
+            "process_peak_rss_bytes": self.process_peak_rss_bytes,
+            "peak_traced_bytes": self.peak_traced_bytes,
+            "profile_path": self.profile_path.as_posix() if self.profile_path else None
+        }
+
+
+class Instrumentation:
+    """
+    Collects Stage metrics for a run and emits them as a single record.
+    profile_dir wraps every stage in cProfile and writes <stage>.prof files there,
+    trace_memory adds tracemalloc peaks and metrics_path appends each record to
+    a json lines file.
+    """
+
+    def __init__(
+        self,
+        profile_dir: str = None,
+        trace_memory: bool = False,
+        metrics_path: str = None
+    ):
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.trace_memory = trace_memory
+        self.metrics_path = Path(metrics_path) if metrics_path else None
+        self.stages = []
+
+    def stage(self, name: str) -> Stage:
+        """
+        Returns a new Stage to be used as a context manager around the work.
+        """
+        stage = Stage(name, self.profile_dir, self.trace_memory)
+        self.stages.append(stage)
+        return stage
+
+    def record(self, **fields) -> dict:
+        """
+        Returns the structured metrics record for the stages so far.
+        """
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            **fields,
+            "stages": [stage.as_dict() for stage in self.stages]
+        }
+
+    def emit(self, **fields) -> dict:
+        """
+        Build the metrics record and append it to metrics_path if set.
+        """
+        record = self.record(**fields)
+
+        if self.metrics_path is not None:
+            self.metrics_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.metrics_path.as_posix(), "a", encoding='utf-8') as metrics_file:
+                metrics_file.write(json.dumps(record) + "\n")
+
+        return record
+
+
+class _NullStage:
+    """
+    A Stage stand-in that records nothing.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def add_rows(self, rows: int):
+        """
+        Does nothing.
+        """
+
+    def add_columns(self, columns):
+        """
+        Does nothing.
+        """
+
+    def add_parsed(self, parsed_csv: dict):
+        """
+        Does nothing.
+        """
+
+
+class _NullInstrumentation:
+    """
+    The instrumentation used when none is requested.
+    """
+
+    _stage = _NullStage()
+
+    def stage(self, name: str) -> _NullStage:
+        """
+        Returns a shared no-op stage.
+        """
+        return self._stage
+
+    def emit(self, **fields) -> dict:
+        """
+        Does nothing.
+        """
+        return None
+
+
+NO_INSTRUMENTATION = _NullInstrumentation()
@@ -0,0 +1,229 @@
+"""
+Top-K growth movers.
+Selects the biggest risers or fallers by gross sales or units sold growth
+straight from parsed csv dicts. Each candidate is offered to a bounded min-heap
+of the K best seen so far, so selection is O(n log K) and only the winners are
+turned into output records, rather than building and sorting every record.
+
+Weeks with no growth value (no previous period) are not movers and are
+skipped. Weeks with no current period count as a -100.0 fall, as in
+results.json. Ties are broken by output order: entity name, then week.
+"""
+
+import argparse
+import heapq
+import json
+from operator import attrgetter
+from pathlib import Path
+import sys
+
+from src.entities import BRAND, PRODUCT, EntityDescriptor, aggregate_sales_csv, read_parents
+from src.main import DATA_FOLDER_PATH, week_record
+
+
+DEFAULT_K = 20
+
+# output growth key -> WeeklyData property
+GROWTH_KEYS = {
+    "perc_gross_sales_growth": attrgetter('gross_sales_percentage_growth'),
+    "perc_unit_sales_growth": attrgetter('units_sold_percentage_growth')
+}
+
+
+class _Descending(str):
+    """
+    A str that compares in reverse, so heap entries that tie on growth keep
+    the entity earliest in name order.
+    """
+
+    __slots__ = ()
+
+    def __lt__(self, other):
+        return str.__gt__(self, other)
+
+    def __gt__(self, other):
+        return str.__lt__(self, other)
+
+
+def _select(
+    descriptor: EntityDescriptor,
+    entities: dict,
+    k: int,
+    growth_key: str,
+    fallers: bool,
+    per_week: bool = False,
+    parents: dict = None
+    ) -> dict:
+    """
+    Returns group key -> the best entries for that group, best first.
+    Groups are weeks when per_week, parent names when parents are given,
+    or a single None group. Each entry ends with (entity name, week key).
+    """
+    if growth_key not in GROWTH_KEYS:
+        raise ValueError(f"growth key not recognised. Expected one of {', '.join(GROWTH_KEYS)}.")
+
+    get_growth = GROWTH_KEYS[growth_key]
+    sign = -1 if fallers else 1
+    heaps = {}
+
+    for entity_name, entity in entities.items():
+        group = None
+        if parents is not None:
+            parent = parents.get(entity[descriptor.id_key])
+            if parent is None:
+                raise ValueError(f"no parent found for {descriptor.section} '{entity_name}'.")
+            group = parent[1]
+
+        name = _Descending(entity_name)
+
+        for week_key, week in entity['weekly_data'].items():
+            growth = get_growth(week)
+            if growth is None:
+                continue
+
+            score = sign * growth
+            heap = heaps.setdefault(week_key if per_week else group, [])
+            if len(heap) == k and score < heap[0][0]:
+                continue
+
+            # larger entries are better: higher score, then earlier entity and week
+            current_date = week.current_week_commencement_date()
+            if current_date is not None:
+                entry = (score, name, 0, -current_date.toordinal(), entity_name, week_key)
+            else:
+                entry = (score, name, -1,
+                         -week.previous_week_commencement_date().toordinal(),
+                         entity_name, week_key)
+
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+    return {group: sorted(heap, reverse=True) for group, heap in heaps.items()}
+
+
+def _records(descriptor: EntityDescriptor, entities: dict, entries: list) -> list:
+    return [
+        week_record(
+            descriptor.id_key, entities[entity_name][descriptor.id_key],
+            descriptor.name_key, entity_name, entities[entity_name]['weekly_data'][week_key])
+        for *_, entity_name, week_key in entries
+    ]
+
+
+def top_movers(
+    descriptor: EntityDescriptor,
+    entities: dict,
+    k: int = DEFAULT_K,
+    growth_key: str = "perc_gross_sales_growth",
+    fallers: bool = False
+    ) -> list:
+    """
+    Returns the output records of the k entity-weeks with the highest growth
+    across the whole period, or the lowest when fallers=True, best first.
+    """
+    if k <= 0:
+        return []
+
+    return _records(descriptor, entities, _select(
+        descriptor, entities, k, growth_key, fallers).get(None, []))
+
+
+def top_movers_per_week(
+    descriptor: EntityDescriptor,
+    entities: dict,
+    k: int = DEFAULT_K,
+    growth_key: str = "perc_gross_sales_growth",
+    fallers: bool = False
+    ) -> dict:
+    """
+    Returns week commencing date (ISO) -> the top k records of that week.
+    A week is dated by its current period, or its previous period if no
+    entity has current data for it, and weeks are ordered as in results.json.
+    """
+    if k <= 0:
+        return {}
+
+    weeks = []
+    for entries in _select(
+            descriptor, entities, k, growth_key, fallers, per_week=True).values():
+        records = _records(descriptor, entities, entries)
+        current_dates = [record["current_week_commencing_date"] for record in records
+                         if record["current_week_commencing_date"] is not None]
+
+        if current_dates:
+            weeks.append((False, current_dates[0], records))
+        else:
+            weeks.append((True, records[0]["previous_week_commencing_date"], records))
+
+    weeks.sort(key=lambda week: week[:2])
+    return {week_date: records for _, week_date, records in weeks}
+
+
+def top_movers_per_parent(
+    descriptor: EntityDescriptor,
+    entities: dict,
+    parents: dict,
+    k: int = DEFAULT_K,
+    growth_key: str = "perc_gross_sales_growth",
+    fallers: bool = False
+    ) -> dict:
+    """
+    Returns parent name -> the top k records among that parent's entities,
+    e.g. each brand's top products. `parents` maps entity ids to
+    (parent id, parent name), as in Rollup.parents and read_parents.
+    """
+    if k <= 0:
+        return {}
+
+    groups = _select(descriptor, entities, k, growth_key, fallers, parents=parents)
+    return {
+        parent_name: _records(descriptor, entities, groups[parent_name])
+        for parent_name in sorted(groups)
+    }
+
+
+def main(argv: list = None):
+    """
+    Print the top movers of a sales csv file as json.
+    """
+    parser = argparse.ArgumentParser(description="Print the biggest growth risers or fallers.")
+    parser.add_argument('--brand-csv', default=DATA_FOLDER_PATH / Path("sales_brand.csv"))
+    parser.add_argument('--product-csv', default=DATA_FOLDER_PATH / Path("sales_product.csv"))
+    parser.add_argument('--section', choices=[PRODUCT.section, BRAND.section],
+                        default=PRODUCT.section, type=str.upper)
+    parser.add_argument('-k', type=int, default=DEFAULT_K)
+    parser.add_argument('--growth', choices=['gross_sales', 'units_sold'], default='gross_sales')
+    parser.add_argument('--fallers', action='store_true')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--per-week', action='store_true')
+    group.add_argument('--per-brand', action='store_true',
+                       help="top products of each brand; the product csv must have "
+                            "brand_id and brand columns")
+    args = parser.parse_args(argv)
+
+    growth_key = "perc_gross_sales_growth" if args.growth == 'gross_sales' \
+        else "perc_unit_sales_growth"
+
+    if args.per_brand or args.section == PRODUCT.section:
+        descriptor, csv_filename = PRODUCT, args.product_csv
+    else:
+        descriptor, csv_filename = BRAND, args.brand_csv
+    entities = aggregate_sales_csv(csv_filename, descriptor)[descriptor.section]
+
+    if args.per_brand:
+        movers = top_movers_per_parent(
+            descriptor, entities, read_parents(csv_filename, descriptor, BRAND),
+            args.k, growth_key, args.fallers)
+    elif args.per_week:
+        movers = top_movers_per_week(descriptor, entities, args.k, growth_key, args.fallers)
+    else:
+        movers = top_movers(descriptor, entities, args.k, growth_key, args.fallers)
+
+    json.dump(movers, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == "__main__":
+    main()
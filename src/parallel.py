@@ -0,0 +1,181 @@
+"""
+Multi-process parsing of large sales csv files.
+The file is split into byte ranges on line boundaries, each range is parsed
+in a process pool and the partial per-entity, per-week results are merged in
+file order so the outcome matches the serial parsers exactly. Workers send
+their results back packed into tuples, which pickle several times faster
+than WeeklyData objects, and each is merged as soon as it arrives.
+
+Loading, unpacking and merging the chunks is serial work in the parent, so by
+Amdahl's law it bounds the speedup whatever the number of workers. With the
+garbage collector paused for it, it takes about a ninth as long as the
+serial parse (0.45s against 4s for 1M product rows), for a bound of about 9x;
+it was a third, a bound of 3x, with the collector running. Near-linear scaling
+past a handful of workers would need the parent to build fewer objects.
+
+Assumes no quoted field contains a newline, which holds for the sales schema.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import io
+import os
+from typing import Iterable
+
+from src.entities import (
+    BRAND, PRODUCT, EntityDescriptor, add_sales_rows, merge_weekly_data, pack_entities,
+    paused_gc, unpack_entities)
+from src.reader import MalformedRowError, iter_sales_rows, line_blocks
+
+
+def chunk_offsets(csv_filename: str, chunks: int) -> list:
+    """
+    Split the body of a csv file into at most `chunks` (start, end) byte ranges.
+    Every range starts at the beginning of a line and ends just after a newline
+    (or at the end of the file), so no row is split between two ranges.
+    """
+    file_size = os.path.getsize(csv_filename)
+
+    with open(csv_filename, mode='rb') as file:
+        file.readline()
+        body_start = file.tell()
+
+        boundaries = [body_start]
+        for index in range(1, chunks):
+            offset = body_start + (file_size - body_start) * index // chunks
+            if offset <= boundaries[-1]:
+                continue
+
+            # move forward to the start of the next line
+            file.seek(offset - 1)
+            file.readline()
+            boundary = file.tell()
+
+            if boundaries[-1] < boundary < file_size:
+                boundaries.append(boundary)
+
+        boundaries.append(file_size)
+
+    return [
+        (start, end) for start, end in zip(boundaries[:-1], boundaries[1:]) if end > start
+    ]
+
+
+def _parse_chunk(task: tuple) -> dict:
+    """
+    Parse the rows in one byte range into the same structure as the serial
+    parsers.
+    """
+    csv_filename, start, end, descriptor = task
+
+    with open(csv_filename, mode='rb') as file:
+        header = next(csv.reader([file.readline().decode('utf-8')]))
+        file.seek(start)
+        text = file.read(end - start).decode('utf-8')
+
+    rows = iter_sales_rows(line_blocks(io.StringIO(text, newline='')), header,
+                           descriptor.id_column, descriptor.name_column, str(csv_filename))
+
+    try:
+        return add_sales_rows({}, descriptor, rows)
+    except MalformedRowError as error:
+        # line numbers were counted from the chunk; only count the lines before it on failure
+        raise MalformedRowError(
+            error.source, error.line_number - 2 + _line_number_at(csv_filename, start),
+            error.reason) from error
+
+
+def _parse_chunk_packed(task: tuple) -> list:
+    """
+    Parse one byte range, packed by pack_entities. Runs inside a worker process.
+    """
+    return pack_entities(_parse_chunk(task))
+
+
+def _line_number_at(csv_filename: str, offset: int) -> int:
+    """
+    Returns the line number of the line starting at a byte offset.
+    """
+    newlines = 0
+
+    with open(csv_filename, mode='rb') as file:
+        while offset > 0:
+            block = file.read(min(1024 * 1024, offset))
+            if not block:
+                break
+            newlines += block.count(b'\n')
+            offset -= len(block)
+
+    return newlines + 1
+
+
+def merge_partial_results(partials: Iterable[dict]) -> dict:
+    """
+    Merge per-chunk results, given in file order, into a single dict.
+    The first chunk to see an entity supplies its id and later chunks
+    overwrite any period they also contain, as a single serial pass would.
+    """
+    merged = {}
+
+    for partial in partials:
+        for entity_name, entity in partial.items():
+
+            if entity_name not in merged:
+                merged[entity_name] = entity
+                continue
+
+            merge_weekly_data(merged[entity_name]['weekly_data'], entity['weekly_data'])
+
+    return merged
+
+
+def parse_csv_parallel(
+    csv_filename: str,
+    descriptor: EntityDescriptor,
+    workers: int = None,
+    chunks: int = None
+    ) -> dict:
+    """
+    Parallel equivalent of src.entities.aggregate_sales_csv for a single
+    entity level, returning the parsed csv dict.
+    """
+    workers = workers or os.cpu_count() or 1
+    # a few chunks per worker evens out uneven row lengths
+    chunks = chunks or workers * 4
+
+    tasks = [
+        (str(csv_filename), start, end, descriptor)
+        for start, end in chunk_offsets(csv_filename, chunks)
+    ]
+
+    if workers == 1 or len(tasks) <= 1:
+        return merge_partial_results(_parse_chunk(task) for task in tasks)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor, paused_gc():
+        # map yields results in submission order, keeping the merge deterministic,
+        # and merging each as it arrives overlaps with the chunks still being parsed
+        return merge_partial_results(
+            unpack_entities(packed, descriptor)
+            for packed in executor.map(_parse_chunk_packed, tasks))
+
+
+def parse_sales_brand_csv_parallel(
+    csv_filename: str,
+    workers: int = None,
+    chunks: int = None
+    ) -> dict:
+    """
+    Parallel equivalent of parse_sales_brand_csv.
+    """
+    return parse_csv_parallel(csv_filename, BRAND, workers, chunks)
+
+
+def parse_sales_product_csv_parallel(
+    csv_filename: str,
+    workers: int = None,
+    chunks: int = None
+    ) -> dict:
+    """
+    Parallel equivalent of parse_sales_product_csv.
+    """
+    return parse_csv_parallel(csv_filename, PRODUCT, workers, chunks)
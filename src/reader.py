@@ -0,0 +1,165 @@
+"""
+A positional, typed reader for the fixed sales csv schema.
+Column positions are resolved once from the header, and the file is read in
+large blocks of lines that are split with str.split unless they hold quoted
+fields, rather than building a dict per row with csv.DictReader. Rows come out
+as tuples of (entity id, entity name, period id, period name, raw week
+commencing date, gross sales in integer pence, units sold), then any extra
+columns as strings.
+
+Line numbers in errors assume no quoted field spans lines, which holds for
+the sales schema.
+"""
+
+import csv
+from typing import Iterable, Iterator, TextIO
+
+from src.money import parse_pence
+
+
+READ_BUFFER_SIZE = 1024 * 1024
+
+
+class MalformedRowError(ValueError):
+    """
+    A csv row that does not fit the sales schema.
+    """
+
+    def __init__(self, source: str, line_number: int, reason: str):
+        super().__init__(f"{source}, line {line_number}: {reason}")
+        self.source = source
+        self.line_number = line_number
+        self.reason = reason
+
+    def __reduce__(self):
+        # so errors raised in worker processes can be sent back
+        return (self.__class__, (self.source, self.line_number, self.reason))
+
+
+def column_indices(header: list, id_column: str, name_column: str, extra_columns=(),
+                   source: str = '<csv>') -> tuple:
+    """
+    Returns the positions of the schema columns, then any extra columns, in a header.
+    """
+    columns = (id_column, name_column, 'period_id', 'period_name',
+               'week_commencing_date', 'gross_sales', 'units_sold', *extra_columns)
+    missing = [column for column in columns if column not in header]
+    if missing:
+        raise MalformedRowError(source, 1, f"missing column(s) {', '.join(missing)}.")
+
+    return tuple(header.index(column) for column in columns)
+
+
+def line_blocks(file: TextIO) -> Iterator[list]:
+    """
+    Read a text file opened with newline='' in large blocks, yielding each
+    block as a list of complete lines without their line endings.
+    """
+    rest = ''
+
+    while True:
+        block = file.read(READ_BUFFER_SIZE)
+        if not block:
+            if rest:
+                yield [rest.rstrip('\r')]
+            return
+
+        block = rest + block
+        end = block.rfind('\n') + 1
+        if not end:
+            rest = block
+            continue
+
+        rest = block[end:]
+        yield split_lines(block[:end])
+
+
+def split_lines(text: str) -> list:
+    """
+    Split text ending in a newline into its lines, without line endings.
+    """
+    if '\r' in text:
+        text = text.replace('\r\n', '\n')
+    return text[:-1].split('\n')
+
+
+def iter_sales_rows(
+    blocks: Iterable[list],
+    header: list,
+    id_column: str,
+    name_column: str,
+    source: str = '<csv>',
+    extra_columns: Iterable[str] = (),
+    first_line: int = 2
+    ) -> Iterator[tuple]:
+    """
+    Yield typed row tuples from blocks of csv lines, as read by line_blocks
+    after the header. first_line is the line number of the first line.
+    """
+    (id_index, name_index, period_id_index, period_name_index, date_index,
+     gross_sales_index, units_sold_index, *extra_indices) = column_indices(
+         header, id_column, name_column, tuple(extra_columns), source)
+    width = len(header)
+    line_number = first_line
+
+    for lines in blocks:
+        # only blocks with quoted fields need the csv module
+        if any('"' in line for line in lines):
+            rows = csv.reader(lines)
+        else:
+            rows = map(str.split, lines, [','] * len(lines))
+
+        for line_number, row in enumerate(rows, line_number):
+            if len(row) != width:
+                # skip blank lines, as csv.DictReader does
+                if not row or row == ['']:
+                    continue
+                raise MalformedRowError(
+                    source, line_number, f"expected {width} fields, found {len(row)}.")
+
+            gross_sales = row[gross_sales_index]
+            try:
+                typed_row = (
+                    int(row[id_index]), row[name_index], int(row[period_id_index]),
+                    row[period_name_index], row[date_index],
+                    # parse_pence's common cases, pounds and pence or one decimal place, inlined
+                    int(gross_sales.replace('.', '', 1)) if gross_sales[-3:-2] == '.'
+                    else int(gross_sales.replace('.', '', 1)) * 10 if gross_sales[-2:-1] == '.'
+                    else parse_pence(gross_sales),
+                    int(row[units_sold_index]))
+            except ValueError as error:
+                raise MalformedRowError(source, line_number, str(error)) from error
+
+            if extra_indices:
+                typed_row += tuple(row[index] for index in extra_indices)
+
+            yield typed_row
+
+        line_number += 1
+
+
+def read_header(csv_filename: str) -> list:
+    """
+    Returns the header row of a csv file.
+    """
+    with open(csv_filename, mode='r', encoding='utf-8', newline='') as file:
+        return next(csv.reader(file), [])
+
+
+def read_sales_csv(
+    csv_filename: str,
+    id_column: str,
+    name_column: str,
+    extra_columns: Iterable[str] = ()
+    ) -> Iterator[tuple]:
+    """
+    Yield typed row tuples from a sales_brand or sales_product csv file.
+    """
+    with open(csv_filename, mode='r', encoding='utf-8', newline='') as file:
+        header_line = file.readline()
+        if not header_line:
+            return
+        header = next(csv.reader([header_line]), [])
+
+        yield from iter_sales_rows(
+            line_blocks(file), header, id_column, name_column, str(csv_filename), extra_columns)
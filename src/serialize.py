@@ -0,0 +1,231 @@
+"""
+Fast serialisation of growth records.
+Records are encoded straight to text, computing each field once, and written
+to a buffered stream section by section. The default encoding is byte-for-byte
+what json.dump writes. The compact encoding drops the optional whitespace and
+escapes, and uses orjson when it is installed.
+
+Records can also be written as newline-delimited json, one record per line,
+and either format can be gzip or zstd compressed as it is written. zstd needs
+the zstandard package.
+"""
+
+from contextlib import contextmanager
+import importlib
+import io
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO
+
+from src.classes import WeeklyData
+
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+COMPRESSIONS = (None, 'gzip', 'zstd')
+DEFAULT_COMPRESSION_LEVELS = {'gzip': 6, 'zstd': 3}
+
+
+# optional dependencies, imported on first use to keep startup fast
+OPTIONAL_MODULES = ('orjson', 'zstandard')
+_optional_modules = {}
+
+
+def optional_module(name: str):
+    """
+    Returns an optional dependency, importing it on first use, or None if it
+    is not installed.
+    """
+    if name not in _optional_modules:
+        try:
+            _optional_modules[name] = importlib.import_module(name)
+        except ImportError:
+            _optional_modules[name] = None
+    return _optional_modules[name]
+
+
+def __getattr__(name: str):
+    # serialize.orjson and serialize.zstandard, resolved lazily
+    if name in OPTIONAL_MODULES:
+        return optional_module(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _float_text(value) -> str:
+    """
+    Encode a growth value exactly as json.dumps does.
+    """
+    if value is None:
+        return 'null'
+    if value.__class__ is float and value == value and value not in (
+            float('inf'), float('-inf')):
+        return float.__repr__(value)
+    return json.dumps(value)
+
+
+def _date_text(value) -> str:
+    """
+    Encode a week_commencement_date as a json iso date string.
+    """
+    if value is None:
+        return 'null'
+    return f'"{value.isoformat()}"'
+
+
+class RecordEncoder:
+    """
+    Encodes the records for one brand/product. The id and name part of the
+    record is encoded once per entity rather than once per week.
+    """
+
+    def __init__(self, id_key: str, entity_id: int, name_key: str, entity_name: str,
+                 compact: bool = False):
+        self.compact = compact
+        self._orjson = optional_module('orjson') if compact else None
+
+        if compact:
+            self._fields = {id_key: entity_id, name_key: entity_name}
+        else:
+            self._prefix = (
+                f'{{{json.dumps(id_key)}: {json.dumps(entity_id)}, '
+                f'{json.dumps(name_key)}: {json.dumps(entity_name)}, '
+                f'"current_week_commencing_date": '
+            )
+
+    def encode(self, weekly_data: WeeklyData) -> str:
+        """
+        Returns the encoded output record for one week.
+        """
+        current_date = weekly_data.current_week_commencement_date()
+        previous_date = weekly_data.previous_week_commencement_date()
+        gross_sales_growth = weekly_data.gross_sales_percentage_growth
+        units_sold_growth = weekly_data.units_sold_percentage_growth
+
+        if self.compact:
+            record = {
+                **self._fields,
+                "current_week_commencing_date":
+                current_date.isoformat() if current_date else None,
+                "previous_week_commencing_date":
+                previous_date.isoformat() if previous_date else None,
+                "perc_gross_sales_growth": gross_sales_growth,
+                "perc_unit_sales_growth": units_sold_growth
+            }
+            if self._orjson is not None:
+                return self._orjson.dumps(record).decode('utf-8')
+            return json.dumps(record, separators=(',', ':'), ensure_ascii=False)
+
+        return (
+            f'{self._prefix}{_date_text(current_date)}'
+            f', "previous_week_commencing_date": {_date_text(previous_date)}'
+            f', "perc_gross_sales_growth": {_float_text(gross_sales_growth)}'
+            f', "perc_unit_sales_growth": {_float_text(units_sold_growth)}}}'
+        )
+
+
+def write_document(outfile: TextIO, sections: dict, compact: bool = False) -> int:
+    """
+    Write a json object whose values are lists of already encoded records.
+    `sections` maps each key to an iterable of record strings, which are
+    consumed lazily. Returns the number of records written.
+    """
+    separator = ',' if compact else ', '
+    key_separator = ':' if compact else ': '
+    count = 0
+
+    outfile.write('{')
+
+    for position, (section, records) in enumerate(sections.items()):
+        if position:
+            outfile.write(separator)
+        outfile.write(f'{json.dumps(section)}{key_separator}[')
+
+        first = True
+        for record in records:
+            if not first:
+                outfile.write(separator)
+            outfile.write(record)
+            first = False
+            count += 1
+
+        outfile.write(']')
+
+    outfile.write('}')
+
+    return count
+
+
+def encode_records(records: Iterable[dict], compact: bool = False) -> Iterable[str]:
+    """
+    Encode already built record dicts, e.g. the lists returned by output_json.
+    """
+    if not compact:
+        return map(json.dumps, records)
+    orjson = optional_module('orjson')
+    if orjson is not None:
+        return (orjson.dumps(record).decode('utf-8') for record in records)
+    return (json.dumps(record, separators=(',', ':'), ensure_ascii=False)
+            for record in records)
+
+
+def write_ndjson(outfile: TextIO, sections: dict) -> int:
+    """
+    Write compact encoded records as newline-delimited json, adding a
+    "section" field to each so the lines can be split and streamed on their
+    own. Returns the number of records written.
+    """
+    count = 0
+
+    for section, records in sections.items():
+        prefix = f'{{"section":{json.dumps(section)},'
+        for record in records:
+            outfile.write(prefix)
+            # drop the record's own opening brace
+            outfile.write(record[1:])
+            outfile.write('\n')
+            count += 1
+
+    return count
+
+
+def open_output(path: str, compression: str = None, level: int = None) -> TextIO:
+    """
+    Open a buffered utf-8 text stream for writing output, compressing it with
+    gzip or zstd as it is written. level defaults to 6 for gzip and 3 for zstd.
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError("compression not recognised. Expected None, 'gzip' or 'zstd'.")
+
+    if compression is None:
+        return open(path, "w", encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+
+    if level is None:
+        level = DEFAULT_COMPRESSION_LEVELS[compression]
+
+    if compression == 'gzip':
+        import gzip
+        binary = gzip.open(path, "wb", compresslevel=level)
+    else:
+        zstandard = optional_module('zstandard')
+        if zstandard is None:
+            raise ImportError("zstd compression requires the zstandard package.")
+        binary = zstandard.ZstdCompressor(level=level).stream_writer(open(path, "wb"))
+
+    # buffer ahead of the compressor so it is fed large blocks
+    return io.TextIOWrapper(io.BufferedWriter(binary, WRITE_BUFFER_SIZE), encoding='utf-8')
+
+
+@contextmanager
+def replacing(path: Path) -> Iterator[Path]:
+    """
+    Yield a temporary path next to `path`, and move it over `path` only once
+    the block completes, so a failed write leaves any earlier file in place.
+    """
+    temp_path = path.with_name(path.name + '.tmp')
+    try:
+        yield temp_path
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    os.replace(temp_path.as_posix(), path.as_posix())
@@ -0,0 +1,296 @@
+"""
+A lightweight local HTTP service answering report queries on demand.
+The sales csv files are parsed and indexed once and held in memory,
+and each response is cached in a size-bounded LRU keyed on the query and the
+data version, so repeated queries never recompute or re-parse.
+
+    GET  /report?section=BRAND&name=Brand%20A&start=2022-07-01&end=2022-07-31
+    GET  /report?section=PRODUCT&id=60988638
+    POST /reload
+
+Responses have the same shape as results.json, restricted to the requested
+section(s) and records. start/end filter on the current week commencing date,
+or the previous one for weeks with no current data, and are inclusive.
+"""
+
+import argparse
+from collections import OrderedDict
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+import threading
+from urllib.parse import parse_qs, urlparse
+
+from src.entities import OUTPUT_SECTIONS
+from src.index import index_sales_csv
+from src.main import DATA_FOLDER_PATH, week_record
+
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache of bytes values, bounded by the
+    total size of the values rather than their count.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> bytes:
+        """
+        Returns the cached value for key, or None, marking it recently used.
+        """
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value: bytes):
+        """
+        Cache a value, evicting the least recently used entries to stay within
+        max_bytes. Values larger than the whole cache are not stored.
+        """
+        if len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._items:
+                self.current_bytes -= len(self._items.pop(key))
+
+            self._items[key] = value
+            self.current_bytes += len(value)
+
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class ReportData:
+    """
+    The parsed and indexed sales data served by the service.
+    Every reload increments `version`, so cached responses for older data
+    can no longer be hit.
+    """
+
+    def __init__(self, brand_csv_filename: str, product_csv_filename: str):
+        self.csv_filenames = {"PRODUCT": product_csv_filename, "BRAND": brand_csv_filename}
+        self.version = 0
+        self.indexes = {}
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> int:
+        """
+        Re-parse and re-index the csv files and bump the data version.
+        """
+        indexes = {
+            descriptor.section: index_sales_csv(
+                self.csv_filenames[descriptor.section], descriptor)
+            for descriptor in OUTPUT_SECTIONS
+        }
+
+        # swap everything in at once so queries never see a mix of versions
+        with self._lock:
+            self.indexes = indexes
+            self.version += 1
+
+        return self.version
+
+    def query(self, section: str = None, name: str = None, entity_id: int = None,
+              start: date = None, end: date = None) -> tuple:
+        """
+        Returns (data version, document) for a query, where the document has
+        the same shape as results.json.
+        """
+        with self._lock:
+            version, indexes = self.version, self.indexes
+
+        document = {}
+
+        for descriptor in OUTPUT_SECTIONS:
+            if section is not None and descriptor.section != section:
+                continue
+
+            index = indexes[descriptor.section]
+
+            if entity_id is not None:
+                entity = index.find(entity_id)
+                names = [] if entity is None else [entity[descriptor.name_key]]
+            elif name is not None:
+                names = [name] if index.entity(name) is not None else []
+            else:
+                names = index.names
+
+            records = []
+            for entity_name in names:
+                entity = index.entity(entity_name)
+                weekly_data = entity["weekly_data"]
+                records.extend(
+                    week_record(
+                        descriptor.id_key, entity[descriptor.id_key],
+                        descriptor.name_key, entity_name, weekly_data[week_key])
+                    for week_key in index.weeks_between(entity_name, start, end))
+
+            document[descriptor.section] = records
+
+        return version, document
+
+
+def parse_query(query_string: str) -> dict:
+    """
+    Validate a /report query string into keyword arguments for ReportData.query.
+    Raises ValueError for unknown or malformed parameters.
+    """
+    params = {key: values[-1] for key, values in parse_qs(query_string).items()}
+    unknown = set(params) - {'section', 'name', 'id', 'start', 'end'}
+    if unknown:
+        raise ValueError(f"unknown query parameter(s): {', '.join(sorted(unknown))}")
+
+    section = params.get('section')
+    if section is not None:
+        section = section.upper()
+        if section not in {descriptor.section for descriptor in OUTPUT_SECTIONS}:
+            raise ValueError("section not recognised. Expected 'PRODUCT' or 'BRAND'.")
+
+    if 'name' in params and 'id' in params:
+        raise ValueError("use either name or id, not both.")
+
+    return {
+        'section': section,
+        'name': params.get('name'),
+        'entity_id': int(params['id']) if 'id' in params else None,
+        'start': date.fromisoformat(params['start']) if 'start' in params else None,
+        'end': date.fromisoformat(params['end']) if 'end' in params else None
+    }
+
+
+class ReportService:
+    """
+    Answers report queries from in-memory data through the LRU response cache.
+    """
+
+    def __init__(self, data: ReportData, cache: LRUCache = None):
+        self.data = data
+        self.cache = cache or LRUCache()
+
+    def report(self, query_string: str) -> bytes:
+        """
+        Returns the json response body for a /report query string.
+        """
+        query = parse_query(query_string)
+        cache_key = (self.data.version, tuple(sorted(query.items(), key=lambda item: item[0])))
+
+        body = self.cache.get(cache_key)
+        if body is None:
+            version, document = self.data.query(**query)
+            body = json.dumps(document).encode('utf-8')
+            # key on the version the document was actually built from
+            self.cache.put((version, cache_key[1]), body)
+
+        return body
+
+
+def make_handler(service: ReportService):
+    """
+    Build a request handler class bound to a ReportService.
+    """
+
+    class ReportRequestHandler(BaseHTTPRequestHandler):
+        """
+        Routes /report and /reload requests to the service.
+        """
+
+        def _send(self, status: HTTPStatus, body: bytes):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            """
+            Serve a report query.
+            """
+            url = urlparse(self.path)
+            if url.path != '/report':
+                self._send(HTTPStatus.NOT_FOUND, b'{"error": "not found"}')
+                return
+
+            try:
+                body = service.report(url.query)
+            except ValueError as error:
+                self._send(HTTPStatus.BAD_REQUEST, json.dumps({"error": str(error)}).encode())
+                return
+
+            self._send(HTTPStatus.OK, body)
+
+        def do_POST(self):  # pylint: disable=invalid-name
+            """
+            Re-parse the csv files.
+            """
+            if urlparse(self.path).path != '/reload':
+                self._send(HTTPStatus.NOT_FOUND, b'{"error": "not found"}')
+                return
+
+            version = service.data.reload()
+            self._send(HTTPStatus.OK, json.dumps({"version": version}).encode())
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            # keep request logging out of the hot path
+            pass
+
+    return ReportRequestHandler
+
+
+def make_server(service: ReportService, host: str = '127.0.0.1',
+                port: int = 8000) -> ThreadingHTTPServer:
+    """
+    Create (but don't start) an HTTP server for the service. Port 0 picks a free port.
+    """
+    return ThreadingHTTPServer((host, port), make_handler(service))
+
+
+def main():
+    """
+    Parse the csv files and serve reports until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="Serve sales growth reports over HTTP.")
+    parser.add_argument('--brand-csv', default=DATA_FOLDER_PATH / Path("sales_brand.csv"))
+    parser.add_argument('--product-csv', default=DATA_FOLDER_PATH / Path("sales_product.csv"))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--cache-bytes', type=int, default=DEFAULT_CACHE_BYTES)
+    args = parser.parse_args()
+
+    service = ReportService(ReportData(args.brand_csv, args.product_csv),
+                            LRUCache(args.cache_bytes))
+    server = make_server(service, args.host, args.port)
+
+    print(f"serving reports on http://{args.host}:{server.server_address[1]}/report")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
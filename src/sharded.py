@@ -0,0 +1,217 @@
+"""
+Sharded output.
+Instead of one results.json, the records of each section are split across a
+fixed number of shard files by a stable hash of the entity name, and a
+manifest records which shard holds each entity and the byte range of its
+records. Clients fetch or memory-map just the range they need. Shards are
+written in parallel on a process pool, each worker given its shard's entities
+packed by pack_entities, since pickling WeeklyData objects one by one would
+cost the parent about as long as writing every shard itself.
+
+Each shard is a json list of records, in the same order and encoding as
+results.json. An entity's byte range covers its records and the ", " between
+them but not the surrounding brackets, so wrapping it in [ ] gives a json list.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import json
+import mmap
+import os
+from pathlib import Path
+import zlib
+
+from src.entities import BRAND, PRODUCT, pack_entities, unpack_entities
+from src.index import SalesIndex
+from src.main import OUTPUT_FOLDER_PATH
+from src.serialize import WRITE_BUFFER_SIZE, RecordEncoder, replacing
+
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+DEFAULT_SHARDS = 16
+
+SEPARATOR = b', '
+
+# parsed manifests by path, with the file identity they were parsed from
+_manifests = {}
+
+
+def shard_of(entity_name: str, shards: int) -> int:
+    """
+    Returns the shard for an entity. crc32 is stable across processes and
+    runs, unlike hash() on str.
+    """
+    return zlib.crc32(entity_name.encode('utf-8')) % shards
+
+
+def shard_filename(section: str, shard: int) -> str:
+    """
+    Returns the file name of one shard of a section.
+    """
+    return f"{section}-{shard:03d}.json"
+
+
+def _write_shard(task: tuple) -> dict:
+    """
+    Write one shard file. Returns entity name -> [offset, length, records].
+    """
+    shard_path, descriptor, entities = task
+    index = SalesIndex(descriptor, entities)
+    ranges = {}
+
+    with replacing(Path(shard_path)) as temp_path, \
+            open(temp_path, "wb", buffering=WRITE_BUFFER_SIZE) as outfile:
+        outfile.write(b'[')
+        offset = 1
+
+        for position, entity_name in enumerate(index.names):
+            entity = entities[entity_name]
+            weekly_data = entity["weekly_data"]
+            encoder = RecordEncoder(
+                descriptor.id_key, entity[descriptor.id_key],
+                descriptor.name_key, entity[descriptor.name_key])
+
+            if position:
+                outfile.write(SEPARATOR)
+                offset += len(SEPARATOR)
+
+            segment = SEPARATOR.join(
+                encoder.encode(weekly_data[week_key]).encode('utf-8')
+                for week_key in index.week_keys(entity_name))
+            outfile.write(segment)
+
+            ranges[entity_name] = [offset, len(segment), len(weekly_data)]
+            offset += len(segment)
+
+        outfile.write(b']')
+
+    return ranges
+
+
+def _write_packed_shard(task: tuple) -> dict:
+    """
+    _write_shard for a shard's entities packed by pack_entities.
+    Runs in a worker process.
+    """
+    shard_path, descriptor, packed = task
+    return _write_shard((shard_path, descriptor, unpack_entities(packed, descriptor)))
+
+
+def write_sharded_sections(
+    sections: list,
+    output_dirname: str = 'results',
+    shards: int = DEFAULT_SHARDS,
+    workers: int = None
+    ) -> dict:
+    """
+    Write sharded output for (EntityDescriptor, parsed csv dict) pairs into
+    a directory under the output folder, and its manifest. Returns the manifest.
+    """
+    output_path = OUTPUT_FOLDER_PATH / Path(output_dirname)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    tasks = []
+    for descriptor, entities in sections:
+        buckets = [{} for _ in range(shards)]
+        for entity_name, entity in entities.items():
+            buckets[shard_of(entity_name, shards)][entity_name] = entity
+
+        for shard, bucket in enumerate(buckets):
+            tasks.append((
+                (output_path / Path(shard_filename(descriptor.section, shard))).as_posix(),
+                descriptor, bucket))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [_write_shard(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_write_packed_shard, [
+                (shard_path, descriptor, pack_entities(bucket))
+                for shard_path, descriptor, bucket in tasks]))
+
+    manifest = {"version": MANIFEST_VERSION, "shards": shards, "sections": {}}
+    results = iter(results)
+
+    for descriptor, entities in sections:
+        section_entities = {}
+        for shard in range(shards):
+            for entity_name, (offset, length, records) in next(results).items():
+                section_entities[entity_name] = {
+                    descriptor.id_key: entities[entity_name][descriptor.id_key],
+                    "shard": shard_filename(descriptor.section, shard),
+                    "offset": offset,
+                    "length": length,
+                    "records": records
+                }
+
+        manifest["sections"][descriptor.section] = {
+            "id_key": descriptor.id_key,
+            "entities": dict(sorted(section_entities.items()))
+        }
+
+    # the manifest goes in last, so readers never see one pointing at missing shards
+    temp_path = output_path / Path(MANIFEST_FILENAME + ".tmp")
+    with open(temp_path.as_posix(), "w", encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(temp_path.as_posix(), (output_path / Path(MANIFEST_FILENAME)).as_posix())
+
+    # remove shards of an earlier write with more shards, now the manifest doesn't name them
+    shard_names = {task[0] for task in tasks}
+    for descriptor, _ in sections:
+        for shard_path in output_path.glob(f"{descriptor.section}-*.json"):
+            if shard_path.stem.rpartition('-')[2].isdigit() and \
+                    shard_path.as_posix() not in shard_names:
+                shard_path.unlink()
+
+    return manifest
+
+
+def write_sharded(
+    brand_data: dict,
+    product_data: dict,
+    output_dirname: str = 'results',
+    shards: int = DEFAULT_SHARDS,
+    workers: int = None
+    ) -> dict:
+    """
+    Sharded equivalent of write_json. Returns the manifest.
+    """
+    return write_sharded_sections(
+        [(PRODUCT, product_data), (BRAND, brand_data)], output_dirname, shards, workers)
+
+
+def load_manifest(output_path: str) -> dict:
+    """
+    Returns the manifest of sharded output. It is parsed once and kept until
+    the file changes, e.g. when the output is written again.
+    """
+    manifest_path = Path(output_path) / Path(MANIFEST_FILENAME)
+    stat = os.stat(manifest_path)
+    identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    cached = _manifests.get(manifest_path)
+    if cached is None or cached[0] != identity:
+        with open(manifest_path, encoding='utf-8') as manifest_file:
+            cached = _manifests[manifest_path] = (identity, json.load(manifest_file))
+
+    return cached[1]
+
+
+def read_entity_records(output_path: str, section: str, entity_name: str) -> list:
+    """
+    Read one brand/product's records from sharded output by memory-mapping
+    its shard, touching only the manifest and the entity's byte range.
+    Returns an empty list for unknown entities.
+    """
+    output_path = Path(output_path)
+    entry = load_manifest(output_path)["sections"][section]["entities"].get(entity_name)
+
+    if entry is None:
+        return []
+
+    with open(output_path / Path(entry["shard"]), "rb") as shard_file, \
+            mmap.mmap(shard_file.fileno(), 0, access=mmap.ACCESS_READ) as shard:
+        segment = shard[entry["offset"]:entry["offset"] + entry["length"]]
+
+    return json.loads(b'[' + segment + b']')
@@ -0,0 +1,265 @@
+"""
+Database source for the report, tested against SQLite.
+Instead of dumping the sales tables to csv and re-parsing them, the weekly
+current/previous pairing, the overwrite rules, the output ordering and the
+growth arithmetic are pushed down into one SQL query per section. Results are
+fetched in large batches through a reusable connection pool and written by
+the same output stage as write_json.
+
+Tables have the csv columns, with week_commencing_date stored as an ISO
+'YYYY-MM-DD' string. Rows with period names other than 'current' and
+'previous' are ignored. Gross sales are converted to integer pence and growth
+is computed in the query as whole hundredths of a percent, rounded half up as
+in src.money, so growth values are identical to the other engines.
+"""
+
+from contextlib import contextmanager
+from pathlib import Path
+import queue
+import sqlite3
+import threading
+from typing import Iterator
+
+from src.dates import decode_week_date
+from src.entities import BRAND, PRODUCT, EntityDescriptor
+from src.main import OUTPUT_FOLDER_PATH
+from src.money import GROWTH_SCALE, pence_to_pounds
+from src.reader import read_sales_csv
+from src.serialize import encode_records, open_output, replacing, write_document
+
+
+FETCH_BATCH_ROWS = 10000
+
+# section name -> table holding its rows
+DEFAULT_TABLES = {PRODUCT.section: "sales_product", BRAND.section: "sales_brand"}
+
+
+class ConnectionPool:
+    """
+    A fixed-size pool of DB-API connections, created on first use and
+    reused across queries. `connect` is a callable returning a new connection.
+    """
+
+    def __init__(self, connect, size: int = 4):
+        self._connect = connect
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._size = size
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_sqlite(cls, database: str, size: int = 4) -> 'ConnectionPool':
+        """
+        Returns a pool of connections to a SQLite database file.
+        """
+        return cls(lambda: sqlite3.connect(str(database), check_same_thread=False), size)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a with block, waiting for one
+        to be returned if the pool is exhausted.
+        """
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self._size
+                if create:
+                    self._created += 1
+            connection = self._connect() if create else self._idle.get()
+
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self):
+        """
+        Close every idle connection.
+        """
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _rounded_growth(change: str, previous: str) -> str:
+    """
+    SQL for money.percentage_growth in hundredths of a percent, given the
+    scaled change and the previous value: -10000 where there is no current
+    period and NULL where there is no previous period or it is zero.
+    """
+    return f"""CASE
+                WHEN current_week_date IS NULL THEN -{GROWTH_SCALE}
+                WHEN previous_week_date IS NULL OR {previous} = 0 THEN NULL
+                ELSE (2 * ABS({change}) + ABS({previous})) / (2 * ABS({previous}))
+                    * CASE WHEN ({change} < 0) <> ({previous} < 0) THEN -1 ELSE 1 END
+            END"""
+
+
+def growth_query(descriptor: EntityDescriptor, table: str, order_column: str = 'rowid') -> str:
+    """
+    Returns the query producing one row per entity-week, in output order:
+    (entity id, entity name, current date, previous date, gross sales growth
+    and units sold growth in hundredths of a percent, previous gross sales is
+    zero, previous units sold is zero). `order_column` is a unique column giving
+    the order rows were written in, which decides the entity id and which
+    duplicate row wins.
+    """
+    table = _quote(table)
+    entity_id = _quote(descriptor.id_column)
+    name = _quote(descriptor.name_column)
+    order = _quote(order_column) if order_column != 'rowid' else 'rowid'
+
+    return f"""
+        WITH newest AS (
+            SELECT MAX({order}) AS row_order FROM {table}
+            WHERE period_name IN ('current', 'previous')
+            GROUP BY {name}, strftime('%d/%m', week_commencing_date), period_name
+        ),
+        periods AS (
+            SELECT {name} AS name, strftime('%d/%m', week_commencing_date) AS week_key,
+                period_name, week_commencing_date AS week_date,
+                CAST(ROUND(gross_sales * 100) AS INTEGER) AS gross_sales,
+                CAST(units_sold AS INTEGER) AS units_sold
+            FROM newest JOIN {table} ON {table}.{order} = newest.row_order
+        ),
+        weeks AS (
+            SELECT name,
+                MAX(CASE WHEN period_name = 'current' THEN week_date END) AS current_week_date,
+                MAX(CASE WHEN period_name = 'current' THEN gross_sales END) AS current_gross,
+                MAX(CASE WHEN period_name = 'current' THEN units_sold END) AS current_units,
+                MAX(CASE WHEN period_name = 'previous' THEN week_date END) AS previous_week_date,
+                MAX(CASE WHEN period_name = 'previous' THEN gross_sales END) AS previous_gross,
+                MAX(CASE WHEN period_name = 'previous' THEN units_sold END) AS previous_units
+            FROM periods
+            GROUP BY name, week_key
+        ),
+        ids AS (
+            SELECT {name} AS name, {entity_id} AS entity_id
+            FROM (SELECT MIN({order}) AS row_order FROM {table} GROUP BY {name}) AS first
+            JOIN {table} ON {table}.{order} = first.row_order
+        ),
+        changes AS (
+            SELECT name, current_week_date, previous_week_date,
+                (current_gross - previous_gross) * {GROWTH_SCALE} AS gross_change,
+                previous_gross,
+                (current_units - previous_units) * {GROWTH_SCALE} AS units_change,
+                previous_units
+            FROM weeks
+        )
+        SELECT ids.entity_id, changes.name, current_week_date, previous_week_date,
+            {_rounded_growth('gross_change', 'previous_gross')},
+            {_rounded_growth('units_change', 'previous_units')},
+            current_week_date IS NOT NULL AND previous_gross = 0,
+            current_week_date IS NOT NULL AND previous_units = 0
+        FROM changes JOIN ids ON ids.name = changes.name
+        ORDER BY changes.name, current_week_date IS NULL,
+            COALESCE(current_week_date, previous_week_date)
+    """
+
+
+def iter_growth_records(
+    pool: ConnectionPool,
+    descriptor: EntityDescriptor,
+    table: str,
+    batch_rows: int = FETCH_BATCH_ROWS,
+    order_column: str = 'rowid'
+    ) -> Iterator[dict]:
+    """
+    Yield the output records for one section, fetching `batch_rows` at a time.
+    """
+    id_key, name_key = descriptor.id_key, descriptor.name_key
+
+    with pool.connection() as connection:
+        cursor = connection.cursor()
+        cursor.arraysize = batch_rows
+        cursor.execute(growth_query(descriptor, table, order_column))
+
+        try:
+            while True:
+                batch = cursor.fetchmany()
+                if not batch:
+                    return
+
+                for (entity_id, entity_name, current_date, previous_date, gross_sales_growth,
+                     units_sold_growth, zero_gross_sales, zero_units_sold) in batch:
+                    if zero_gross_sales or zero_units_sold:
+                        raise ZeroDivisionError("division by zero")
+
+                    yield {
+                        id_key: entity_id,
+                        name_key: entity_name,
+                        "current_week_commencing_date": current_date,
+                        "previous_week_commencing_date": previous_date,
+                        "perc_gross_sales_growth":
+                        None if gross_sales_growth is None else gross_sales_growth / 100,
+                        "perc_unit_sales_growth":
+                        None if units_sold_growth is None else units_sold_growth / 100
+                    }
+        finally:
+            cursor.close()
+
+
+def write_json_from_sql(
+    pool: ConnectionPool,
+    output_filename: str = 'results.json',
+    tables: dict = None,
+    batch_rows: int = FETCH_BATCH_ROWS,
+    compact: bool = False
+    ) -> int:
+    """
+    Write the same json file as write_json straight from the sales tables.
+    `tables` maps section names to table names. Returns the number of records.
+    The file is only replaced once every record has been written.
+    """
+    tables = tables or DEFAULT_TABLES
+
+    json_file_path = OUTPUT_FOLDER_PATH / Path(output_filename)
+    json_file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with replacing(json_file_path) as temp_path, open_output(temp_path.as_posix()) as outfile:
+        return write_document(outfile, {
+            descriptor.section: encode_records(iter_growth_records(
+                pool, descriptor, tables[descriptor.section], batch_rows), compact)
+            for descriptor in (PRODUCT, BRAND)
+        }, compact)
+
+
+def load_sales_csv_into_sqlite(
+    csv_filename: str,
+    connection: sqlite3.Connection,
+    descriptor: EntityDescriptor,
+    table: str
+    ) -> int:
+    """
+    Create a sales table from a csv file, with ISO dates, in file order.
+    Used for tests and benchmarks. Returns the number of rows loaded.
+    """
+    quoted_table = _quote(table)
+    connection.execute(f"DROP TABLE IF EXISTS {quoted_table}")
+    connection.execute(
+        f"CREATE TABLE {quoted_table} (period_id INTEGER, period_name TEXT, "
+        f"week_commencing_date TEXT, {_quote(descriptor.id_column)} INTEGER, "
+        f"{_quote(descriptor.name_column)} TEXT, gross_sales REAL, units_sold INTEGER)")
+
+    rows = (
+        (period_id, period_name, decode_week_date(raw_date)[0].isoformat(), entity_id,
+         entity_name, pence_to_pounds(gross_pence), units_sold)
+        for (entity_id, entity_name, period_id, period_name, raw_date, gross_pence, units_sold)
+        in read_sales_csv(csv_filename, descriptor.id_column, descriptor.name_column)
+    )
+
+    cursor = connection.executemany(
+        f"INSERT INTO {quoted_table} (period_id, period_name, week_commencing_date, "
+        f"{_quote(descriptor.id_column)}, {_quote(descriptor.name_column)}, gross_sales, "
+        f"units_sold) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    connection.commit()
+
+    return cursor.rowcount
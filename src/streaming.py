@@ -0,0 +1,98 @@
+"""
+Streaming, constant-memory report generation for sales csv files that are
+already sorted by entity name. Only one brand/product's weeks are held in
+memory at a time and records are written to results.json as they are produced.
+Unsorted files are first put in order by the external merge sort in
+src.extsort, within a memory budget.
+"""
+
+from pathlib import Path
+from typing import Iterator
+
+from src.entities import BRAND, PRODUCT, EntityDescriptor, add_sales_rows
+from src.main import OUTPUT_FOLDER_PATH, encode_section
+from src.extsort import DEFAULT_MEMORY_BUDGET, read_sorted_sales_csv
+from src.reader import read_sales_csv
+from src.serialize import WRITE_BUFFER_SIZE, replacing, write_document
+
+
+def iter_entity_groups(
+    csv_filename: str,
+    descriptor: EntityDescriptor,
+    presorted: bool = True,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET
+    ) -> Iterator[dict]:
+    """
+    Yield a parsed csv dict holding just one entity for each contiguous run of
+    rows belonging to that entity. With presorted=True the file must be
+    sorted by entity name, and a name that is out of order or reappears later
+    raises a ValueError; otherwise it is sorted externally within memory_budget bytes.
+    """
+
+    entity_name = None
+    rows = []
+
+    if presorted:
+        sales_rows = read_sales_csv(csv_filename, descriptor.id_column, descriptor.name_column)
+    else:
+        sales_rows = read_sorted_sales_csv(
+            csv_filename, descriptor.id_column, descriptor.name_column, memory_budget)
+
+    for row in sales_rows:
+
+        row_name = row[1]
+
+        if row_name != entity_name:
+            if entity_name is not None:
+                if row_name < entity_name:
+                    raise ValueError(
+                        f"{csv_filename} is not sorted by {descriptor.name_column}: "
+                        f"'{row_name}' found after '{entity_name}'.")
+                yield add_sales_rows({}, descriptor, rows)
+
+            entity_name = row_name
+            rows = []
+
+        rows.append(row)
+
+    if entity_name is not None:
+        yield add_sales_rows({}, descriptor, rows)
+
+
+def _encoded_records(
+    csv_filename: str,
+    descriptor: EntityDescriptor,
+    presorted: bool,
+    memory_budget: int
+    ) -> Iterator[str]:
+    for group in iter_entity_groups(csv_filename, descriptor, presorted, memory_budget):
+        yield from encode_section(descriptor, group)
+
+
+def stream_output_json(
+    brand_csv_filename: str,
+    product_csv_filename: str,
+    output_filename: str = 'results.json',
+    presorted: bool = True,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET
+    ) -> int:
+    """
+    Stream sorted sales_brand and sales_product csv files straight into a json
+    file identical to the one output_json writes. Returns the number of records.
+    With presorted=False the files may be in any order and are sorted
+    externally first, holding about memory_budget bytes of rows at a time.
+    The order is checked as the rows stream through, so the output is written
+    to a temporary file and only replaces results.json once both files have
+    been read in order.
+    """
+    json_file_path = OUTPUT_FOLDER_PATH / Path(output_filename)
+    json_file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with replacing(json_file_path) as temp_path, \
+            open(temp_path.as_posix(), "w", encoding='utf-8',
+                 buffering=WRITE_BUFFER_SIZE) as outfile:
+        return write_document(outfile, {
+            PRODUCT.section: _encoded_records(
+                product_csv_filename, PRODUCT, presorted, memory_budget),
+            BRAND.section: _encoded_records(brand_csv_filename, BRAND, presorted, memory_budget)
+        })
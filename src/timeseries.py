@@ -0,0 +1,216 @@
+"""
+A NumPy time-series growth engine for N-period sales history.
+Each entity's weekly values are stored as contiguous, date-ordered arrays, and
+growth is computed for every entity-week at once: single weeks are paired by
+vectorised date shifts and rolling windows are totalled from cumulative sums,
+rather than comparing pairs one at a time. Rows are placed by their week
+commencing date, so any number of periods/years can be loaded.
+
+The existing two-period output is the special case window=1, lag=LAG_YEAR:
+each week is compared with the week on the same day and month a year before,
+which is how WeeklyData pairs its current and previous periods. As there,
+a week commencing on 29 February has no earlier week to compare with.
+"""
+
+import numpy as np
+
+from src.columnar import _last_occurrence, _percentage_change, load_sales_csv
+from src.entities import EntityDescriptor
+
+
+# compare with the same day and month one year earlier
+LAG_YEAR = 'year'
+
+# spacing between entities in the combined (entity, day) keys, far wider than
+# any range of dates, so a date shift can never land in another entity
+ENTITY_KEY_STRIDE = 1 << 32
+
+# measure name -> (window in weeks, lag in weeks or LAG_YEAR)
+DEFAULT_MEASURES = {
+    "yoy": (1, LAG_YEAR),
+    "wow": (1, 1),
+    "rolling_4_week": (4, 4),
+    "rolling_13_week": (13, 13)
+}
+
+GROWTH_FIELDS = {
+    "gross_sales": "perc_gross_sales_growth",
+    "units_sold": "perc_unit_sales_growth"
+}
+
+
+class SalesSeries:
+    """
+    Weekly sales for every entity of one level, as flat arrays sorted by
+    entity then date. Entity i's weeks are rows offsets[i]:offsets[i + 1].
+    Gross sales are int64 pence, so window totals are exact.
+    """
+
+    def __init__(
+        self,
+        descriptor: EntityDescriptor,
+        names: np.ndarray,
+        ids: np.ndarray,
+        offsets: np.ndarray,
+        dates: np.ndarray,
+        gross_sales: np.ndarray,
+        units_sold: np.ndarray
+    ):
+        self.descriptor = descriptor
+        self.names = names
+        self.ids = ids
+        self.offsets = offsets
+        self.dates = dates
+        self.gross_sales = gross_sales
+        self.units_sold = units_sold
+
+        entity_codes = np.repeat(np.arange(len(names), dtype=np.int64), np.diff(offsets))
+        self.keys = entity_codes * ENTITY_KEY_STRIDE + dates.astype(np.int64)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def entity(self, entity_name: str) -> dict:
+        """
+        Returns views of one entity's dates and values, or None.
+        """
+        position = np.searchsorted(self.names, entity_name)
+        if position == len(self.names) or self.names[position] != entity_name:
+            return None
+
+        rows = slice(self.offsets[position], self.offsets[position + 1])
+        return {
+            self.descriptor.id_key: int(self.ids[position]),
+            self.descriptor.name_key: entity_name,
+            "dates": self.dates[rows],
+            "gross_sales": self.gross_sales[rows],
+            "units_sold": self.units_sold[rows]
+        }
+
+
+def load_sales_series(csv_filename: str, descriptor: EntityDescriptor) -> SalesSeries:
+    """
+    Load a sales csv file with any number of periods into a SalesSeries.
+    A later row for the same entity and date overwrites an earlier one, and an
+    entity's id is taken from its first row, as with the other engines.
+    """
+    columns = load_sales_csv(
+        csv_filename, descriptor.id_column, descriptor.name_column, check_periods=False)
+
+    keys = columns.name_codes * ENTITY_KEY_STRIDE + columns.week_dates.astype(np.int64)
+    unique_keys, groups = np.unique(keys, return_inverse=True)
+    rows = _last_occurrence(groups, len(unique_keys))
+
+    _, first_rows = np.unique(columns.name_codes, return_index=True)
+    entity_codes = unique_keys // ENTITY_KEY_STRIDE
+
+    return SalesSeries(
+        descriptor=descriptor,
+        names=columns.names,
+        ids=columns.ids[first_rows],
+        offsets=np.searchsorted(entity_codes, np.arange(len(columns.names) + 1)),
+        dates=columns.week_dates[rows],
+        gross_sales=columns.gross_sales[rows],
+        units_sold=columns.units_sold[rows]
+    )
+
+
+def _lagged_dates(dates: np.ndarray, lag) -> np.ndarray:
+    """
+    Shift dates back by `lag` weeks, or to the same day and month a year
+    earlier for LAG_YEAR (29 February maps to 1 March, but window_totals
+    leaves it unpaired).
+    """
+    if lag == LAG_YEAR:
+        months = dates.astype('datetime64[M]')
+        return (months - np.timedelta64(12, 'M')).astype('datetime64[D]') + (dates - months)
+    return dates - np.timedelta64(7 * lag, 'D')
+
+
+def _is_leap_day(dates: np.ndarray) -> np.ndarray:
+    months = dates.astype('datetime64[M]')
+    return (dates - months == np.timedelta64(28, 'D')) & (months.astype(np.int64) % 12 == 1)
+
+
+def window_totals(series: SalesSeries, field: str, window: int = 1, lag=0) -> tuple:
+    """
+    Total `field` over the `window` weeks ending at each row's date, shifted
+    back by `lag`: the rows of the same entity dated within
+    (end - window weeks, end]. Returns (totals, row counts) arrays. With
+    LAG_YEAR, rows dated 29 February have no earlier window, so count none.
+    """
+    values = getattr(series, field)
+    end_keys = series.keys if not lag else \
+        series.keys - series.dates.astype(np.int64) + \
+        _lagged_dates(series.dates, lag).astype(np.int64)
+
+    if window == 1:
+        # a single week is a direct lookup rather than a difference of cumulative sums
+        positions = np.searchsorted(series.keys, end_keys)
+        found = positions < len(series.keys)
+        found[found] = series.keys[positions[found]] == end_keys[found]
+        totals = np.where(found, values[np.minimum(positions, len(values) - 1)], 0) \
+            if len(values) else values.copy()
+        counts = found.astype(np.int64)
+    else:
+        cumulative = np.concatenate(([0], np.cumsum(values)))
+        high = np.searchsorted(series.keys, end_keys, side='right')
+        low = np.searchsorted(series.keys, end_keys - 7 * window, side='right')
+        totals, counts = cumulative[high] - cumulative[low], high - low
+
+    if lag == LAG_YEAR:
+        # as in WeeklyData, whose week keys pair 29/02 with no earlier year
+        unpaired = _is_leap_day(series.dates)
+        totals = np.where(unpaired, 0, totals)
+        counts = np.where(unpaired, 0, counts)
+
+    return totals, counts
+
+
+def growth(series: SalesSeries, field: str, window: int = 1, lag=LAG_YEAR) -> list:
+    """
+    Percentage growth of `field` for every row: the window ending at the row
+    compared with the same window `lag` earlier. Values are rounded as in
+    results.json. Only complete windows are compared, so growth is None
+    unless both windows have a row for every week, and None where the
+    earlier total is zero.
+    """
+    current, current_counts = window_totals(series, field, window)
+    previous, previous_counts = window_totals(series, field, window, lag)
+    comparable = (current_counts == window) & (previous_counts == window) & (previous != 0)
+
+    return _percentage_change(
+        current, previous, np.ones(len(series), dtype=bool), comparable)
+
+
+def series_records(series: SalesSeries, measures: dict = None) -> list:
+    """
+    Returns one record per entity-week, ordered by entity name then date, with
+    the growth of gross sales and units sold for each measure, e.g.
+    "perc_gross_sales_growth_yoy" for the "yoy" measure.
+    """
+    measures = DEFAULT_MEASURES if measures is None else measures
+    descriptor = series.descriptor
+
+    columns = {}
+    for measure, (window, lag) in measures.items():
+        for field, prefix in GROWTH_FIELDS.items():
+            columns[f"{prefix}_{measure}"] = growth(series, field, window, lag)
+
+    entity_codes = np.repeat(np.arange(len(series.names)), np.diff(series.offsets)).tolist()
+    names = series.names.tolist()
+    ids = series.ids.tolist()
+    dates = np.datetime_as_string(series.dates).tolist()
+
+    records = []
+    for row, code in enumerate(entity_codes):
+        record = {
+            descriptor.id_key: ids[code],
+            descriptor.name_key: names[code],
+            "week_commencing_date": dates[row]
+        }
+        for column, values in columns.items():
+            record[column] = values[row]
+        records.append(record)
+
+    return records
@@ -0,0 +1,68 @@
+"""
+Tests covering cache.py
+"""
+import os
+from pathlib import Path
+import shutil
+from src import cache
+from src.cache import cache_dir_for, load_sales_csv_cached
+from src.columnar import growth_records, load_sales_csv
+
+
+def test_load_sales_csv_cached(tmp_path):
+    """
+    Tests the cache is written on the first load, memory-mapped on the next,
+    and invalidated when the csv changes.
+    """
+    csv_filepath = tmp_path / Path('sales_brand.csv')
+    shutil.copy(Path(__file__).parent / Path('test_sales_brand.csv'), csv_filepath)
+
+    cold_columns = load_sales_csv_cached(csv_filepath.as_posix(), 'brand_id', 'brand')
+    assert (cache_dir_for(csv_filepath.as_posix()) / Path('meta.json')).exists()
+
+    warm_columns = load_sales_csv_cached(csv_filepath.as_posix(), 'brand_id', 'brand')
+    assert warm_columns.gross_sales.filename is not None
+    assert growth_records(warm_columns, 'brand_id', 'brand_name') == \
+        growth_records(cold_columns, 'brand_id', 'brand_name')
+
+    # touching the file keeps the cache, as the content hash still matches
+    stat = os.stat(csv_filepath)
+    os.utime(csv_filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert load_sales_csv_cached(
+        csv_filepath.as_posix(), 'brand_id', 'brand').gross_sales.filename is not None
+
+    # changing the content invalidates it
+    with open(csv_filepath, mode='a', encoding='utf-8') as file:
+        file.write("\n2,current,25/07/2022,4,Brand D,10,1")
+
+    changed_columns = load_sales_csv_cached(csv_filepath.as_posix(), 'brand_id', 'brand')
+    assert len(changed_columns) == 7
+    assert growth_records(changed_columns, 'brand_id', 'brand_name') == growth_records(
+        load_sales_csv(csv_filepath.as_posix(), 'brand_id', 'brand'), 'brand_id', 'brand_name')
+
+
+def test_csv_replaced_during_parse_is_not_cached(tmp_path, monkeypatch):
+    """
+    Tests columns parsed from a csv that is replaced part-way are not saved
+    under the new file's key, so the next load parses the new file.
+    """
+    csv_filepath = tmp_path / Path('sales_brand.csv')
+    shutil.copy(Path(__file__).parent / Path('test_sales_brand.csv'), csv_filepath)
+    replacement_filepath = tmp_path / Path('replacement.csv')
+    replacement_filepath.write_text(
+        csv_filepath.read_text(encoding='utf-8') + "\n2,current,25/07/2022,4,Brand D,10,1",
+        encoding='utf-8')
+
+    def load_then_replace(*args):
+        columns = load_sales_csv(*args)
+        os.replace(replacement_filepath, csv_filepath)
+        return columns
+
+    with monkeypatch.context() as patch:
+        patch.setattr(cache, 'load_sales_csv', load_then_replace)
+        assert len(load_sales_csv_cached(csv_filepath.as_posix(), 'brand_id', 'brand')) == 6
+    assert not cache_dir_for(csv_filepath.as_posix()).exists()
+
+    assert len(load_sales_csv_cached(csv_filepath.as_posix(), 'brand_id', 'brand')) == 7
+    assert load_sales_csv_cached(
+        csv_filepath.as_posix(), 'brand_id', 'brand').gross_sales.filename is not None
@@ -0,0 +1,239 @@
+"""
+Tests covering checkpoint.py
+"""
+import gc
+import json
+import os
+from pathlib import Path
+import pytest
+from src import checkpoint
+from src.checkpoint import run_checkpointed
+from src.main import parse_sales_brand_csv, parse_sales_product_csv, write_json
+from src.reader import MalformedRowError
+
+BRAND_HEADER = "period_id,period_name,week_commencing_date,brand_id,brand,gross_sales,units_sold\n"
+PRODUCT_HEADER = \
+    "period_id,period_name,week_commencing_date,barcode_no,product_name,gross_sales,units_sold\n"
+
+
+class Crash(Exception):
+    """
+    Stands in for the process being killed.
+    """
+
+
+def _sales_csv(path: Path, header: str, entities: int, weeks: int = 4) -> Path:
+    lines = []
+    for entity in range(entities, 0, -1):
+        for week in range(1, weeks + 1):
+            if (entity + week) % 3:
+                lines.append(f"2,current,{week:02}/07/2022,{entity},Entity {entity:03},"
+                             f"{entity * week % 97 + 0.5},{week}\n")
+            if (entity * week) % 4:
+                lines.append(f"1,previous,{week:02}/07/2021,{entity},Entity {entity:03},"
+                             f"{entity + week}.25,{week + 1}\n")
+    path.write_text(header + ''.join(lines), encoding='utf-8')
+    return path
+
+
+@pytest.fixture(name='inputs')
+def fixture_inputs(tmp_path, monkeypatch):
+    """
+    Small input files read in many blocks, with a checkpoint after every
+    block and entity, and the results.json an uninterrupted run writes.
+    """
+    monkeypatch.setattr(checkpoint, 'READ_BUFFER_SIZE', 256)
+    monkeypatch.setattr(checkpoint, 'MAX_OVERHEAD', float('inf'))
+
+    brand_csv = _sales_csv(tmp_path / Path('sales_brand.csv'), BRAND_HEADER, 6).as_posix()
+    product_csv = _sales_csv(tmp_path / Path('sales_product.csv'), PRODUCT_HEADER, 12).as_posix()
+    expected = tmp_path / Path('expected.json')
+    write_json(parse_sales_brand_csv(brand_csv), parse_sales_product_csv(product_csv),
+               expected.as_posix())
+
+    return brand_csv, product_csv, expected
+
+
+def _counting_blocks(monkeypatch) -> list:
+    calls = []
+    add_sales_rows = checkpoint.add_sales_rows
+
+    def counting(*args):
+        calls.append(None)
+        return add_sales_rows(*args)
+
+    monkeypatch.setattr(checkpoint, 'add_sales_rows', counting)
+    return calls
+
+
+def test_resume_after_crash_matches_uninterrupted_run(tmp_path, monkeypatch, inputs):
+    """
+    Tests a run killed after any checkpoint, or part-way through writing
+    results.json, resumes without re-reading what it had parsed and writes
+    the same file as an uninterrupted run.
+    """
+    brand_csv, product_csv, expected = inputs
+    output = tmp_path / Path('results.json')
+
+    blocks = _counting_blocks(monkeypatch)
+    saves = []
+    saved = checkpoint.Checkpointer._saved  # pylint: disable=protected-access
+
+    def counting_saved(self, started):
+        saved(self, started)
+        saves.append(None)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(checkpoint.Checkpointer, '_saved', counting_saved)
+        assert run_checkpointed(brand_csv, product_csv, output.as_posix(), interval=0,
+                                background=False) == \
+            sum(map(len, json.loads(expected.read_text(encoding='utf-8')).values()))
+    assert output.read_bytes() == expected.read_bytes()
+    total_blocks, total_saves = len(blocks), len(saves)
+    assert total_saves > 10
+
+    # a run that finishes before its first checkpoint is due
+    output.unlink()
+    run_checkpointed(brand_csv, product_csv, output.as_posix())
+    assert output.read_bytes() == expected.read_bytes()
+    assert not checkpoint.checkpoint_dir_for(output).exists()
+
+    for crash_after in range(1, total_saves + 1):
+        output.unlink()
+        saves.clear()
+
+        def crashing_saved(self, started, crash_after=crash_after):
+            counting_saved(self, started)
+            if len(saves) == crash_after:
+                raise Crash()
+
+        with monkeypatch.context() as patch:
+            patch.setattr(checkpoint.Checkpointer, '_saved', crashing_saved)
+            with pytest.raises(Crash):
+                run_checkpointed(brand_csv, product_csv, output.as_posix(), interval=0,
+                                 background=False)
+
+        blocks.clear()
+        run_checkpointed(brand_csv, product_csv, output.as_posix(), interval=0,
+                         background=False)
+        assert output.read_bytes() == expected.read_bytes()
+        assert len(blocks) < total_blocks
+        assert not checkpoint.checkpoint_dir_for(output).exists()
+
+    # killed between checkpoints while writing, leaving unsaved output behind
+    encode = checkpoint.RecordEncoder.encode
+    encoded = []
+
+    def crashing_encode(self, weekly_data):
+        encoded.append(None)
+        if len(encoded) == 30:
+            raise Crash()
+        return encode(self, weekly_data)
+
+    output.unlink()
+    with monkeypatch.context() as patch:
+        patch.setattr(checkpoint.RecordEncoder, 'encode', crashing_encode)
+        with pytest.raises(Crash):
+            run_checkpointed(brand_csv, product_csv, output.as_posix(), interval=0,
+                             background=False)
+
+    run_checkpointed(brand_csv, product_csv, output.as_posix(), interval=0,
+                     background=False)
+    assert output.read_bytes() == expected.read_bytes()
+
+
+def test_resume_after_fixing_malformed_row(tmp_path, monkeypatch, inputs):
+    """
+    Tests a run that stops at a malformed row resumes once the row is fixed,
+    and starts again if rows it had already read have changed.
+    """
+    brand_csv, product_csv, expected = inputs
+    output = tmp_path / Path('results.json')
+    blocks = _counting_blocks(monkeypatch)
+
+    product_text = Path(product_csv).read_text(encoding='utf-8')
+    bad_line = product_text.splitlines()[-5]
+    Path(product_csv).write_text(product_text.replace(bad_line, bad_line + ',extra'),
+                                 encoding='utf-8')
+
+    with pytest.raises(MalformedRowError):
+        run_checkpointed(brand_csv, product_csv, output.as_posix(), interval=0,
+                         background=False)
+    assert checkpoint.checkpoint_dir_for(output).exists()
+    blocks_before_error = len(blocks)
+
+    Path(product_csv).write_text(product_text, encoding='utf-8')
+    blocks.clear()
+    run_checkpointed(brand_csv, product_csv, output.as_posix(), interval=0,
+                     background=False)
+    assert output.read_bytes() == expected.read_bytes()
+    assert len(blocks) < blocks_before_error
+
+    # a changed row before the checkpoint's offset means starting over
+    Path(product_csv).write_text(product_text.replace(bad_line, bad_line + ',extra'),
+                                 encoding='utf-8')
+    with pytest.raises(MalformedRowError):
+        run_checkpointed(brand_csv, product_csv, output.as_posix(), interval=0,
+                         background=False)
+
+    brand_text = Path(brand_csv).read_text(encoding='utf-8')
+    Path(brand_csv).write_text(brand_text.replace(',1\n', ',2\n', 1), encoding='utf-8')
+    Path(product_csv).write_text(product_text, encoding='utf-8')
+    blocks.clear()
+    run_checkpointed(brand_csv, product_csv, output.as_posix(), interval=0,
+                     background=False)
+    assert len(blocks) > blocks_before_error
+
+    write_json(parse_sales_brand_csv(brand_csv), parse_sales_product_csv(product_csv),
+               expected.as_posix())
+    assert output.read_bytes() == expected.read_bytes()
+
+
+def test_background_checkpoints_match_uninterrupted_run(tmp_path, monkeypatch, inputs):
+    """
+    Tests saving the parse state from a forked process writes the same
+    results.json, including after a run that fails with a snapshot in
+    flight, and leaves no checkpoint, process or frozen objects behind.
+    """
+    if not hasattr(os, 'fork'):
+        pytest.skip("background checkpoints need os.fork")
+    brand_csv, product_csv, expected = inputs
+    output = tmp_path / Path('results.json')
+
+    run_checkpointed(brand_csv, product_csv, output.as_posix(), interval=0, background=True)
+    assert output.read_bytes() == expected.read_bytes()
+    assert not checkpoint.checkpoint_dir_for(output).exists()
+    with pytest.raises(ChildProcessError):
+        os.waitpid(-1, os.WNOHANG)
+
+    output.unlink()
+    save_state = checkpoint.Checkpointer.save_state
+
+    def crashing_save_state(self, state):
+        save_state(self, state)
+        raise Crash()
+
+    with monkeypatch.context() as patch:
+        patch.setattr(checkpoint.Checkpointer, 'save_state', crashing_save_state)
+        with pytest.raises(Crash):
+            run_checkpointed(brand_csv, product_csv, output.as_posix(), interval=0,
+                             background=True)
+    with pytest.raises(ChildProcessError):
+        os.waitpid(-1, os.WNOHANG)
+    assert gc.get_freeze_count() == 0
+    assert (checkpoint.checkpoint_dir_for(output) / Path(checkpoint.STATE_FILENAME)).exists()
+
+    run_checkpointed(brand_csv, product_csv, output.as_posix(), interval=0, background=True)
+    assert output.read_bytes() == expected.read_bytes()
+
+
+def test_background_needs_a_spare_core(tmp_path, monkeypatch):
+    """
+    Tests the parse state is saved in the foreground by default on a single
+    core, where a background snapshot would compete with the report.
+    """
+    monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: {0}, raising=False)
+    assert not checkpoint.Checkpointer(tmp_path).background
+    if hasattr(os, 'fork'):
+        monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: {0, 1})
+        assert checkpoint.Checkpointer(tmp_path).background
@@ -0,0 +1,51 @@
+"""
+Tests covering columnar.py
+"""
+from pathlib import Path
+from src.main import parse_sales_brand_csv, parse_sales_product_csv, output_json
+from src.columnar import load_sales_csv, output_json_columnar
+
+
+def test_load_sales_csv():
+    """
+    Tests the columnar csv ingest produces typed arrays.
+    """
+    sales_brand_csv_filepath = Path(
+        __file__).parent / Path('test_sales_brand.csv')
+    columns = load_sales_csv(sales_brand_csv_filepath.as_posix(), 'brand_id', 'brand')
+
+    assert len(columns) == 6
+    assert columns.names.tolist() == ['Brand A', 'Brand B', 'Brand C']
+    assert columns.gross_sales.dtype == 'int64'
+    assert columns.units_sold.dtype.kind == 'i'
+    assert str(columns.week_dates[0]) == '2021-07-04'
+
+
+def test_output_json_columnar_matches_output_json():
+    """
+    Tests the columnar output is byte-for-byte identical to output_json.
+    """
+    sales_brand_csv_filepath = Path(
+        __file__).parent / Path('test_sales_brand.csv')
+    sales_product_csv_filepath = Path(
+        __file__).parent / Path('test_sales_product.csv')
+
+    output_json(
+        brand_data=parse_sales_brand_csv(sales_brand_csv_filepath.as_posix()),
+        product_data=parse_sales_product_csv(sales_product_csv_filepath.as_posix()),
+        output_filename='test_results.json')
+    output_json_columnar(
+        brand_columns=load_sales_csv(
+            sales_brand_csv_filepath.as_posix(), 'brand_id', 'brand'),
+        product_columns=load_sales_csv(
+            sales_product_csv_filepath.as_posix(), 'barcode_no', 'product_name'),
+        output_filename='test_results_columnar.json')
+
+    output_folder = Path(__file__).parent.parent / Path('output')
+    expected = (output_folder / Path('test_results.json')).read_bytes()
+    actual = (output_folder / Path('test_results_columnar.json')).read_bytes()
+    assert actual == expected
+
+    # remove the test results files when we're done
+    (output_folder / Path('test_results.json')).unlink()
+    (output_folder / Path('test_results_columnar.json')).unlink()
@@ -0,0 +1,20 @@
+"""
+Tests covering dates.py
+"""
+from datetime import date
+from src.dates import decode_week_date
+
+
+def test_decode_week_date():
+    """
+    Tests a raw date decodes to its date and week key, and repeats hit the cache.
+    """
+    decode_week_date.cache_clear()
+
+    assert decode_week_date("04/07/2022") == (date(2022, 7, 4), "04/07")
+    assert decode_week_date("04/07/2021") == (date(2021, 7, 4), "04/07")
+    assert decode_week_date("04/07/2022") == (date(2022, 7, 4), "04/07")
+
+    cache_info = decode_week_date.cache_info()
+    assert cache_info.hits == 1
+    assert cache_info.misses == 2
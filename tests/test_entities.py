@@ -0,0 +1,106 @@
+"""
+Tests covering entities.py
+"""
+import gc
+import json
+from pathlib import Path
+import pytest
+from src.entities import (
+    BRAND, PRODUCT, EntityDescriptor, Rollup, aggregate_sales_csv, pack_entities, paused_gc,
+    unpack_entities)
+from src.main import parse_sales_product_csv, write_json_sections
+
+PRODUCTS_WITH_PARENTS_CSV = (
+    "period_id,period_name,week_commencing_date,barcode_no,product_name,"
+    "brand_id,brand,category_id,category,gross_sales,units_sold\n"
+    "1,previous,04/07/2021,1234,Product A,1,Brand A,10,Snacks,100,10\n"
+    "2,current,04/07/2022,1234,Product A,1,Brand A,10,Snacks,150,20\n"
+    "1,previous,04/07/2021,2345,Product B,1,Brand A,20,Drinks,100,30\n"
+    "2,current,04/07/2022,2345,Product B,1,Brand A,20,Drinks,50,20\n"
+    "2,current,11/07/2022,3456,Product C,2,Brand B,20,Drinks,80,8\n"
+)
+
+
+def test_aggregate_sales_csv_matches_parser():
+    """
+    Tests the generic engine produces the same structure as the product parser.
+    """
+    sales_product_csv_filepath = Path(
+        __file__).parent / Path('test_sales_product.csv')
+
+    sections = aggregate_sales_csv(sales_product_csv_filepath.as_posix(), PRODUCT)
+    parsed_csv = parse_sales_product_csv(sales_product_csv_filepath.as_posix())
+
+    assert list(sections) == ['PRODUCT']
+    assert list(sections['PRODUCT']) == list(parsed_csv)
+    assert sections['PRODUCT']['Product A']['barcode_no'] == 1234
+    assert sections['PRODUCT']['Product A']['weekly_data']['04/07'].current == \
+        parsed_csv['Product A']['weekly_data']['04/07'].current
+
+
+def test_rollups_from_product_rows(tmp_path):
+    """
+    Tests products roll up into brand and category totals in one pass, from
+    columns on the product rows or from a lookup table.
+    """
+    csv_filepath = tmp_path / Path('sales_product.csv')
+    csv_filepath.write_text(PRODUCTS_WITH_PARENTS_CSV, encoding='utf-8')
+
+    category = EntityDescriptor("CATEGORY", "category_id", "category")
+    sections = aggregate_sales_csv(
+        csv_filepath.as_posix(), PRODUCT, [Rollup(BRAND), Rollup(category)])
+
+    assert list(sections) == ['PRODUCT', 'BRAND', 'CATEGORY']
+
+    # brand A = products A + B
+    brand_week = sections['BRAND']['Brand A']['weekly_data']['04/07']
+    assert sections['BRAND']['Brand A']['brand_id'] == 1
+    assert brand_week.current['gross_sales'] == 200
+    assert brand_week.previous['units_sold'] == 40
+    assert brand_week.gross_sales_percentage_growth == 0.0
+    assert brand_week.units_sold_percentage_growth == 0.0
+
+    # drinks = product B, and product C's week with no previous period
+    drinks = sections['CATEGORY']['Drinks']['weekly_data']
+    assert drinks['04/07'].gross_sales_percentage_growth == -50.0
+    assert drinks['11/07'].gross_sales_percentage_growth is None
+
+    # the same brand totals from a barcode lookup instead of row columns
+    lookup_sections = aggregate_sales_csv(csv_filepath.as_posix(), PRODUCT, [Rollup(
+        BRAND, parents={1234: (1, 'Brand A'), 2345: (1, 'Brand A'), 3456: (2, 'Brand B')})])
+    assert lookup_sections['BRAND']['Brand A']['weekly_data']['04/07'].current == \
+        brand_week.current
+
+    # any set of sections can be written out
+    output_folder = Path(__file__).parent.parent / Path('output')
+    assert write_json_sections(
+        [(sections_descriptor, sections[sections_descriptor.section])
+         for sections_descriptor in (PRODUCT, BRAND, category)],
+        output_filename='test_results_rollups.json') == 8
+
+    output = json.loads((output_folder / Path('test_results_rollups.json')).read_text())
+    assert [record['category'] for record in output['CATEGORY']] == \
+        ['Drinks', 'Drinks', 'Snacks']
+
+    # remove the test results file when we're done
+    (output_folder / Path('test_results_rollups.json')).unlink()
+
+
+def test_unpack_entities_with_gc_paused():
+    """
+    Tests packed entities unpack to the same records with the garbage
+    collector paused, and the collector is resumed afterwards, even on error.
+    """
+    parsed = parse_sales_product_csv(
+        (Path(__file__).parent / Path('test_sales_product.csv')).as_posix())
+
+    with paused_gc():
+        assert not gc.isenabled()
+        unpacked = unpack_entities(pack_entities(parsed), PRODUCT)
+    assert gc.isenabled()
+    assert pack_entities(unpacked) == pack_entities(parsed)
+
+    with pytest.raises(KeyError):
+        with paused_gc():
+            unpack_entities(pack_entities(parsed), BRAND)
+    assert gc.isenabled()
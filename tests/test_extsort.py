@@ -0,0 +1,82 @@
+"""
+Tests covering extsort.py
+"""
+from pathlib import Path
+import random
+from src import extsort
+from src.extsort import iter_sorted_lines, sort_sales_csv
+from src.main import parse_sales_brand_csv, parse_sales_product_csv, write_json
+from src.streaming import stream_output_json
+
+HEADER = "period_id,period_name,week_commencing_date,brand_id,brand,gross_sales,units_sold\n"
+
+
+def _unsorted_brand_csv(path: Path, brands: int = 40, weeks: int = 6):
+    """
+    Write brand rows in shuffled order, including quoted names and a
+    repeated row that must still overwrite the earlier one.
+    """
+    generator = random.Random(0)
+    lines = []
+    for brand in range(brands):
+        name = f'"Brand {brand:02}, Ltd"' if brand % 7 == 0 else f"Brand {brand:02}"
+        for week in range(1, weeks + 1):
+            if (brand + week) % 5:
+                lines.append(f"2,current,{week:02}/07/2022,{brand},{name},"
+                             f"{generator.randint(0, 99999) / 100},{generator.randint(0, 99)}\n")
+            if (brand * week) % 4:
+                lines.append(f"1,previous,{week:02}/07/2021,{brand},{name},"
+                             f"{generator.randint(1, 99999) / 100},{generator.randint(1, 99)}\n")
+    generator.shuffle(lines)
+    lines.append("2,current,01/07/2022,3,Brand 03,1.00,1\n")
+    path.write_text(HEADER + ''.join(lines), encoding='utf-8')
+
+
+def test_external_sort_is_stable_across_runs(tmp_path, monkeypatch):
+    """
+    Tests a file sorted in many small runs, merged in several passes, comes
+    out ordered by name with each name's rows in their file order.
+    """
+    csv_filepath = tmp_path / Path('sales_brand.csv')
+    _unsorted_brand_csv(csv_filepath)
+    monkeypatch.setattr(extsort, 'MERGE_FAN_IN', 3)
+
+    lines = iter_sorted_lines(csv_filepath.as_posix(), 'brand', memory_budget=2000)
+    assert next(lines) == HEADER.strip().split(',')
+    sorted_lines = list(lines)
+
+    data_lines = csv_filepath.read_text(encoding='utf-8').splitlines()[1:]
+    name_of = extsort._name_key(4)  # pylint: disable=protected-access
+    assert sorted_lines == sorted(data_lines, key=name_of)
+
+    sorted_filepath = tmp_path / Path('sorted_sales_brand.csv')
+    assert sort_sales_csv(csv_filepath.as_posix(), 'brand', sorted_filepath.as_posix(),
+                          memory_budget=2000) == len(data_lines)
+    assert sorted_filepath.read_text(encoding='utf-8').splitlines() == \
+        [HEADER.strip()] + sorted_lines
+
+    # the run files are cleaned up
+    assert sorted(path.name for path in tmp_path.iterdir()) == \
+        ['sales_brand.csv', 'sorted_sales_brand.csv']
+
+
+def test_stream_unsorted_input_matches_write_json(tmp_path):
+    """
+    Tests streaming unsorted input through the external sort writes the same
+    json as parsing it whole, whatever the memory budget.
+    """
+    brand_csv_filepath = tmp_path / Path('sales_brand.csv')
+    _unsorted_brand_csv(brand_csv_filepath)
+    product_csv_filepath = Path(__file__).parent / Path('test_sales_product.csv')
+
+    expected_filepath = tmp_path / Path('results.json')
+    write_json(brand_data=parse_sales_brand_csv(brand_csv_filepath.as_posix()),
+               product_data=parse_sales_product_csv(product_csv_filepath.as_posix()),
+               output_filename=expected_filepath.as_posix())
+
+    for memory_budget in (1000, extsort.DEFAULT_MEMORY_BUDGET):
+        actual_filepath = tmp_path / Path(f'results_{memory_budget}.json')
+        stream_output_json(brand_csv_filepath.as_posix(), product_csv_filepath.as_posix(),
+                           actual_filepath.as_posix(), presorted=False,
+                           memory_budget=memory_budget)
+        assert actual_filepath.read_bytes() == expected_filepath.read_bytes()
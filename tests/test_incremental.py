@@ -0,0 +1,68 @@
+"""
+Tests covering incremental.py
+"""
+from pathlib import Path
+import pytest
+from src.main import parse_sales_brand_csv, parse_sales_product_csv, output_json
+from src.incremental import IncrementalReport
+
+
+def test_apply_delta_matches_full_rebuild(tmp_path):
+    """
+    Tests building from part of the history and applying the rest as deltas
+    produces the same results.json as processing the full files.
+    """
+    sales_brand_csv_filepath = Path(
+        __file__).parent / Path('test_sales_brand.csv')
+    sales_product_csv_filepath = Path(
+        __file__).parent / Path('test_sales_product.csv')
+
+    # split each test file into a history file and a delta file
+    csv_filepaths = {}
+    for name, csv_filepath in (('brand', sales_brand_csv_filepath),
+                               ('product', sales_product_csv_filepath)):
+        header, *lines = csv_filepath.read_text(encoding='utf-8').splitlines()
+        csv_filepaths[name] = (tmp_path / Path(f'{name}_history.csv'),
+                               tmp_path / Path(f'{name}_delta.csv'))
+        csv_filepaths[name][0].write_text(
+            '\n'.join([header] + lines[:2]), encoding='utf-8')
+        csv_filepaths[name][1].write_text(
+            '\n'.join([header] + lines[2:]), encoding='utf-8')
+
+    report = IncrementalReport(
+        state_dir=tmp_path / Path('state'), output_filename='test_results_incremental.json')
+    with pytest.raises(FileNotFoundError):
+        report.apply_delta(csv_filepaths['brand'][1].as_posix())
+    assert report.build(csv_filepaths['brand'][0].as_posix(),
+                        csv_filepaths['product'][0].as_posix()) == 2
+
+    # the delta adds a new week to an existing brand and two new brands
+    assert report.apply_delta(csv_filepaths['brand'][1].as_posix()) == 4
+    assert report.apply_delta(csv_filepaths['product'][1].as_posix()) == 3
+
+    output_json(
+        brand_data=parse_sales_brand_csv(sales_brand_csv_filepath.as_posix()),
+        product_data=parse_sales_product_csv(sales_product_csv_filepath.as_posix()),
+        output_filename='test_results.json')
+
+    output_folder = Path(__file__).parent.parent / Path('output')
+    expected = (output_folder / Path('test_results.json')).read_bytes()
+    actual = (output_folder / Path('test_results_incremental.json')).read_bytes()
+    assert actual == expected
+
+    # a delta that fails part-way leaves results.json and the stored state as they were
+    header, first_line = sales_brand_csv_filepath.read_text(encoding='utf-8').splitlines()[:2]
+    fields = first_line.split(',')
+    fields[header.split(',').index('gross_sales')] = '0'
+    bad_delta_filepath = tmp_path / Path('bad_delta.csv')
+    bad_delta_filepath.write_text('\n'.join([header, ','.join(fields)]), encoding='utf-8')
+    with pytest.raises(ZeroDivisionError):
+        report.apply_delta(bad_delta_filepath.as_posix())
+    assert (output_folder / Path('test_results_incremental.json')).read_bytes() == expected
+    assert not (output_folder / Path('test_results_incremental.json.tmp')).exists()
+    assert report.apply_delta(csv_filepaths['brand'][1].as_posix()) == 4
+    assert (output_folder / Path('test_results_incremental.json')).read_bytes() == expected
+
+    # remove the test results files when we're done
+    (output_folder / Path('test_results.json')).unlink()
+    (output_folder / Path('test_results_incremental.json')).unlink()
@@ -0,0 +1,51 @@
+"""
+Tests covering index.py
+"""
+from datetime import date
+from pathlib import Path
+from src.columnar import growth_records, load_sales_csv
+from src.entities import BRAND
+from src.index import index_sales_csv
+from src.main import section_records
+
+
+CSV_ROWS = """period_id,period_name,week_commencing_date,brand_id,brand,gross_sales,units_sold
+2,current,09/01/2023,1,Brand A,300,30
+2,current,26/12/2022,1,Brand A,200,20
+2,current,02/01/2023,1,Brand A,250,25
+1,previous,10/01/2022,1,Brand A,100,10
+1,previous,27/12/2021,1,Brand A,100,10
+1,previous,28/11/2021,1,Brand A,100,10
+1,previous,05/11/2021,1,Brand A,100,10
+2,current,31/10/2022,2,Brand B,100,10
+"""
+
+
+def test_sales_index(tmp_path):
+    """
+    Tests weeks are ordered by date across month and year boundaries, with
+    previous-only weeks last, and lookups by id and date range.
+    """
+    csv_filepath = tmp_path / Path('sales_brand.csv')
+    csv_filepath.write_text(CSV_ROWS, encoding='utf-8')
+    index = index_sales_csv(csv_filepath.as_posix(), BRAND)
+
+    assert index.names == ['Brand A', 'Brand B']
+    assert index.week_keys('Brand A') == \
+        ['26/12', '02/01', '09/01', '05/11', '28/11', '27/12', '10/01']
+    assert index.find(2)['brand_name'] == 'Brand B'
+    assert index.find(3) is None
+
+    assert index.weeks_between('Brand A', date(2023, 1, 1), date(2023, 1, 31)) == \
+        ['02/01', '09/01']
+    assert index.weeks_between('Brand A', end=date(2022, 12, 31)) == \
+        ['26/12', '05/11', '28/11', '27/12', '10/01']
+    assert index.weeks_between('Brand A', date(2024, 1, 1)) == []
+
+    records = section_records(BRAND, index.entities, index)
+    assert [record['current_week_commencing_date'] for record in records[:3]] == \
+        ['2022-12-26', '2023-01-02', '2023-01-09']
+
+    # the columnar engine orders weeks the same way
+    assert growth_records(load_sales_csv(
+        csv_filepath.as_posix(), 'brand_id', 'brand'), 'brand_id', 'brand_name') == records
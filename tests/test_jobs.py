@@ -0,0 +1,46 @@
+"""
+Tests covering jobs.py
+"""
+from pathlib import Path
+import pytest
+from src.jobs import ReportJob, run_jobs
+from src.main import parse_sales_brand_csv, parse_sales_product_csv, run, write_json
+
+
+BRAND_CSV = (Path(__file__).parent / Path('test_sales_brand.csv')).as_posix()
+PRODUCT_CSV = (Path(__file__).parent / Path('test_sales_product.csv')).as_posix()
+OUTPUT_FOLDER = Path(__file__).parent.parent / Path('output')
+
+
+def test_run_jobs_matches_write_json():
+    """
+    Tests concurrent jobs write the same files as the serial parsers and writer,
+    and a failing job is reported.
+    """
+    expected_records = write_json(
+        parse_sales_brand_csv(BRAND_CSV), parse_sales_product_csv(PRODUCT_CSV), 'serial.json')
+    expected = (OUTPUT_FOLDER / Path('serial.json')).read_bytes()
+
+    jobs = [ReportJob(BRAND_CSV, PRODUCT_CSV, f'job_{index}.json') for index in range(3)]
+    assert run_jobs(jobs, concurrency=2, workers=2) == [expected_records] * 3
+    assert run_jobs(jobs[:1], use_processes=False) == [expected_records]
+
+    for job in jobs:
+        assert (OUTPUT_FOLDER / Path(job.output_filename)).read_bytes() == expected
+        (OUTPUT_FOLDER / Path(job.output_filename)).unlink()
+    (OUTPUT_FOLDER / Path('serial.json')).unlink()
+
+    with pytest.raises(FileNotFoundError):
+        run_jobs([ReportJob('missing.csv', PRODUCT_CSV, 'missing.json')], workers=1)
+
+
+def test_run_concurrent_engine():
+    """
+    Tests the concurrent engine writes the same results.json as the default one.
+    """
+    run()
+    expected = (OUTPUT_FOLDER / Path('results.json')).read_bytes()
+
+    assert run(engine='concurrent') is True
+    assert (OUTPUT_FOLDER / Path('results.json')).read_bytes() == expected
+    (OUTPUT_FOLDER / Path('results.json')).unlink()
@@ -0,0 +1,45 @@
+"""
+Tests covering metrics.py
+"""
+import json
+from pathlib import Path
+from src.main import run
+from src.metrics import Instrumentation
+
+
+def test_run_with_instrumentation(tmp_path):
+    """
+    Tests run() records a metrics entry per stage and writes profiles when asked.
+    """
+    metrics_filepath = tmp_path / Path('metrics.jsonl')
+    instrumentation = Instrumentation(
+        profile_dir=tmp_path / Path('profiles'), trace_memory=True,
+        metrics_path=metrics_filepath)
+
+    assert run(instrumentation=instrumentation) is True
+
+    # one json line per run, holding every stage
+    lines = metrics_filepath.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record['engine'] == 'default'
+
+    stages = {stage['stage']: stage for stage in record['stages']}
+    assert list(stages) == ['parse_sales_brand_csv', 'parse_sales_product_csv', 'write_json']
+
+    # data/sales_brand.csv holds 20 rows for 3 brands over 4 weeks
+    assert stages['parse_sales_brand_csv']['rows'] == 20
+    assert stages['parse_sales_brand_csv']['entities'] == 3
+    assert stages['parse_sales_brand_csv']['weeks'] == 12
+    assert stages['write_json']['rows'] == 28
+
+    for stage in stages.values():
+        assert stage['wall_seconds'] >= 0
+        assert stage['cpu_seconds'] >= 0
+        assert stage['process_peak_rss_bytes'] > 0
+        assert stage['peak_traced_bytes'] > 0
+        assert Path(stage['profile_path']).exists()
+
+    # the rss peak is the process's high-water mark, so never falls between stages
+    peaks = [stage['process_peak_rss_bytes'] for stage in stages.values()]
+    assert peaks == sorted(peaks)
@@ -0,0 +1,104 @@
+"""
+Tests covering money.py
+"""
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from fractions import Fraction
+import json
+from pathlib import Path
+import random
+import pytest
+from src.classes import WeeklyData
+from src.columnar import growth_records, load_sales_csv
+from src.entities import BRAND
+from src.main import parse_sales_brand_csv, section_records
+from src.money import parse_pence, percentage_growth, pence_to_pounds, pounds_to_pence
+from src.timeseries import growth, load_sales_series
+
+# growth of exactly -3.125%, 40.625% and 0.005% (gross) / 12.5% (units)
+TIES_CSV = """period_id,period_name,week_commencing_date,brand_id,brand,gross_sales,units_sold
+1,previous,04/07/2021,1,Brand A,3.20,32
+2,current,04/07/2022,1,Brand A,3.10,31
+1,previous,04/07/2021,2,Brand B,3.20,16
+2,current,04/07/2022,2,Brand B,4.50,18
+1,previous,04/07/2021,3,Brand C,2000.00,8
+2,current,04/07/2022,3,Brand C,2000.10,9
+"""
+
+
+def test_parse_pence():
+    """
+    Tests amounts parse exactly to pence, rounding sub-penny amounts half up.
+    """
+    assert parse_pence("410.08") == 41008
+    assert parse_pence("200") == 20000
+    assert parse_pence("314.3") == 31430
+    assert parse_pence("-1.05") == -105
+    assert parse_pence(".5") == 50
+    assert parse_pence("-.5") == -50
+    assert parse_pence("1.005") == 101
+    assert parse_pence("-1.005") == -101
+    assert parse_pence("1.5e2") == 15000
+
+    for text in ("", ".", "abc", "nan", "1.2.3", "1.-5", "1.x0"):
+        with pytest.raises(ValueError):
+            parse_pence(text)
+
+    assert pounds_to_pence(410.08) == 41008
+    assert pence_to_pounds(pounds_to_pence(150.5)) == 150.5
+
+    # the public pounds API rounds half up, as the csv engines do
+    for amount in ("0.125", "0.285", "-0.125", "2.675", "1e-3", "1.5e2"):
+        assert pounds_to_pence(float(amount)) == parse_pence(amount)
+    assert pounds_to_pence(0.125) == 13
+    assert pounds_to_pence(Decimal("0.285")) == 29
+    weekly_data = WeeklyData()
+    weekly_data.add_data(1, 'current', date(2022, 7, 4), 0.285, 1)
+    assert weekly_data.current['gross_sales'] == 0.29
+    weekly_data.current = {**weekly_data.current, 'gross_sales': 0.125}
+    assert weekly_data.current['gross_sales'] == 0.13
+
+    with pytest.raises(ValueError):
+        pounds_to_pence(float('nan'))
+
+
+def test_percentage_growth_is_exact_half_up():
+    """
+    Tests growth matches exact rational arithmetic rounded half up, where
+    float division and round() can go either way on ties.
+    """
+    generator = random.Random(0)
+
+    for _ in range(10000):
+        previous = generator.choice([-1, 1]) * generator.randint(1, 100000)
+        current = generator.randint(-100000, 100000)
+        ratio = Fraction(current - previous, previous) * 10000
+        exact = Decimal(ratio.numerator) / Decimal(ratio.denominator)
+        hundredths = int(exact.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+        assert percentage_growth(current, previous) == hundredths / 100
+
+    assert percentage_growth(31, 32) == -3.13
+    assert percentage_growth(99999, 100000) == 0.0
+
+    with pytest.raises(ZeroDivisionError):
+        percentage_growth(1, 0)
+
+
+def test_growth_identical_across_engines(tmp_path):
+    """
+    Tests the object, columnar and time-series engines agree on half-way growth values.
+    """
+    csv_filepath = tmp_path / Path('sales_brand.csv')
+    csv_filepath.write_text(TIES_CSV, encoding='utf-8')
+
+    records = section_records(BRAND, parse_sales_brand_csv(csv_filepath.as_posix()))
+    assert [record["perc_gross_sales_growth"] for record in records] == [-3.13, 40.63, 0.01]
+    assert [record["perc_unit_sales_growth"] for record in records] == [-3.13, 12.5, 12.5]
+
+    columnar = growth_records(
+        load_sales_csv(csv_filepath.as_posix(), 'brand_id', 'brand'), 'brand_id', 'brand_name')
+    assert json.dumps(columnar) == json.dumps(records)
+
+    series = load_sales_series(csv_filepath.as_posix(), BRAND)
+    assert [value for value in growth(series, 'gross_sales') if value is not None] == \
+        [-3.13, 40.63, 0.01]
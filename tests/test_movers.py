@@ -0,0 +1,65 @@
+"""
+Tests covering movers.py
+"""
+import json
+from pathlib import Path
+from src.entities import BRAND, PRODUCT, aggregate_sales_csv, read_parents
+from src.main import section_records
+from src.movers import main, top_movers, top_movers_per_parent, top_movers_per_week
+
+PRODUCTS_WITH_BRANDS_CSV = (
+    "period_id,period_name,week_commencing_date,barcode_no,product_name,brand_id,brand,"
+    "gross_sales,units_sold\n"
+    "1,previous,04/07/2021,1234,Product A,1,Brand A,100,10\n"
+    "2,current,04/07/2022,1234,Product A,1,Brand A,150,20\n"
+    "1,previous,04/07/2021,2345,Product B,1,Brand A,100,30\n"
+    "2,current,04/07/2022,2345,Product B,1,Brand A,50,20\n"
+    "2,current,11/07/2022,3456,Product C,2,Brand B,80,8\n"
+)
+
+
+def test_top_movers_match_full_sort():
+    """
+    Tests heap selection gives the same records as sorting every record,
+    skipping weeks with no growth value and breaking ties by output order.
+    """
+    sales_product_csv_filepath = Path(__file__).parent / Path('test_sales_product.csv')
+    entities = aggregate_sales_csv(sales_product_csv_filepath.as_posix(), PRODUCT)['PRODUCT']
+    records = section_records(PRODUCT, entities)
+
+    for growth_key in ("perc_gross_sales_growth", "perc_unit_sales_growth"):
+        movers = [record for record in records if record[growth_key] is not None]
+        risers = sorted(movers, key=lambda record: -record[growth_key])
+        fallers = sorted(movers, key=lambda record: record[growth_key])
+
+        for k in (1, 2, 3, 10):
+            assert top_movers(PRODUCT, entities, k, growth_key) == risers[:k]
+            assert top_movers(PRODUCT, entities, k, growth_key, fallers=True) == fallers[:k]
+
+    assert top_movers(PRODUCT, entities, 0) == []
+
+
+def test_top_movers_per_week_and_brand(tmp_path, capsys):
+    """
+    Tests movers are selected within each week and within each brand, and
+    the cli prints the same json.
+    """
+    csv_filepath = tmp_path / Path('sales_product.csv')
+    csv_filepath.write_text(PRODUCTS_WITH_BRANDS_CSV, encoding='utf-8')
+    entities = aggregate_sales_csv(csv_filepath.as_posix(), PRODUCT)['PRODUCT']
+    parents = read_parents(csv_filepath.as_posix(), PRODUCT, BRAND)
+
+    assert parents == {1234: (1, 'Brand A'), 2345: (1, 'Brand A'), 3456: (2, 'Brand B')}
+
+    # product C's only week has no previous period, so it is not a mover
+    per_week = top_movers_per_week(PRODUCT, entities, k=1, fallers=True)
+    assert list(per_week) == ['2022-07-04']
+    assert per_week['2022-07-04'][0]['product_name'] == 'Product B'
+
+    per_brand = top_movers_per_parent(PRODUCT, entities, parents, k=1)
+    assert list(per_brand) == ['Brand A']
+    assert per_brand['Brand A'][0]['product_name'] == 'Product A'
+    assert per_brand['Brand A'][0]['perc_gross_sales_growth'] == 50.0
+
+    main(['--product-csv', csv_filepath.as_posix(), '--per-brand', '-k', '1'])
+    assert json.loads(capsys.readouterr().out) == json.loads(json.dumps(per_brand))
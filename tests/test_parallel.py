@@ -0,0 +1,56 @@
+"""
+Tests covering parallel.py
+"""
+from pathlib import Path
+from src.main import parse_sales_brand_csv, parse_sales_product_csv, entity_records
+from src.parallel import (chunk_offsets, parse_sales_brand_csv_parallel,
+                          parse_sales_product_csv_parallel)
+
+
+def _all_records(parsed_csv: dict, id_key: str, name_key: str) -> list:
+    records = []
+    for name in sorted(parsed_csv.keys()):
+        records.extend(entity_records(
+            id_key, parsed_csv[name][id_key], name_key, name, parsed_csv[name]['weekly_data']))
+    return records
+
+
+def test_chunk_offsets():
+    """
+    Tests byte ranges cover the whole body of the file and start on new lines.
+    """
+    sales_product_csv_filepath = Path(
+        __file__).parent / Path('test_sales_product.csv')
+    contents = sales_product_csv_filepath.read_bytes()
+    offsets = chunk_offsets(sales_product_csv_filepath.as_posix(), 3)
+
+    assert len(offsets) == 3
+    assert offsets[0][0] == contents.index(b'\n') + 1
+    assert offsets[-1][1] == len(contents)
+    for (_, end), (start, _) in zip(offsets[:-1], offsets[1:]):
+        assert end == start
+        assert contents[start - 1:start] == b'\n'
+
+
+def test_parallel_parsers_match_serial():
+    """
+    Tests the parallel parsers produce the same records as the serial ones,
+    including when an entity-week is split between chunks.
+    """
+    sales_brand_csv_filepath = Path(
+        __file__).parent / Path('test_sales_brand.csv')
+    sales_product_csv_filepath = Path(
+        __file__).parent / Path('test_sales_product.csv')
+
+    serial_brands = parse_sales_brand_csv(sales_brand_csv_filepath.as_posix())
+    parallel_brands = parse_sales_brand_csv_parallel(
+        sales_brand_csv_filepath.as_posix(), workers=2, chunks=6)
+    assert list(parallel_brands) == list(serial_brands)
+    assert _all_records(parallel_brands, 'brand_id', 'brand_name') == \
+        _all_records(serial_brands, 'brand_id', 'brand_name')
+
+    serial_products = parse_sales_product_csv(sales_product_csv_filepath.as_posix())
+    parallel_products = parse_sales_product_csv_parallel(
+        sales_product_csv_filepath.as_posix(), workers=2, chunks=5)
+    assert _all_records(parallel_products, 'barcode_no', 'product_name') == \
+        _all_records(serial_products, 'barcode_no', 'product_name')
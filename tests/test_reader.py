@@ -0,0 +1,57 @@
+"""
+Tests covering reader.py
+"""
+from pathlib import Path
+import pytest
+from src.entities import BRAND
+from src.parallel import parse_csv_parallel
+from src.reader import MalformedRowError, read_sales_csv
+
+
+HEADER = "period_id,period_name,week_commencing_date,brand_id,brand,gross_sales,units_sold\n"
+
+
+def test_read_sales_csv(tmp_path):
+    """
+    Tests rows are typed, in file order, with blank lines skipped and quoted
+    fields and windows line endings handled.
+    """
+    csv_filepath = tmp_path / Path('sales_brand.csv')
+    csv_filepath.write_bytes(
+        HEADER.encode() + b'1,previous,04/07/2021,1,Brand A,200,20\r\n\r\n'
+        b'2,current,04/07/2022,2,"Brand B, Ltd",300.5,30')
+
+    assert list(read_sales_csv(csv_filepath.as_posix(), 'brand_id', 'brand')) == [
+        (1, 'Brand A', 1, 'previous', '04/07/2021', 20000, 20),
+        (2, 'Brand B, Ltd', 2, 'current', '04/07/2022', 30050, 30)
+    ]
+
+
+def test_read_sales_csv_malformed_rows(tmp_path):
+    """
+    Tests malformed rows and headers are reported with their line numbers,
+    including by the parallel parser.
+    """
+    csv_filepath = tmp_path / Path('sales_brand.csv')
+    good_rows = '1,previous,04/07/2021,1,Brand A,200,20\n' * 20
+
+    csv_filepath.write_text(
+        HEADER + good_rows + '1,previous,04/07/2021,one,Brand A,200,20\n', encoding='utf-8')
+    with pytest.raises(MalformedRowError, match='line 22: invalid literal'):
+        list(read_sales_csv(csv_filepath.as_posix(), 'brand_id', 'brand'))
+    with pytest.raises(MalformedRowError) as error:
+        parse_csv_parallel(csv_filepath.as_posix(), BRAND, workers=2, chunks=4)
+    assert error.value.line_number == 22
+
+    csv_filepath.write_text(
+        HEADER + good_rows + '1,previous,04/07/2021,1,Brand A,2.x0,20\n', encoding='utf-8')
+    with pytest.raises(MalformedRowError, match='line 22: invalid literal'):
+        list(read_sales_csv(csv_filepath.as_posix(), 'brand_id', 'brand'))
+
+    csv_filepath.write_text(
+        HEADER + good_rows + '1,previous,04/07/2021,1,Brand A\n', encoding='utf-8')
+    with pytest.raises(MalformedRowError, match='line 22: expected 7 fields, found 5'):
+        list(read_sales_csv(csv_filepath.as_posix(), 'brand_id', 'brand'))
+
+    with pytest.raises(MalformedRowError, match='line 1: missing column'):
+        list(read_sales_csv(csv_filepath.as_posix(), 'barcode_no', 'product_name'))
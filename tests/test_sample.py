@@ -7,7 +7,7 @@ from pathlib import Path
 import sys
 import os
 import pytest
-from src.main import run, parse_sales_brand_csv, parse_sales_product_csv, output_json
+from src.main import main, run, parse_sales_brand_csv, parse_sales_product_csv, output_json
 from src.classes import WeeklyData
 
 sys.path.insert(0, os.path.abspath(
@@ -95,6 +95,35 @@ def test_class_weekly_data():
     assert units_sold_percentage_growth is None
 
 
+def test_class_weekly_data_period_round_trip():
+    """
+    Tests WeeklyData stores periods in slots and the current/previous
+    dict views can be copied between instances.
+    """
+    source_weekly_data = WeeklyData()
+    source_weekly_data.add_data(
+        period_id=2,
+        period_name="current",
+        week_commencement_date=date(2022, 7, 4),
+        gross_sales=150.5,
+        units_sold=15
+    )
+
+    # slots mean no per-instance __dict__
+    assert not hasattr(source_weekly_data, '__dict__')
+
+    target_weekly_data = WeeklyData()
+    target_weekly_data.current = source_weekly_data.current
+    assert target_weekly_data.current == {
+        'period_id': 2,
+        'week_commencement_date': date(2022, 7, 4),
+        'gross_sales': 150.5,
+        'units_sold': 15
+    }
+    assert target_weekly_data.previous is None
+    assert target_weekly_data.gross_sales_percentage_growth is None
+
+
 def test_parse_sales_product_csv():
     """
     Tests the csv ingest function for sales_product csv files.
@@ -249,3 +278,34 @@ def test_main_returns_true():
     """
 
     assert run() is True
+
+
+def test_main_cli_and_batch(tmp_path, capsys):
+    """
+    Tests the command line writes to the given output path, and batch mode
+    runs every job in a manifest, reporting failed jobs without stopping.
+    """
+    tests_folder = Path(__file__).parent
+    brand_csv = (tests_folder / Path('test_sales_brand.csv')).as_posix()
+    product_csv = (tests_folder / Path('test_sales_product.csv')).as_posix()
+
+    assert main(['--brand-csv', brand_csv, '--product-csv', product_csv,
+                 '--output', (tmp_path / Path('single/results.json')).as_posix()]) == 0
+    expected = (tmp_path / Path('single/results.json')).read_bytes()
+    assert len(json.loads(expected)["BRAND"]) == 5
+
+    manifest = [
+        {"brand_csv": brand_csv, "product_csv": product_csv, "output": "a/results.json"},
+        {"brand_csv": "missing.csv", "product_csv": product_csv, "output": "b/results.json"},
+        {"brand_csv": brand_csv, "product_csv": product_csv, "output": "c/results.json"}
+    ]
+    manifest_path = tmp_path / Path('manifest.json')
+    manifest_path.write_text(json.dumps(manifest), encoding='utf-8')
+
+    assert main(['--batch', manifest_path.as_posix()]) == 1
+    assert 'b/results.json' in capsys.readouterr().err
+
+    # relative outputs are in the manifest's folder
+    assert (tmp_path / Path('a/results.json')).read_bytes() == expected
+    assert (tmp_path / Path('c/results.json')).read_bytes() == expected
+    assert not (tmp_path / Path('b/results.json')).exists()
@@ -0,0 +1,113 @@
+"""
+Tests covering serialize.py and write_json
+"""
+import gzip
+import json
+from pathlib import Path
+import pytest
+from src.main import parse_sales_brand_csv, parse_sales_product_csv, output_json, write_json
+from src.serialize import open_output, zstandard
+
+
+def test_write_json_matches_output_json():
+    """
+    Tests write_json produces the same file as output_json, and the compact
+    encoding the same document.
+    """
+    parsed_brand_csv = parse_sales_brand_csv(
+        (Path(__file__).parent / Path('test_sales_brand.csv')).as_posix())
+    parsed_product_csv = parse_sales_product_csv(
+        (Path(__file__).parent / Path('test_sales_product.csv')).as_posix())
+
+    output = output_json(brand_data=parsed_brand_csv, product_data=parsed_product_csv,
+                         output_filename='test_results.json')
+    assert write_json(brand_data=parsed_brand_csv, product_data=parsed_product_csv,
+                      output_filename='test_results_fast.json') == 9
+    write_json(brand_data=parsed_brand_csv, product_data=parsed_product_csv,
+               output_filename='test_results_compact.json', compact=True)
+
+    output_folder = Path(__file__).parent.parent / Path('output')
+    expected = (output_folder / Path('test_results.json')).read_bytes()
+    assert expected == json.dumps(output).encode('utf-8')
+    assert (output_folder / Path('test_results_fast.json')).read_bytes() == expected
+
+    compact = (output_folder / Path('test_results_compact.json')).read_bytes()
+    assert b', ' not in compact
+    assert json.loads(compact) == json.loads(expected)
+
+    # remove the test results files when we're done
+    for filename in ('test_results.json', 'test_results_fast.json', 'test_results_compact.json'):
+        (output_folder / Path(filename)).unlink()
+
+
+def test_write_json_ndjson_and_compression():
+    """
+    Tests ndjson output holds one record per line tagged with its section,
+    and gzip output decompresses to the uncompressed file.
+    """
+    parsed_brand_csv = parse_sales_brand_csv(
+        (Path(__file__).parent / Path('test_sales_brand.csv')).as_posix())
+    parsed_product_csv = parse_sales_product_csv(
+        (Path(__file__).parent / Path('test_sales_product.csv')).as_posix())
+
+    output = output_json(parsed_brand_csv, parsed_product_csv, 'test_results.json')
+    assert write_json(parsed_brand_csv, parsed_product_csv, 'test_results.ndjson',
+                      ndjson=True) == 9
+    write_json(parsed_brand_csv, parsed_product_csv, 'test_results.ndjson.gz',
+               ndjson=True, compression='gzip', compression_level=1)
+    write_json(parsed_brand_csv, parsed_product_csv, 'test_results.json.gz',
+               compression='gzip')
+
+    output_folder = Path(__file__).parent.parent / Path('output')
+    ndjson = (output_folder / Path('test_results.ndjson')).read_bytes()
+    lines = [json.loads(line) for line in ndjson.decode('utf-8').splitlines()]
+    assert [line.pop('section') for line in lines] == \
+        ['PRODUCT'] * len(output['PRODUCT']) + ['BRAND'] * len(output['BRAND'])
+    assert lines == json.loads(json.dumps(output["PRODUCT"] + output["BRAND"]))
+
+    assert gzip.decompress(
+        (output_folder / Path('test_results.ndjson.gz')).read_bytes()) == ndjson
+    assert gzip.decompress((output_folder / Path('test_results.json.gz')).read_bytes()) == \
+        (output_folder / Path('test_results.json')).read_bytes()
+
+    with pytest.raises(ValueError):
+        open_output((output_folder / Path('test_results.bz2')).as_posix(), 'bz2')
+    if zstandard is None:
+        with pytest.raises(ImportError):
+            open_output((output_folder / Path('test_results.zst')).as_posix(), 'zstd')
+
+    for filename in ('test_results.json', 'test_results.ndjson', 'test_results.ndjson.gz',
+                     'test_results.json.gz'):
+        (output_folder / Path(filename)).unlink()
+
+
+def test_failed_write_keeps_previous_results():
+    """
+    Tests a write that fails part-way, here on a zero previous week, leaves
+    the earlier results file as it was and no temporary file behind.
+    """
+    parsed_brand_csv = parse_sales_brand_csv(
+        (Path(__file__).parent / Path('test_sales_brand.csv')).as_posix())
+    parsed_product_csv = parse_sales_product_csv(
+        (Path(__file__).parent / Path('test_sales_product.csv')).as_posix())
+
+    write_json(parsed_brand_csv, parsed_product_csv, 'test_results.json')
+    output_folder = Path(__file__).parent.parent / Path('output')
+    expected = (output_folder / Path('test_results.json')).read_bytes()
+
+    # the brand section is written after the product one
+    for brand in parsed_brand_csv.values():
+        for weekly_data in brand['weekly_data'].values():
+            previous = weekly_data.previous
+            if previous is not None:
+                weekly_data.add_period(previous['period_id'], 'previous',
+                                       previous['week_commencement_date'], 0,
+                                       previous['units_sold'])
+
+    for write in (write_json, output_json):
+        with pytest.raises(ZeroDivisionError):
+            write(parsed_brand_csv, parsed_product_csv, 'test_results.json')
+        assert (output_folder / Path('test_results.json')).read_bytes() == expected
+        assert not (output_folder / Path('test_results.json.tmp')).exists()
+
+    (output_folder / Path('test_results.json')).unlink()
@@ -0,0 +1,96 @@
+"""
+Tests covering service.py
+"""
+import json
+from pathlib import Path
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from src.main import output_json, parse_sales_brand_csv, parse_sales_product_csv
+from src.service import LRUCache, ReportData, ReportService, make_server
+
+
+BRAND_CSV = (Path(__file__).parent / Path('test_sales_brand.csv')).as_posix()
+PRODUCT_CSV = (Path(__file__).parent / Path('test_sales_product.csv')).as_posix()
+
+
+def test_lru_cache_evicts_by_size():
+    """
+    Tests the cache evicts least recently used values to stay within its byte budget.
+    """
+    cache = LRUCache(max_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    assert cache.get('a') == b'1234'
+
+    # 'b' is now least recently used
+    cache.put('c', b'1234')
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1234'
+    assert cache.current_bytes == 8
+
+    # too big to cache at all
+    cache.put('d', b'12345678901')
+    assert cache.get('d') is None
+    assert len(cache) == 2
+
+
+def test_report_service_queries():
+    """
+    Tests filtered queries return the matching records of the full report,
+    and repeated queries are served from the cache.
+    """
+    service = ReportService(ReportData(BRAND_CSV, PRODUCT_CSV))
+    full = json.loads(json.dumps(output_json(
+        parse_sales_brand_csv(BRAND_CSV), parse_sales_product_csv(PRODUCT_CSV), 'service.json')))
+    (Path(__file__).parent.parent / Path('output') / Path('service.json')).unlink()
+
+    assert json.loads(service.report('')) == full
+
+    brand_a = json.loads(service.report('section=BRAND&name=Brand%20A'))
+    assert list(brand_a) == ['BRAND']
+    assert brand_a['BRAND'] == [
+        record for record in full['BRAND'] if record['brand_name'] == 'Brand A']
+    assert json.loads(service.report('section=brand&id=1')) == brand_a
+
+    july = json.loads(service.report('section=BRAND&start=2022-07-01&end=2022-07-31'))
+    assert july['BRAND'] == [
+        record for record in full['BRAND']
+        if '2022-07-01' <= (record['current_week_commencing_date'] or
+                            record['previous_week_commencing_date']) <= '2022-07-31']
+
+    hits = service.cache.hits
+    service.report('section=BRAND&name=Brand%20A')
+    assert service.cache.hits == hits + 1
+
+    # a reload bumps the data version, so the cached response is not reused
+    service.data.reload()
+    service.report('section=BRAND&name=Brand%20A')
+    assert service.cache.hits == hits + 1
+
+
+def test_report_service_http():
+    """
+    Tests the HTTP server answers queries and rejects bad ones.
+    """
+    service = ReportService(ReportData(BRAND_CSV, PRODUCT_CSV))
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        with urlopen(f"{base_url}/report?section=PRODUCT") as response:
+            assert list(json.loads(response.read())) == ['PRODUCT']
+
+        try:
+            urlopen(f"{base_url}/report?section=CATEGORY")
+            assert False
+        except HTTPError as error:
+            assert error.code == 400
+
+        with urlopen(Request(f"{base_url}/reload", method='POST')) as response:
+            assert json.loads(response.read()) == {"version": 2}
+    finally:
+        server.shutdown()
+        server.server_close()
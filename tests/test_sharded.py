@@ -0,0 +1,81 @@
+"""
+Tests covering sharded.py
+"""
+import json
+from pathlib import Path
+import shutil
+from src.main import output_json, parse_sales_brand_csv, parse_sales_product_csv
+from src.sharded import MANIFEST_FILENAME, read_entity_records, shard_of, write_sharded
+
+
+def test_write_sharded(monkeypatch):
+    """
+    Tests the shards hold exactly the records of results.json, split by entity,
+    and the manifest ranges can be read back on their own.
+    """
+    brand_data = parse_sales_brand_csv(
+        (Path(__file__).parent / Path('test_sales_brand.csv')).as_posix())
+    product_data = parse_sales_product_csv(
+        (Path(__file__).parent / Path('test_sales_product.csv')).as_posix())
+    output = output_json(brand_data, product_data, 'sharded.json')
+    output_folder = Path(__file__).parent.parent / Path('output')
+    (output_folder / Path('sharded.json')).unlink()
+
+    manifest = write_sharded(brand_data, product_data, 'sharded', shards=3, workers=2)
+    output_path = output_folder / Path('sharded')
+
+    try:
+        assert json.loads((output_path / Path(MANIFEST_FILENAME)).read_text()) == manifest
+
+        for section, records in output.items():
+            entities = manifest["sections"][section]["entities"]
+            name_key = 'brand_name' if section == 'BRAND' else 'product_name'
+
+            # every shard is valid json, and together they hold the whole section
+            sharded_records = []
+            for shard in range(3):
+                sharded_records.extend(json.loads(
+                    (output_path / Path(f"{section}-{shard:03d}.json")).read_text()))
+            assert sorted(sharded_records, key=lambda record: record[name_key]) == \
+                sorted(records, key=lambda record: record[name_key])
+
+            for entity_name, entry in entities.items():
+                assert entry["shard"] == f"{section}-{shard_of(entity_name, 3):03d}.json"
+                entity_records = [
+                    record for record in records if record[name_key] == entity_name]
+                assert read_entity_records(output_path, section, entity_name) == \
+                    json.loads(json.dumps(entity_records))
+                assert entry["records"] == len(entity_records)
+
+        assert read_entity_records(output_path, 'BRAND', 'Brand Z') == []
+
+        # the manifest is parsed again only once the output is rewritten
+        loads = []
+        load = json.load
+        with monkeypatch.context() as patch:
+            patch.setattr(json, 'load', lambda file: loads.append(None) or load(file))
+            for entity_name in manifest["sections"]["BRAND"]["entities"]:
+                read_entity_records(output_path, 'BRAND', entity_name)
+            assert not loads
+
+            brand_name = next(iter(brand_data))
+            write_sharded({brand_name: brand_data[brand_name]}, product_data, 'sharded',
+                          shards=3, workers=1)
+            assert read_entity_records(output_path, 'BRAND', brand_name)
+            assert len(loads) == 1
+            for entity_name in manifest["sections"]["BRAND"]["entities"]:
+                if entity_name != brand_name:
+                    assert read_entity_records(output_path, 'BRAND', entity_name) == []
+            assert len(loads) == 1
+
+        # fewer shards than the last write removes the extra shards, and no temp files stay
+        write_sharded(brand_data, product_data, 'sharded', shards=2, workers=2)
+        assert sorted(path.name for path in output_path.iterdir()) == [
+            'BRAND-000.json', 'BRAND-001.json', 'PRODUCT-000.json', 'PRODUCT-001.json',
+            MANIFEST_FILENAME]
+        for entity_name in brand_data:
+            assert read_entity_records(output_path, 'BRAND', entity_name) == \
+                json.loads(json.dumps([record for record in output['BRAND']
+                                       if record['brand_name'] == entity_name]))
+    finally:
+        shutil.rmtree(output_path)
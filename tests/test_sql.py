@@ -0,0 +1,56 @@
+"""
+Tests covering sql.py
+"""
+from pathlib import Path
+import sqlite3
+import pytest
+from src.entities import BRAND, PRODUCT
+from src.main import parse_sales_brand_csv, parse_sales_product_csv, write_json
+from src.sql import ConnectionPool, load_sales_csv_into_sqlite, write_json_from_sql
+
+
+def test_write_json_from_sql(tmp_path):
+    """
+    Tests the SQL source writes the same file as the csv parsers, in batches
+    smaller than a section, and reuses its pooled connection.
+    """
+    sales_brand_csv = (Path(__file__).parent / Path('test_sales_brand.csv')).as_posix()
+    sales_product_csv = (Path(__file__).parent / Path('test_sales_product.csv')).as_posix()
+
+    database = tmp_path / Path('sales.db')
+    with sqlite3.connect(database) as connection:
+        load_sales_csv_into_sqlite(sales_brand_csv, connection, BRAND, 'sales_brand')
+        load_sales_csv_into_sqlite(sales_product_csv, connection, PRODUCT, 'sales_product')
+    connection.close()
+
+    pool = ConnectionPool.for_sqlite(database, size=2)
+    assert write_json_from_sql(pool, 'test_results_sql.json', batch_rows=2) == 9
+    write_json(parse_sales_brand_csv(sales_brand_csv), parse_sales_product_csv(sales_product_csv),
+               'test_results_csv.json')
+
+    output_folder = Path(__file__).parent.parent / Path('output')
+    assert (output_folder / Path('test_results_sql.json')).read_bytes() == \
+        (output_folder / Path('test_results_csv.json')).read_bytes()
+
+    # an absolute output path in a directory that doesn't exist yet
+    nested_path = tmp_path / Path('nested') / Path('results.json')
+    assert write_json_from_sql(pool, nested_path.as_posix()) == 9
+    assert nested_path.read_bytes() == (output_folder / Path('test_results_csv.json')).read_bytes()
+
+    # a zero previous week fails part-way through, leaving the earlier file as it was
+    with sqlite3.connect(database) as connection:
+        connection.execute("UPDATE sales_brand SET gross_sales = 0 WHERE period_name = 'previous'")
+    connection.close()
+    with pytest.raises(ZeroDivisionError):
+        write_json_from_sql(pool, nested_path.as_posix())
+    assert nested_path.read_bytes() == (output_folder / Path('test_results_csv.json')).read_bytes()
+    assert not nested_path.with_name('results.json.tmp').exists()
+
+    with pool.connection() as first, pool.connection() as second:
+        assert first is not second
+    with pool.connection() as connection:
+        assert connection in (first, second)
+    pool.close()
+
+    for filename in ('test_results_sql.json', 'test_results_csv.json'):
+        (output_folder / Path(filename)).unlink()
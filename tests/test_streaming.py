@@ -0,0 +1,65 @@
+"""
+Tests covering streaming.py
+"""
+from pathlib import Path
+import pytest
+from src.main import parse_sales_brand_csv, parse_sales_product_csv, output_json
+from src.entities import BRAND
+from src.streaming import iter_entity_groups, stream_output_json
+
+
+def test_stream_output_json_matches_output_json():
+    """
+    Tests the streamed json is byte-for-byte identical to output_json
+    for input files sorted by entity name.
+    """
+    sales_brand_csv_filepath = Path(
+        __file__).parent / Path('test_sales_brand.csv')
+    sales_product_csv_filepath = Path(
+        __file__).parent / Path('test_sales_product.csv')
+
+    output_json(
+        brand_data=parse_sales_brand_csv(sales_brand_csv_filepath.as_posix()),
+        product_data=parse_sales_product_csv(sales_product_csv_filepath.as_posix()),
+        output_filename='test_results.json')
+    count = stream_output_json(
+        brand_csv_filename=sales_brand_csv_filepath.as_posix(),
+        product_csv_filename=sales_product_csv_filepath.as_posix(),
+        output_filename='test_results_streaming.json')
+
+    assert count == 9
+
+    output_folder = Path(__file__).parent.parent / Path('output')
+    expected = (output_folder / Path('test_results.json')).read_bytes()
+    actual = (output_folder / Path('test_results_streaming.json')).read_bytes()
+    assert actual == expected
+
+    # remove the test results files when we're done
+    (output_folder / Path('test_results.json')).unlink()
+    (output_folder / Path('test_results_streaming.json')).unlink()
+
+
+def test_iter_entity_groups_rejects_unsorted_input(tmp_path):
+    """
+    Tests an input file that isn't sorted by entity name raises a ValueError.
+    """
+    unsorted_csv_filepath = tmp_path / Path('unsorted_sales_brand.csv')
+    unsorted_csv_filepath.write_text(
+        "period_id,period_name,week_commencing_date,brand_id,brand,gross_sales,units_sold\n"
+        "1,previous,04/07/2021,2,Brand B,200,20\n"
+        "1,previous,04/07/2021,1,Brand A,200,20\n",
+        encoding='utf-8')
+
+    with pytest.raises(ValueError):
+        list(iter_entity_groups(unsorted_csv_filepath.as_posix(), BRAND))
+
+    # streaming it into a report leaves the previous results.json alone
+    output_filepath = tmp_path / Path('results.json')
+    output_filepath.write_text('{}', encoding='utf-8')
+    with pytest.raises(ValueError, match='not sorted'):
+        stream_output_json(unsorted_csv_filepath.as_posix(),
+                           (Path(__file__).parent / Path('test_sales_product.csv')).as_posix(),
+                           output_filepath.as_posix())
+    assert output_filepath.read_text(encoding='utf-8') == '{}'
+    assert sorted(path.name for path in tmp_path.iterdir()) == \
+        ['results.json', 'unsorted_sales_brand.csv']
@@ -0,0 +1,35 @@
+"""
+Tests covering the benchmark data generator in benchmarks/synthetic.py
+"""
+from pathlib import Path
+from benchmarks.synthetic import write_sales_csv
+from src.main import parse_sales_brand_csv, parse_sales_product_csv
+
+
+def test_write_sales_csv(tmp_path):
+    """
+    Tests generated files are deterministic, parse with the real parsers and
+    respect the entity, week and missing-week settings.
+    """
+    first_csv_filepath = tmp_path / Path('first.csv')
+    second_csv_filepath = tmp_path / Path('second.csv')
+
+    rows = write_sales_csv(first_csv_filepath.as_posix(), kind='brand', entities=20,
+                           weeks=4, missing_current=0.25, seed=3)
+    write_sales_csv(second_csv_filepath.as_posix(), kind='brand', entities=20,
+                    weeks=4, missing_current=0.25, seed=3)
+    assert first_csv_filepath.read_bytes() == second_csv_filepath.read_bytes()
+
+    brands = parse_sales_brand_csv(first_csv_filepath.as_posix())
+    assert len(brands) == 20
+    assert all(len(brand['weekly_data']) == 4 for brand in brands.values())
+
+    # only current weeks go missing, so some weeks have just a previous period
+    weeks = [week for brand in brands.values() for week in brand['weekly_data'].values()]
+    assert 40 < rows < 160
+    assert any(week.current is None for week in weeks)
+    assert all(week.previous is not None for week in weeks)
+
+    # a row limit stops generation part way through an entity
+    assert write_sales_csv(first_csv_filepath.as_posix(), rows=10) == 10
+    assert len(parse_sales_product_csv(first_csv_filepath.as_posix())) == 1
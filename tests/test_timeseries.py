@@ -0,0 +1,112 @@
+"""
+Tests covering timeseries.py
+"""
+from pathlib import Path
+from src.entities import BRAND, PRODUCT
+from src.main import output_json, parse_sales_brand_csv, parse_sales_product_csv
+from src.timeseries import LAG_YEAR, growth, load_sales_series, series_records
+
+
+CSV_ROWS = """period_id,period_name,week_commencing_date,brand_id,brand,gross_sales,units_sold
+1,2021,03/01/2021,1,Brand A,100,10
+2,2022,02/01/2022,1,Brand A,100,10
+2,2022,09/01/2022,1,Brand A,150,10
+2,2022,16/01/2022,1,Brand A,300,20
+2,2022,23/01/2022,1,Brand A,200,20
+2,2022,30/01/2022,1,Brand A,250,20
+3,2023,02/01/2023,1,Brand A,110,11
+3,2023,09/01/2023,1,Brand A,120,12
+1,2022,02/01/2022,2,Brand B,50,5
+1,2022,02/01/2022,2,Brand B,80,8
+"""
+
+
+def test_sales_series_growth(tmp_path):
+    """
+    Tests week-over-week, year-over-year and rolling growth over several years.
+    """
+    csv_filepath = tmp_path / Path('sales_brand.csv')
+    csv_filepath.write_text(CSV_ROWS, encoding='utf-8')
+    series = load_sales_series(csv_filepath.as_posix(), BRAND)
+
+    assert len(series) == 9
+    brand_b = series.entity('Brand B')
+    assert brand_b['brand_id'] == 2
+    # the later row for the same week overwrites the first
+    assert brand_b['gross_sales'].tolist() == [8000]
+    assert series.entity('Brand C') is None
+
+    assert growth(series, 'gross_sales', lag=1) == \
+        [None, None, 50.0, 100.0, -33.33, 25.0, None, 9.09, None]
+    # 02/01/2022 has no week on 02/01/2021 to compare with; 2023 pairs with 2022
+    assert growth(series, 'gross_sales', lag=LAG_YEAR) == \
+        [None, None, None, None, None, None, 10.0, -20.0, None]
+    assert growth(series, 'units_sold', lag=LAG_YEAR)[6:8] == [10.0, 20.0]
+
+    # (200 + 250) against (150 + 300)
+    rolling = growth(series, 'gross_sales', window=2, lag=2)
+    assert rolling[5] == 0.0
+    assert rolling[1] is None
+    # (150 + 300) against 02/01/2022 alone, the week before it having no row
+    assert rolling[3] is None
+    # 2023 has only two of the four weeks
+    assert growth(series, 'gross_sales', window=4, lag=LAG_YEAR)[6:8] == [None, None]
+
+    # a zero earlier week gives None for that row rather than failing the call
+    zero_csv_filepath = tmp_path / Path('zero_sales_brand.csv')
+    zero_csv_filepath.write_text(CSV_ROWS.replace(',100,10\n2,2022,09', ',0,10\n2,2022,09'),
+                                 encoding='utf-8')
+    assert growth(load_sales_series(zero_csv_filepath.as_posix(), BRAND), 'gross_sales',
+                  lag=1)[:4] == [None, None, None, 100.0]
+
+    records = series_records(series, {"wow": (1, 1)})
+    assert records[3] == {
+        "brand_id": 1, "brand_name": "Brand A", "week_commencing_date": "2022-01-16",
+        "perc_gross_sales_growth_wow": 100.0, "perc_unit_sales_growth_wow": 100.0}
+    assert records[-1]["brand_name"] == "Brand B"
+
+
+def test_sales_series_matches_two_period_output():
+    """
+    Tests year-over-year growth of single weeks equals the current/previous
+    growth in results.json.
+    """
+    sales_brand_csv = (Path(__file__).parent / Path('test_sales_brand.csv')).as_posix()
+    sales_product_csv = (Path(__file__).parent / Path('test_sales_product.csv')).as_posix()
+    output = output_json(parse_sales_brand_csv(sales_brand_csv),
+                         parse_sales_product_csv(sales_product_csv), 'timeseries.json')
+    (Path(__file__).parent.parent / Path('output') / Path('timeseries.json')).unlink()
+
+    for descriptor, csv_filename in ((BRAND, sales_brand_csv), (PRODUCT, sales_product_csv)):
+        records = series_records(load_sales_series(csv_filename, descriptor),
+                                 {"yoy": (1, LAG_YEAR)})
+        by_week = {(record[descriptor.name_key], record["week_commencing_date"]): record
+                   for record in records}
+
+        for record in output[descriptor.section]:
+            if record["current_week_commencing_date"] is None:
+                continue
+            week = by_week[(record[descriptor.name_key], record["current_week_commencing_date"])]
+            assert week["perc_gross_sales_growth_yoy"] == record["perc_gross_sales_growth"]
+            assert week["perc_unit_sales_growth_yoy"] == record["perc_unit_sales_growth"]
+
+
+def test_leap_day_is_unpaired_as_in_weekly_data(tmp_path):
+    """
+    Tests a week commencing on 29 February has no year-over-year growth, as
+    WeeklyData has no previous period for it, while 1 March still pairs.
+    """
+    csv_filepath = tmp_path / Path('sales_brand.csv')
+    csv_filepath.write_text(
+        "period_id,period_name,week_commencing_date,brand_id,brand,gross_sales,units_sold\n"
+        "1,previous,01/03/2023,1,Brand A,100,10\n"
+        "2,current,29/02/2024,1,Brand A,150,15\n"
+        "2,current,01/03/2024,1,Brand A,200,20\n", encoding='utf-8')
+    series = load_sales_series(csv_filepath.as_posix(), BRAND)
+
+    assert growth(series, 'gross_sales', lag=LAG_YEAR) == [None, None, 100.0]
+    assert growth(series, 'gross_sales', window=2, lag=LAG_YEAR)[1] is None
+
+    weekly_data = parse_sales_brand_csv(csv_filepath.as_posix())['Brand A']['weekly_data']
+    assert weekly_data['29/02'].gross_sales_percentage_growth is None
+    assert weekly_data['01/03'].gross_sales_percentage_growth == 100.0